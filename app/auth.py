@@ -2,28 +2,39 @@ from datetime import datetime, timedelta, timezone
 from typing import Annotated
 
 from fastapi import Depends
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
 from sqlalchemy.orm import Session
 
 from app.core.exceptions import CredentialsException, UnauthorizedUser
-from app.crud.usuario import get_usuario_by_username, verify_password
+from app.core.jwt_codec import TokenInvalido, codec_jwt
+from app.core.principais import cache_principais
+from app.core.senhas import pool_senhas
+from app.core.tokens_verificados import tokens_verificados
+from app.core.versoes_tokens import versoes_tokens
+from app.crud.usuario import get_usuario_by_username
 from app.database import get_db
 from app.models.usuario import Usuario
-from app.schemas.usuario import RoleEnum
+from app.schemas.usuario import Principal, RoleEnum
 from app.settings import app_settings
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
-def authenticate_user(db: Session, username: str, password: str):
-    user = get_usuario_by_username(db, username)
+async def authenticate_user(db: Session, username: str, password: str):
+    user = await run_in_threadpool(get_usuario_by_username, db, username)
 
-    if not user or not verify_password(password, user.password_hash):
+    # O bcrypt roda no pool de processos, sem ocupar o threadpool durante a verificação
+    if not user or not await pool_senhas.verificar_async(password, user.password_hash):
         return None
     return user
 
 
+def dados_do_token(usuario: Usuario) -> dict:
+    """Claims do access token; com id, role e versão a requisição é autorizada sem consultar o banco."""
+    return {"sub": usuario.username, "role": usuario.role, "uid": usuario.id, "ver": usuario.token_versao}
+
+
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + (
@@ -33,7 +44,7 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
         )
     )
     to_encode.update({"exp": expire, "type": "access"})
-    return jwt.encode(to_encode, app_settings.JWT_SECRET, algorithm=app_settings.JWT_ALGORITHM), expire
+    return codec_jwt.codificar(to_encode), expire
 
 
 def create_refresh_token(data: dict, expires_delta: timedelta = None):
@@ -42,21 +53,27 @@ def create_refresh_token(data: dict, expires_delta: timedelta = None):
         expires_delta or timedelta(days=app_settings.JWT_REFRESH_EXPIRE_DAYS)
     )
     to_encode.update({"exp": expire, "type": "refresh"})
-    return jwt.encode(to_encode, app_settings.JWT_SECRET, algorithm=app_settings.JWT_ALGORITHM), expire
+    return codec_jwt.codificar(to_encode), expire
 
 
 def verify_token(token: str, token_type: str = "access") -> dict | None:
     """Verifica e decodifica um token JWT. Retorna o payload se válido, None caso contrário."""
-    try:
-        payload = jwt.decode(token, app_settings.JWT_SECRET, algorithms=[app_settings.JWT_ALGORITHM])
-        if payload.get("type") != token_type:
+    payload = tokens_verificados.obter(token) if app_settings.JWT_CACHE_ATIVO else None
+    if payload is None:
+        try:
+            payload = codec_jwt.decodificar(token)
+        except TokenInvalido:
             return None
-        return payload
-    except JWTError:
+        if app_settings.JWT_CACHE_ATIVO:
+            tokens_verificados.guardar(token, payload)
+    if payload.get("type") != token_type:
         return None
+    return payload
 
 
-def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], db: Session = Depends(get_db)):
+def get_current_user(
+    token: Annotated[str, Depends(oauth2_scheme)], db: Session = Depends(get_db)
+) -> Principal:
     payload = verify_token(token, token_type="access")
     if not payload:
         raise CredentialsException()
@@ -65,20 +82,36 @@ def get_current_user(token: Annotated[str, Depends(oauth2_scheme)], db: Session
     if username is None:
         raise CredentialsException()
 
-    user = get_usuario_by_username(db, username)
-    if user is None:
-        raise CredentialsException()
-    return user
-
-
-def get_current_active_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    current_user = get_current_user(token, db)
-    if not current_user or not current_user.is_active:
+    usuario_id, versao = payload.get("uid"), payload.get("ver")
+    if usuario_id is not None and versao is not None:
+        # Inativar ou trocar a role incrementa a versão do usuário e revoga os tokens anteriores
+        if not versoes_tokens.valido(usuario_id, versao):
+            raise CredentialsException()
+        return Principal(id=usuario_id, username=username, role=payload.get("role"), is_active=True)
+
+    # Tokens emitidos antes das claims de autorização: principal pelo cache ou pelo banco
+    principal = cache_principais.obter(username)
+    if principal is None:
+        geracao = cache_principais.geracao
+        user = get_usuario_by_username(db, username)
+        if user is None:
+            raise CredentialsException()
+        principal = Principal.model_validate(user)
+        cache_principais.guardar(principal, geracao)
+    return principal
+
+
+def get_current_active_user(current_user: Principal = Depends(get_current_user)) -> Principal:
+    """
+    As dependências de autenticação são encadeadas por `Depends` para que o FastAPI resolva o token
+    uma única vez por requisição, mesmo com `CurrentUser`, `AdminUser` e dependências do router juntos.
+    """
+    if not current_user.is_active:
         raise CredentialsException()
     return current_user
 
 
-def get_admin_user(current_user: Usuario = Depends(get_current_user)):
+def get_admin_user(current_user: Principal = Depends(get_current_active_user)) -> Principal:
     if current_user.role != RoleEnum.admin:
         raise UnauthorizedUser()
     return current_user
@@ -1,8 +1,10 @@
+import asyncio
+from enum import Enum
 from typing import Annotated
 
 import typer
 
-from app.cli import utils
+from app.cli import simulador, utils
 from app.crud.usuario import get_password_hash
 from app.database import SessionLocal
 from app.models.usuario import Usuario
@@ -50,5 +52,58 @@ def seed_db(amount: Annotated[int, typer.Argument(help="Quantidade de produtos a
     typer.echo(f"Banco de dados populado com {amount} produtos")
 
 
+class AoFinal(str, Enum):
+    cancelar = "cancelar"
+    encerrar = "encerrar"
+    manter = "manter"
+
+
+@cli.command("simulate-readers")
+def simulate_readers(
+    username: Annotated[str, typer.Option(prompt="Usuário da API")],
+    password: Annotated[str, typer.Option(prompt="Senha", hide_input=True)],
+    url: Annotated[str, typer.Option(help="URL base da API")] = "http://localhost:8000",
+    coletores: Annotated[int, typer.Option(help="Coletores virtuais simultâneos (K)")] = 10,
+    taxa: Annotated[float, typer.Option(help="Lotes por segundo enviados por coletor")] = 2.0,
+    tamanho_lote: Annotated[int, typer.Option(help="Leituras por lote")] = 50,
+    duracao: Annotated[float, typer.Option(help="Duração da simulação em segundos")] = 30.0,
+    repetidas: Annotated[float, typer.Option(help="Fração das leituras que repetem uma etiqueta")] = 0.2,
+    funcionario: Annotated[
+        str | None, typer.Option(help="Funcionário da conferência (padrão: o usuário)")
+    ] = None,
+    zona: Annotated[str | None, typer.Option(help="Zona da conferência simulada")] = None,
+    ao_final: Annotated[
+        AoFinal, typer.Option(help="O que fazer com a conferência ao final")
+    ] = AoFinal.cancelar,
+):
+    """
+    Inicia uma conferência e simula K coletores enviando lotes de leituras a uma taxa alvo,
+    imprimindo a vazão atingida, os erros e o histograma de latência.
+    """
+    url = url.rstrip("/")
+    token = simulador.autenticar(url, username, password)
+    codigos = simulador.listar_codigos(url, token)
+    conferencia_id = simulador.iniciar_conferencia(url, token, funcionario or username, zona)
+    simulacao = simulador.Simulacao(
+        url=url,
+        token=token,
+        conferencia_id=conferencia_id,
+        coletores=coletores,
+        taxa=taxa,
+        tamanho_lote=tamanho_lote,
+        duracao=duracao,
+        repetidas=repetidas,
+        codigos=codigos,
+    )
+    typer.echo(f"Conferência {conferencia_id} iniciada; simulando {coletores} coletores por {duracao:.0f}s...")
+    try:
+        medicoes, decorrido = asyncio.run(simulador.simular(simulacao))
+    finally:
+        if ao_final != AoFinal.manter:
+            simulador.finalizar_conferencia(url, token, conferencia_id, ao_final.value)
+    for linha in simulador.relatorio(simulacao, medicoes, decorrido):
+        typer.echo(linha)
+
+
 if __name__ == "__main__":
     cli()
@@ -0,0 +1,163 @@
+"""
+Simulador de coletores RFID para dimensionar workers e banco antes de um inventário.
+
+Inicia uma conferência pela API e dispara coletores virtuais (tarefas asyncio sobre httpx) que
+enviam lotes de leituras a uma taxa alvo, medindo a latência de cada envio.
+"""
+
+import asyncio
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+import httpx
+import typer
+
+# Limites superiores (ms) das faixas do histograma de latência
+FAIXAS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+@dataclass
+class Medicoes:
+    latencias_ms: list[float] = field(default_factory=list)
+    erros: Counter[str] = field(default_factory=Counter)
+    leituras: int = 0
+    atrasos: int = 0  # Envios que saíram depois do horário previsto pela taxa alvo
+
+
+@dataclass
+class Simulacao:
+    url: str
+    token: str
+    conferencia_id: int
+    coletores: int
+    taxa: float
+    tamanho_lote: int
+    duracao: float
+    repetidas: float
+    codigos: list[str]
+
+
+def autenticar(url: str, username: str, password: str) -> str:
+    resposta = httpx.post(f"{url}/auth/login", data={"username": username, "password": password})
+    if resposta.status_code != 200:
+        typer.echo(f"Falha no login ({resposta.status_code}): {resposta.text}")
+        raise typer.Exit(code=1)
+    return resposta.json()["access_token"]
+
+
+def listar_codigos(url: str, token: str) -> list[str]:
+    resposta = httpx.get(f"{url}/pecas", headers={"Authorization": f"Bearer {token}"})
+    resposta.raise_for_status()
+    codigos = [peca["codigo_produto"] for peca in resposta.json()]
+    if not codigos:
+        typer.echo("Nenhuma peça cadastrada; rode `seed_db` antes da simulação.")
+        raise typer.Exit(code=1)
+    return codigos
+
+
+def iniciar_conferencia(url: str, token: str, funcionario: str, zona: str | None) -> int:
+    resposta = httpx.post(
+        f"{url}/conferencia",
+        json={"username_funcionario": funcionario, "zona": zona},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    if resposta.status_code != 200:
+        typer.echo(f"Não foi possível iniciar a conferência ({resposta.status_code}): {resposta.text}")
+        raise typer.Exit(code=1)
+    return resposta.json()["id"]
+
+
+def finalizar_conferencia(url: str, token: str, conferencia_id: int, acao: str):
+    resposta = httpx.put(
+        f"{url}/conferencia/{conferencia_id}/{acao}", headers={"Authorization": f"Bearer {token}"}
+    )
+    resposta.raise_for_status()
+
+
+async def coletor(numero: int, simulacao: Simulacao, cliente: httpx.AsyncClient, medicoes: Medicoes):
+    """Um coletor virtual: envia um lote a cada `1 / taxa` segundos até o fim da simulação."""
+    aleatorio = random.Random(numero)
+    lidas: list[tuple[str, str]] = []
+    intervalo = 1 / simulacao.taxa
+    inicio = time.perf_counter()
+    envio = 0
+
+    while (previsto := inicio + envio * intervalo) < inicio + simulacao.duracao:
+        espera = previsto - time.perf_counter()
+        if espera > 0:
+            await asyncio.sleep(espera)
+        else:
+            medicoes.atrasos += 1
+
+        lido_em = datetime.now(timezone.utc).isoformat()
+        lote = []
+        for _ in range(simulacao.tamanho_lote):
+            if lidas and aleatorio.random() < simulacao.repetidas:
+                etiqueta, codigo = aleatorio.choice(lidas)
+            else:
+                etiqueta = f"SIM{simulacao.conferencia_id:06d}{numero:04d}{len(lidas):08d}"
+                codigo = aleatorio.choice(simulacao.codigos)
+                lidas.append((etiqueta, codigo))
+            lote.append({"rfid_etiqueta": etiqueta, "codigo_produto": codigo, "lido_em": lido_em})
+
+        antes = time.perf_counter()
+        try:
+            resposta = await cliente.post(f"/conferencia/{simulacao.conferencia_id}/leitura", json=lote)
+            if resposta.status_code == 200:
+                medicoes.leituras += len(lote)
+            else:
+                medicoes.erros[f"HTTP {resposta.status_code}"] += 1
+        except httpx.HTTPError as exc:
+            medicoes.erros[type(exc).__name__] += 1
+        medicoes.latencias_ms.append((time.perf_counter() - antes) * 1000)
+        envio += 1
+
+
+async def simular(simulacao: Simulacao) -> tuple[Medicoes, float]:
+    medicoes = Medicoes()
+    limites = httpx.Limits(max_connections=simulacao.coletores)
+    async with httpx.AsyncClient(
+        base_url=simulacao.url,
+        headers={"Authorization": f"Bearer {simulacao.token}"},
+        limits=limites,
+        timeout=30,
+    ) as cliente:
+        inicio = time.perf_counter()
+        await asyncio.gather(
+            *(coletor(numero, simulacao, cliente, medicoes) for numero in range(simulacao.coletores))
+        )
+        # O último lote sai antes do fim da janela; a vazão é calculada sobre a janela inteira
+        return medicoes, max(time.perf_counter() - inicio, simulacao.duracao)
+
+
+def histograma(latencias_ms: list[float], largura: int = 40) -> list[str]:
+    contagem = Counter(next((f for f in FAIXAS_MS if latencia <= f), None) for latencia in latencias_ms)
+    maior = max(contagem.values(), default=0) or 1
+    linhas = []
+    for faixa in (*FAIXAS_MS, None):
+        rotulo = f"<= {faixa} ms" if faixa else f">  {FAIXAS_MS[-1]} ms"
+        quantidade = contagem.get(faixa, 0)
+        linhas.append(f"{rotulo:>12} | {'#' * round(quantidade / maior * largura):<{largura}} {quantidade}")
+    return linhas
+
+
+def relatorio(simulacao: Simulacao, medicoes: Medicoes, duracao: float) -> list[str]:
+    envios = len(medicoes.latencias_ms)
+    ordenadas = sorted(medicoes.latencias_ms)
+
+    def percentil(p: float) -> float:
+        return ordenadas[min(len(ordenadas) - 1, int(p / 100 * len(ordenadas)))] if ordenadas else 0.0
+
+    alvo = simulacao.coletores * simulacao.taxa * simulacao.tamanho_lote
+    linhas = [
+        f"Conferência {simulacao.conferencia_id}: {simulacao.coletores} coletores por {duracao:.1f}s",
+        f"Envios: {envios} ({envios / duracao:.1f}/s), atrasados em relação à taxa alvo: {medicoes.atrasos}",
+        f"Leituras aceitas: {medicoes.leituras} ({medicoes.leituras / duracao:.0f}/s, alvo {alvo:.0f}/s)",
+        f"Latência: p50 {percentil(50):.1f} ms | p95 {percentil(95):.1f} ms | p99 {percentil(99):.1f} ms",
+        f"Erros: {sum(medicoes.erros.values())}",
+    ]
+    linhas += [f"  {tipo}: {quantidade}" for tipo, quantidade in medicoes.erros.most_common()]
+    return linhas + ["", "Histograma de latência por envio:", *histograma(medicoes.latencias_ms)]
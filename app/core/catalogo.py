@@ -0,0 +1,106 @@
+import logging
+import threading
+import time
+from typing import Iterable, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.peca import Peca
+from app.settings import app_settings
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogoPecas:
+    """
+    Cache em memória de `codigo_produto -> (id, codigo_produto, localizacao)` usado pela ingestão de
+    leituras; a localização decide em quais conferências de zona o produto é contado.
+
+    O catálogo é carregado inteiro no startup e recarregado quando expira o TTL, que limita o tempo
+    em que outro worker pode enxergar uma peça alterada. Códigos ausentes do cache são buscados no
+    banco (e então guardados), então uma peça recém-criada nunca é rejeitada por causa do cache.
+
+    Cada `invalidar` avança uma geração; uma carga feita enquanto a geração mudou não é guardada (só
+    devolvida a quem a pediu), para que uma invalidação concorrente não seja desfeita por um valor
+    lido antes dela.
+    """
+
+    def __init__(self, ttl_segundos: float):
+        self._ttl_segundos = ttl_segundos
+        self._lock = threading.Lock()
+        self._produtos: dict[str, Tuple[int, str, str]] = {}
+        self._carregado_em: float | None = None
+        self._geracao = 0
+        self.acertos = 0
+        self.falhas = 0
+
+    def carregar(self, session: Session):
+        """Carrega o catálogo inteiro em uma única consulta."""
+        with self._lock:
+            geracao = self._geracao
+        stmt = select(Peca.id, Peca.codigo_produto, Peca.localizacao)
+        produtos = {linha.codigo_produto: tuple(linha) for linha in session.execute(stmt)}
+        with self._lock:
+            if self._geracao != geracao:
+                # Invalidado durante a consulta: a próxima resolução carrega de novo
+                return
+            self._produtos = produtos
+            self._carregado_em = time.monotonic()
+        logger.info(f"Catálogo de peças carregado com {len(produtos)} produtos")
+
+    def invalidar(self, *codigos_produto: str):
+        """Remove os códigos informados do cache ou, sem argumentos, força um recarregamento completo."""
+        with self._lock:
+            self._geracao += 1
+            if not codigos_produto:
+                self._produtos = {}
+                self._carregado_em = None
+                return
+            for codigo in codigos_produto:
+                self._produtos.pop(codigo, None)
+
+    def limpar_estatisticas(self):
+        with self._lock:
+            self.acertos = 0
+            self.falhas = 0
+
+    def _expirado(self) -> bool:
+        return self._carregado_em is None or time.monotonic() - self._carregado_em > self._ttl_segundos
+
+    def resolver(self, session: Session, codigos_produto: Iterable[str]) -> dict[str, Tuple[int, str, str]]:
+        """
+        Resolve os códigos para `(id, codigo_produto, localizacao)`. Os que faltam no cache são buscados no banco
+        com uma única consulta `IN`; códigos inexistentes simplesmente ficam fora do retorno.
+        """
+        codigos = set(codigos_produto)
+        if not codigos:
+            return {}
+        if self._expirado():
+            self.carregar(session)
+
+        with self._lock:
+            encontrados = {codigo: self._produtos[codigo] for codigo in codigos if codigo in self._produtos}
+            self.acertos += len(encontrados)
+            self.falhas += len(codigos) - len(encontrados)
+            geracao = self._geracao
+
+        faltantes = codigos - encontrados.keys()
+        if faltantes:
+            stmt = select(Peca.id, Peca.codigo_produto, Peca.localizacao).where(
+                Peca.codigo_produto.in_(faltantes)
+            )
+            do_banco = {linha.codigo_produto: tuple(linha) for linha in session.execute(stmt)}
+            with self._lock:
+                if self._geracao == geracao:
+                    self._produtos.update(do_banco)
+            encontrados.update(do_banco)
+
+        return encontrados
+
+    def estatisticas(self) -> dict[str, int]:
+        with self._lock:
+            return {"acertos": self.acertos, "falhas": self.falhas, "itens": len(self._produtos)}
+
+
+catalogo_pecas = CatalogoPecas(ttl_segundos=app_settings.CATALOGO_CACHE_TTL_SEGUNDOS)
@@ -0,0 +1,187 @@
+import logging
+import threading
+from collections import Counter
+from contextlib import AbstractContextManager
+from typing import Callable
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.conferencia import Leitura
+from app.settings import app_settings
+
+logger = logging.getLogger(__name__)
+
+# Linhas por INSERT multi-linhas; mantém o número de parâmetros abaixo do limite do Postgres (65535)
+LINHAS_POR_INSERCAO = 5000
+
+# (conferencia_id, produto_id, codigo_produto)
+ChaveContador = tuple[int, int, str]
+
+
+def somar_quantidades(session: Session, quantidades: dict[ChaveContador, int]):
+    """
+    Soma as quantidades em `leitura` com upserts multi-linhas em `uq_conferencia_produto` (sem commit).
+
+    As linhas são ordenadas por (conferência, produto) para que transações concorrentes travem as
+    linhas de `leitura` sempre na mesma ordem e não entrem em deadlock.
+    """
+    linhas = [
+        {
+            "conferencia_id": conferencia_id,
+            "produto_id": produto_id,
+            "codigo_categoria": codigo_produto,
+            "quantidade": quantidade,
+        }
+        for (conferencia_id, produto_id, codigo_produto), quantidade in sorted(quantidades.items())
+    ]
+
+    for inicio in range(0, len(linhas), LINHAS_POR_INSERCAO):
+        stmt = insert(Leitura).values(linhas[inicio : inicio + LINHAS_POR_INSERCAO])
+        # Caso exista um conflito (leitura já registrada) atualiza somente a quantidade
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["conferencia_id", "produto_id"],
+            set_={"quantidade": Leitura.quantidade + stmt.excluded.quantidade},
+        )
+        session.execute(stmt)
+
+
+class ContadoresLeitura:
+    """
+    Contadores em memória (write-behind) para as quantidades de `leitura`.
+
+    Com muitos coletores lendo o mesmo produto, cada lote faria um upsert na mesma linha
+    (conferência, produto) e as transações ficariam enfileiradas na trava dessa linha. Quando ativo,
+    os lotes só registram as tags no banco e somam as quantidades aqui, em fatias com travas
+    próprias; uma thread descarrega tudo a cada `intervalo_segundos` em um upsert ordenado.
+
+    Quem lê as quantidades chama `descarregar` antes da leitura, o que mantém as consultas exatas para
+    as leituras recebidas por este worker; as de outros workers aparecem em até um intervalo. Por isso
+    as consultas (inclusive GETs) fazem um commit das quantidades pendentes deste worker como efeito
+    colateral, e só são exatas quando a API roda com um único worker.
+
+    Limite de durabilidade: as tags de um lote são commitadas antes das suas quantidades chegarem ao
+    banco. Se o processo cair nesse intervalo (até `intervalo_segundos`, mais o tempo de uma descarga
+    que falhe), as quantidades em memória se perdem; como as tags já estão gravadas, um reenvio do lote
+    não as conta de novo e a conferência fica com quantidades menores que as tags lidas. Um
+    encerramento normal descarrega tudo (`parar`). Quem não aceita essa janela deixa
+    `CONTADORES_WRITE_BEHIND_ATIVO` desligado, e as quantidades vão na mesma transação das tags.
+    """
+
+    def __init__(self, fatias: int, intervalo_segundos: float):
+        self._fatias: list[tuple[threading.Lock, Counter[ChaveContador]]] = [
+            (threading.Lock(), Counter()) for _ in range(fatias)
+        ]
+        self._intervalo_segundos = intervalo_segundos
+
+        # Uma descarga por vez: quem lê espera a descarga em andamento chegar ao banco
+        self._descarregando = threading.Lock()
+        self._condicao = threading.Condition()
+        self._parar = False
+        self._thread: threading.Thread | None = None
+        self.ativo = False
+        self.descargas = 0
+        self.linhas_descarregadas = 0
+
+    def somar(self, conferencia_id: int, quantidades: dict[tuple[int, str], int]):
+        """Soma as quantidades `(produto_id, codigo_produto) -> quantidade` de um lote já commitado."""
+        for (produto_id, codigo_produto), quantidade in quantidades.items():
+            trava, pendentes = self._fatias[hash((conferencia_id, produto_id)) % len(self._fatias)]
+            with trava:
+                pendentes[(conferencia_id, produto_id, codigo_produto)] += quantidade
+
+    def descarregar(self, session: Session, conferencia_id: int | None = None) -> int:
+        """
+        Grava e faz o commit das quantidades pendentes de uma conferência (ou de todas); retorna
+        quantas linhas foram somadas. Em caso de falha as quantidades voltam para os contadores.
+        """
+        with self._descarregando:
+            retiradas = self._retirar(conferencia_id)
+            if not retiradas:
+                return 0
+            try:
+                somar_quantidades(session, retiradas)
+                session.commit()
+            except Exception:
+                session.rollback()
+                self._devolver(retiradas)
+                raise
+            self.descargas += 1
+            self.linhas_descarregadas += len(retiradas)
+            return len(retiradas)
+
+    def iniciar(self, fabrica_sessoes: Callable[[], AbstractContextManager[Session]]):
+        with self._condicao:
+            self._parar = False
+        self.ativo = True
+        self._thread = threading.Thread(
+            target=self._executar, args=(fabrica_sessoes,), name="contadores-leitura", daemon=True
+        )
+        self._thread.start()
+
+    def parar(self, fabrica_sessoes: Callable[[], AbstractContextManager[Session]]):
+        """Para a thread e grava o que estiver pendente (chamado no shutdown)."""
+        self.ativo = False
+        with self._condicao:
+            self._parar = True
+            self._condicao.notify()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        with fabrica_sessoes() as session:
+            self.descarregar(session)
+
+    def estatisticas(self) -> dict[str, int | bool]:
+        pendentes = 0
+        for trava, contadores in self._fatias:
+            with trava:
+                pendentes += len(contadores)
+        return {
+            "ativo": self.ativo,
+            "pendentes": pendentes,
+            "descargas": self.descargas,
+            "linhas_descarregadas": self.linhas_descarregadas,
+        }
+
+    def limpar(self):
+        for trava, contadores in self._fatias:
+            with trava:
+                contadores.clear()
+        self.descargas = 0
+        self.linhas_descarregadas = 0
+
+    def _retirar(self, conferencia_id: int | None) -> Counter[ChaveContador]:
+        retiradas: Counter[ChaveContador] = Counter()
+        for trava, contadores in self._fatias:
+            with trava:
+                if conferencia_id is None:
+                    retiradas.update(contadores)
+                    contadores.clear()
+                    continue
+                for chave in [chave for chave in contadores if chave[0] == conferencia_id]:
+                    retiradas[chave] += contadores.pop(chave)
+        return retiradas
+
+    def _devolver(self, quantidades: Counter[ChaveContador]):
+        for chave, quantidade in quantidades.items():
+            trava, pendentes = self._fatias[hash(chave[:2]) % len(self._fatias)]
+            with trava:
+                pendentes[chave] += quantidade
+
+    def _executar(self, fabrica_sessoes: Callable[[], AbstractContextManager[Session]]):
+        while True:
+            with self._condicao:
+                self._condicao.wait_for(lambda: self._parar, timeout=self._intervalo_segundos)
+                if self._parar:
+                    return
+            try:
+                with fabrica_sessoes() as session:
+                    self.descarregar(session)
+            except Exception:
+                logger.exception("Falha ao gravar os contadores de leitura; nova tentativa no próximo ciclo")
+
+
+contadores_leitura = ContadoresLeitura(
+    fatias=app_settings.CONTADORES_FATIAS,
+    intervalo_segundos=app_settings.CONTADORES_INTERVALO_MS / 1000,
+)
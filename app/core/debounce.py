@@ -0,0 +1,142 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from typing import Callable
+
+from app.schemas.conferencia import LeituraCreate
+from app.settings import app_settings
+
+_EPOCA = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_UM_MS = timedelta(milliseconds=1)
+
+
+def _em_ms(momento: datetime) -> int:
+    # Datas sem fuso são tratadas como UTC
+    if momento.tzinfo is None:
+        momento = momento.replace(tzinfo=timezone.utc)
+    return (momento - _EPOCA) // _UM_MS
+
+
+class DebounceLeituras:
+    """
+    Descarta, antes de qualquer trabalho no banco, leituras repetidas da mesma tag na mesma conferência
+    dentro de uma janela de tempo, usando o `lido_em` informado pelo leitor.
+
+    Cada par (conferência, tag) guarda o instante da última leitura; enquanto a tag continua sendo
+    reportada dentro da janela ela segue suprimida. As entradas expiram por uma roda de tempo com
+    `fatias + 1` posições cobrindo a janela, girada pelo relógio monotônico do servidor: uma entrada
+    vive pelo menos uma janela depois da última confirmação, e as posições que ficaram para trás são
+    esvaziadas, mantendo a memória proporcional às tags lidas na última janela. O `lido_em` dos
+    leitores só é comparado com leituras da mesma tag, de modo que um leitor com o relógio adiantado
+    não faz expirar as entradas dos demais.
+    """
+
+    def __init__(self, janela_ms: int, fatias: int = 64, relogio: Callable[[], float] = time.monotonic):
+        self.janela_ms = janela_ms
+        self._relogio = relogio
+        self._largura = max(1, -(-janela_ms // fatias))  # ms por fatia, arredondado para cima
+        self._roda: list[set[tuple[int, str]]] = [set() for _ in range(fatias + 1)]
+        # (conferência, tag) -> (último `lido_em` em ms, fatia do servidor em que foi confirmado)
+        self._ultima: dict[tuple[int, str], tuple[int, int]] = {}
+        self._fatia_atual: int | None = None
+        self._lock = threading.Lock()
+        self.aceitas = 0
+        self.suprimidas = 0
+
+    def filtrar(
+        self,
+        conferencia_id: int,
+        leituras: list[LeituraCreate],
+        marcas: dict[tuple[int, str], int] | None = None,
+    ) -> tuple[list[LeituraCreate], dict[tuple[int, str], int]]:
+        """
+        Retorna, na ordem recebida, as leituras que não repetem uma tag dentro da janela, junto com as
+        marcas `(conferência, tag) -> instante` dessas leituras.
+
+        Filtrar não registra nada: as tags só passam a contar como vistas em `confirmar(marcas)`,
+        depois que as leituras aceitas forem gravadas ou enfileiradas. Assim um envio que falha (503
+        da fila, erro no banco) pode ser repetido com o mesmo `lido_em` sem ser suprimido. Passar
+        `marcas` de um filtro anterior ainda não confirmado (micro-lotes do stream) filtra também
+        contra ele e acumula as novas marcas no mesmo dicionário.
+        """
+        marcas = {} if marcas is None else marcas
+        if self.janela_ms <= 0:
+            return leituras, marcas
+
+        aceitas = []
+        with self._lock:
+            self._avancar(self._fatia_do_relogio())
+            for leitura in leituras:
+                momento = _em_ms(leitura.lido_em)
+                chave = (conferencia_id, leitura.rfid_etiqueta)
+                guardada = self._ultima.get(chave)
+                ultima = marcas.get(chave, guardada[0] if guardada else None)
+                if ultima is not None and abs(momento - ultima) < self.janela_ms:
+                    self.suprimidas += 1
+                    # A tag continua no campo do leitor: a janela passa a contar desta leitura
+                    if momento > ultima:
+                        marcas[chave] = momento
+                    continue
+                marcas[chave] = momento
+                aceitas.append(leitura)
+            self.aceitas += len(aceitas)
+        return aceitas, marcas
+
+    def confirmar(self, marcas: dict[tuple[int, str], int]):
+        """Registra como vistas as marcas de leituras já gravadas ou enfileiradas."""
+        if self.janela_ms <= 0:
+            return
+        with self._lock:
+            agora = self._fatia_do_relogio()
+            self._avancar(agora)
+            posicao = self._roda[agora % len(self._roda)]
+            for chave, momento in marcas.items():
+                # Envios concorrentes confirmam fora de ordem: vale a leitura mais recente
+                guardada = self._ultima.get(chave)
+                if guardada is None or momento > guardada[0]:
+                    self._ultima[chave] = (momento, agora)
+                    posicao.add(chave)
+
+    def limpar(self):
+        with self._lock:
+            for fatia in self._roda:
+                fatia.clear()
+            self._ultima.clear()
+            self._fatia_atual = None
+            self.aceitas = 0
+            self.suprimidas = 0
+
+    def estatisticas(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "janela_ms": self.janela_ms,
+                "tags": len(self._ultima),
+                "aceitas": self.aceitas,
+                "suprimidas": self.suprimidas,
+            }
+
+    def _fatia_do_relogio(self) -> int:
+        return int(self._relogio() * 1000) // self._largura
+
+    def _avancar(self, fatia: int):
+        if self._fatia_atual is None:
+            self._fatia_atual = fatia
+            return
+        if fatia <= self._fatia_atual:
+            return
+
+        # Cada posição reaproveitada guardava a fatia `f - n`, que já saiu da janela. Uma tag que foi
+        # lida de novo depois também está numa posição mais nova e só sai quando aquela expirar
+        n = len(self._roda)
+        for f in range(self._fatia_atual + 1, min(fatia, self._fatia_atual + n) + 1):
+            posicao = self._roda[f % n]
+            for chave in posicao:
+                guardada = self._ultima.get(chave)
+                if guardada is not None and guardada[1] <= f - n:
+                    del self._ultima[chave]
+            posicao.clear()
+        self._fatia_atual = fatia
+
+
+debounce_leituras = DebounceLeituras(janela_ms=app_settings.DEBOUNCE_JANELA_MS)
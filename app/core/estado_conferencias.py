@@ -0,0 +1,131 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.notificacoes import ouvinte_notificacoes
+from app.core.tags_vistas import tags_vistas
+from app.models.conferencia import Conferencia, StatusConferencia
+from app.models.usuario import Usuario
+from app.settings import app_settings
+
+# Publicado por `mudar_status_conferencia` com o id da conferência que saiu de (ou voltou a) INICIADA
+CANAL_CONFERENCIAS = "conferencias"
+
+
+@dataclass(frozen=True)
+class EstadoConferencia:
+    """O necessário para validar e responder uma gravação na conferência, sem leituras nem eventos."""
+
+    id: int
+    status: StatusConferencia
+    username_funcionario: str
+    zona: str | None
+    created_at: datetime
+
+
+class EstadoConferencias:
+    """
+    Cache em memória de `conferencia_id -> EstadoConferencia` para os endpoints de gravação, que só
+    precisam saber se a conferência existe e está em andamento.
+
+    Conferências encerradas ou canceladas não mudam mais de estado e não expiram; as em andamento
+    expiram após `ttl_segundos`, o que limita o tempo em que este worker aceita gravações em uma
+    conferência encerrada por outro worker. Acima de `capacidade` entradas sai a usada há mais tempo.
+    Como em `catalogo_pecas`, cada invalidação avança uma geração e um estado lido do banco antes
+    dela não é guardado, para não devolver ao cache um INICIADA de uma conferência já encerrada. `mudar_status_conferencia` invalida a
+    entrada no worker que fez a mudança e avisa os demais pelo canal `CANAL_CONFERENCIAS`.
+
+    Quando observa uma conferência fora de INICIADA, seja pelo aviso ou ao recarregar a entrada,
+    descarta também o conjunto de `tags_vistas` dela, para que as tags de uma conferência encerrada
+    por outro worker não fiquem em memória para sempre.
+    """
+
+    def __init__(self, ttl_segundos: float, capacidade: int = 1000):
+        self._ttl_segundos = ttl_segundos
+        self._capacidade = capacidade
+        self._lock = threading.Lock()
+        self._estados: OrderedDict[int, tuple[EstadoConferencia, float]] = OrderedDict()
+        self._geracao = 0
+        self.acertos = 0
+        self.falhas = 0
+
+    def obter(self, session: Session, conferencia_id: int) -> EstadoConferencia | None:
+        """Retorna o estado da conferência, ou None se ela não existir (ausências não são guardadas)."""
+        with self._lock:
+            guardado = self._estados.get(conferencia_id)
+            if guardado and (
+                guardado[0].status != StatusConferencia.INICIADA or time.monotonic() < guardado[1]
+            ):
+                self._estados.move_to_end(conferencia_id)
+                self.acertos += 1
+                return guardado[0]
+            self.falhas += 1
+            geracao = self._geracao
+
+        stmt = (
+            select(
+                Conferencia.id, Conferencia.status, Usuario.username, Conferencia.zona, Conferencia.created_at
+            )
+            .join(Usuario, Usuario.id == Conferencia.id_funcionario)
+            .where(Conferencia.id == conferencia_id)
+        )
+        linha = session.execute(stmt).first()
+        if linha is None:
+            return None
+        estado = EstadoConferencia(*linha)
+        if estado.status != StatusConferencia.INICIADA:
+            tags_vistas.descartar(conferencia_id)
+        with self._lock:
+            if self._geracao == geracao:
+                self._estados[conferencia_id] = (estado, time.monotonic() + self._ttl_segundos)
+                self._estados.move_to_end(conferencia_id)
+                while len(self._estados) > self._capacidade:
+                    self._estados.popitem(last=False)
+        return estado
+
+    def invalidar(self, conferencia_id: int):
+        with self._lock:
+            self._geracao += 1
+            self._estados.pop(conferencia_id, None)
+
+    def status_alterado(self, mensagem: str | None):
+        """
+        Assinante de `CANAL_CONFERENCIAS`: a conferência mudou de status em algum worker. Com `None`
+        (avisos perdidos na reconexão) esquece as entradas em andamento, que são recarregadas do banco.
+        """
+        if mensagem is None:
+            with self._lock:
+                self._geracao += 1
+                for conferencia_id in [
+                    conferencia_id
+                    for conferencia_id, guardado in self._estados.items()
+                    if guardado[0].status == StatusConferencia.INICIADA
+                ]:
+                    del self._estados[conferencia_id]
+            return
+        conferencia_id = int(mensagem)
+        self.invalidar(conferencia_id)
+        tags_vistas.descartar(conferencia_id)
+
+    def limpar(self):
+        with self._lock:
+            self._geracao += 1
+            self._estados.clear()
+            self.acertos = 0
+            self.falhas = 0
+
+    def estatisticas(self) -> dict[str, int]:
+        with self._lock:
+            return {"acertos": self.acertos, "falhas": self.falhas, "itens": len(self._estados)}
+
+
+estado_conferencias = EstadoConferencias(
+    ttl_segundos=app_settings.ESTADO_CONFERENCIA_TTL_SEGUNDOS,
+    capacidade=app_settings.ESTADO_CONFERENCIA_CACHE_CAPACIDADE,
+)
+ouvinte_notificacoes.assinar(CANAL_CONFERENCIAS, estado_conferencias.status_alterado)
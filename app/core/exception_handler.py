@@ -27,6 +27,7 @@ class ExceptionHandler:
         return JSONResponse(
             status_code=exc.code,
             content=ErrorResponse(detail=exc.detail).model_dump(),
+            headers=exc.headers,
         )
 
     @staticmethod
@@ -98,3 +98,38 @@ class CredentialsException(AppException):
             code=status.HTTP_401_UNAUTHORIZED,
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+
+class FilaIngestaoCheia(AppException):
+    def __init__(self):
+        super().__init__(
+            detail="Fila de ingestão cheia, tente novamente em instantes",
+            log_msg="Fila de ingestão atingiu o limite de leituras pendentes",
+            code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+
+
+class HashSenhasSobrecarregado(AppException):
+    def __init__(self):
+        super().__init__(
+            detail="Muitos logins simultâneos, tente novamente em instantes",
+            log_msg="Pool de hash de senhas atingiu o limite de operações pendentes",
+            code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={"Retry-After": "1"},
+        )
+
+
+class FormatoNaoSuportado(AppException):
+    def __init__(self, content_type: str):
+        super().__init__(
+            detail=f"Formato de corpo não suportado: {content_type}",
+            code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        )
+
+
+class CorpoMuitoGrande(AppException):
+    def __init__(self, detail: str):
+        super().__init__(
+            detail=detail,
+            code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        )
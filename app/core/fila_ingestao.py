@@ -0,0 +1,328 @@
+import logging
+import threading
+from collections import deque
+from contextlib import AbstractContextManager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.exceptions import FilaIngestaoCheia
+from app.core.tags_vistas import tags_vistas
+from app.crud.conferencia import (
+    ResultadoLeituras,
+    aplicar_leituras,
+    concluir_leituras,
+    guardar_lote_falho,
+    marcar_lote_aplicado,
+)
+from app.models.conferencia import Conferencia, StatusConferencia
+from app.schemas.conferencia import LeituraCreate
+from app.settings import app_settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LoteEnfileirado:
+    conferencia_id: int
+    sequencia: int
+    leituras: list[LeituraCreate]
+    chave_idempotencia: str | None = None
+    recebido_em: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+class FilaIngestao:
+    """
+    Fila de lotes de leitura aceitos com 202 e gravados depois por um escritor em segundo plano.
+
+    O escritor junta lotes de vários coletores em transações maiores, disparando quando a fila
+    acumula `leituras_por_transacao` leituras ou a cada `intervalo_segundos`. Cada lote recebe um
+    número de sequência por conferência, e o progresso (última sequência aplicada) pode ser
+    consultado. A fila é do worker: sequências e progresso valem para o worker que recebeu o lote.
+
+    Como a fila fica em memória, encerrar uma conferência só descarrega a fila do worker que atende o
+    encerramento. Os lotes que outros workers já aceitaram são gravados por eles depois, desde que
+    tenham sido recebidos até `tolerancia_encerramento_segundos` após o encerramento (o tempo em que
+    outro worker ainda pode ver a conferência em andamento no cache de estado) e gravados em até
+    `prazo_apos_encerramento_segundos` (enquanto as tags da conferência são mantidas para deduplicar).
+    Um lote que passe desse prazo na fila é rejeitado com um erro no log.
+    """
+
+    def __init__(
+        self,
+        leituras_por_transacao: int,
+        intervalo_segundos: float,
+        max_leituras_pendentes: int,
+        max_tentativas: int = 5,
+        tolerancia_encerramento_segundos: float = 0.0,
+        prazo_apos_encerramento_segundos: float = 0.0,
+    ):
+        self._leituras_por_transacao = leituras_por_transacao
+        self._intervalo_segundos = intervalo_segundos
+        self._max_leituras_pendentes = max_leituras_pendentes
+        self._max_tentativas = max_tentativas
+        self._tolerancia_encerramento = timedelta(seconds=tolerancia_encerramento_segundos)
+        self._prazo_apos_encerramento = timedelta(seconds=prazo_apos_encerramento_segundos)
+
+        self._condicao = threading.Condition()
+        self._pendentes: deque[LoteEnfileirado] = deque()
+        self._leituras_pendentes = 0
+        self._recebidas: dict[int, int] = {}
+        self._aplicadas: dict[int, int] = {}
+        self._rejeitados: dict[int, int] = {}
+        self._falhos: dict[int, int] = {}
+        self._em_quarentena: dict[int, int] = {}
+
+        # Serializa quem retira e grava lotes, para que a ordem de aplicação siga a sequência
+        self._aplicando = threading.Lock()
+        self._escritor: threading.Thread | None = None
+        self._parar = False
+
+    def enfileirar(
+        self, conferencia_id: int, leituras: list[LeituraCreate], chave_idempotencia: str | None = None
+    ) -> int:
+        """Aceita um lote para gravação posterior e retorna seu número de sequência na conferência."""
+        with self._condicao:
+            if self._leituras_pendentes + len(leituras) > self._max_leituras_pendentes:
+                raise FilaIngestaoCheia()
+            sequencia = self._recebidas.get(conferencia_id, 0) + 1
+            self._recebidas[conferencia_id] = sequencia
+            self._pendentes.append(LoteEnfileirado(conferencia_id, sequencia, leituras, chave_idempotencia))
+            self._leituras_pendentes += len(leituras)
+            if self._leituras_pendentes >= self._leituras_por_transacao:
+                self._condicao.notify()
+        return sequencia
+
+    def progresso(self, conferencia_id: int) -> dict[str, int]:
+        with self._condicao:
+            return {
+                "sequencia_recebida": self._recebidas.get(conferencia_id, 0),
+                "sequencia_aplicada": self._aplicadas.get(conferencia_id, 0),
+                "lotes_pendentes": sum(1 for lote in self._pendentes if lote.conferencia_id == conferencia_id),
+                "lotes_rejeitados": self._rejeitados.get(conferencia_id, 0),
+                "lotes_falhos": self._falhos.get(conferencia_id, 0),
+                "leituras_em_quarentena": self._em_quarentena.get(conferencia_id, 0),
+            }
+
+    def iniciar(self, fabrica_sessoes: Callable[[], AbstractContextManager[Session]]):
+        """Inicia o escritor em segundo plano (chamado no startup da aplicação)."""
+        with self._condicao:
+            self._parar = False
+        self._escritor = threading.Thread(
+            target=self._executar, args=(fabrica_sessoes,), name="escritor-ingestao", daemon=True
+        )
+        self._escritor.start()
+
+    def parar(self, fabrica_sessoes: Callable[[], AbstractContextManager[Session]]):
+        """Para o escritor e grava tudo o que ainda estiver na fila (chamado no shutdown)."""
+        with self._condicao:
+            self._parar = True
+            self._condicao.notify()
+        if self._escritor:
+            self._escritor.join()
+            self._escritor = None
+        with fabrica_sessoes() as session:
+            self.descarregar(session)
+
+    def descarregar(self, session: Session, conferencia_id: int | None = None):
+        """
+        Grava imediatamente os lotes pendentes de uma conferência (ou de todas), esperando um lote
+        que o escritor esteja gravando no momento.
+        """
+        with self._aplicando:
+            while lotes := self._retirar(conferencia_id):
+                self._aplicar(session, lotes)
+
+    def limpar(self):
+        with self._condicao:
+            self._pendentes.clear()
+            self._leituras_pendentes = 0
+            self._recebidas.clear()
+            self._aplicadas.clear()
+            self._rejeitados.clear()
+            self._falhos.clear()
+            self._em_quarentena.clear()
+
+    def _executar(self, fabrica_sessoes: Callable[[], AbstractContextManager[Session]]):
+        while True:
+            with self._condicao:
+                self._condicao.wait_for(
+                    lambda: self._parar or self._leituras_pendentes >= self._leituras_por_transacao,
+                    timeout=self._intervalo_segundos,
+                )
+                if self._parar:
+                    return
+                if not self._pendentes:
+                    continue
+            try:
+                with fabrica_sessoes() as session:
+                    self.descarregar(session)
+            except Exception:
+                logger.exception("Falha ao gravar lotes da fila de ingestão; nova tentativa no próximo ciclo")
+
+    def _retirar(self, conferencia_id: int | None) -> list[LoteEnfileirado]:
+        """Retira lotes da fila, na ordem de chegada, até completar uma transação."""
+        lotes: list[LoteEnfileirado] = []
+        leituras = 0
+        with self._condicao:
+            restantes: deque[LoteEnfileirado] = deque()
+            while self._pendentes and leituras < self._leituras_por_transacao:
+                lote = self._pendentes.popleft()
+                if conferencia_id is not None and lote.conferencia_id != conferencia_id:
+                    restantes.append(lote)
+                    continue
+                lotes.append(lote)
+                leituras += len(lote.leituras)
+            self._pendentes.extendleft(reversed(restantes))
+            self._leituras_pendentes -= leituras
+        return lotes
+
+    def _devolver(self, lotes: list[LoteEnfileirado]):
+        with self._condicao:
+            self._pendentes.extendleft(reversed(lotes))
+            self._leituras_pendentes += sum(len(lote.leituras) for lote in lotes)
+
+    def _concluir(
+        self,
+        lotes: list[LoteEnfileirado],
+        rejeitados: list[LoteEnfileirado] = (),
+        falhos: list[LoteEnfileirado] = (),
+        resultados: dict[int, ResultadoLeituras] | None = None,
+    ):
+        with self._condicao:
+            for lote in lotes:
+                self._aplicadas[lote.conferencia_id] = max(
+                    lote.sequencia, self._aplicadas.get(lote.conferencia_id, 0)
+                )
+            for lote in rejeitados:
+                self._rejeitados[lote.conferencia_id] = self._rejeitados.get(lote.conferencia_id, 0) + 1
+            for lote in falhos:
+                self._falhos[lote.conferencia_id] = self._falhos.get(lote.conferencia_id, 0) + 1
+            for conferencia_id, resultado in (resultados or {}).items():
+                self._em_quarentena[conferencia_id] = self._em_quarentena.get(conferencia_id, 0) + sum(
+                    resultado.quarentena.values()
+                )
+
+    def _aplicar(self, session: Session, lotes: list[LoteEnfileirado]):
+        """
+        Grava os lotes em uma única transação. Se ela falhar, cada lote é tentado sozinho, até
+        `max_tentativas` vezes; um lote que falha em todas (ex.: violação de constraint) vai para
+        `lote_falho` e deixa de travar a fila e o encerramento da conferência. Se nem isso for
+        possível (banco fora do ar), o lote e os seguintes voltam para a fila.
+        """
+        if len(lotes) > 1:
+            try:
+                self._gravar(session, lotes)
+                return
+            except Exception:
+                # Lotes já gravados podem ser reaplicados sem efeito, pois as tags deduplicam no banco
+                session.rollback()
+                logger.warning(f"Falha ao gravar {len(lotes)} lotes juntos; gravando um a um", exc_info=True)
+
+        for i, lote in enumerate(lotes):
+            for _ in range(self._max_tentativas):
+                try:
+                    self._gravar(session, [lote])
+                    break
+                except Exception as exc:
+                    session.rollback()
+                    erro = exc
+            else:
+                try:
+                    guardar_lote_falho(
+                        session,
+                        lote.conferencia_id,
+                        lote.sequencia,
+                        lote.leituras,
+                        lote.chave_idempotencia,
+                        lote.recebido_em,
+                        repr(erro),
+                    )
+                    session.commit()
+                except Exception:
+                    session.rollback()
+                    self._devolver(lotes[i:])
+                    raise
+                logger.error(
+                    f"Lote {lote.sequencia} da conferência {lote.conferencia_id} falhou "
+                    f"{self._max_tentativas} vezes e foi guardado em lote_falho: {erro!r}"
+                )
+                self._concluir([lote], falhos=[lote])
+
+    def _gravar(self, session: Session, lotes: list[LoteEnfileirado]):
+        """
+        Aplica os lotes agrupados por conferência e faz o commit. Lotes que a conferência já não
+        aceita (ver `_aceito`) são rejeitados; leituras de produtos desconhecidos vão para a
+        quarentena sem rejeitar o lote.
+        """
+        estados = {
+            conferencia_id: (situacao, finalizada_em)
+            for conferencia_id, situacao, finalizada_em in session.execute(
+                select(Conferencia.id, Conferencia.status, Conferencia.finalizada_em).where(
+                    Conferencia.id.in_({lote.conferencia_id for lote in lotes})
+                )
+            )
+        }
+        aceitos: list[LoteEnfileirado] = []
+        rejeitados: list[LoteEnfileirado] = []
+        for lote in lotes:
+            (aceitos if self._aceito(lote, estados.get(lote.conferencia_id)) else rejeitados).append(lote)
+        por_conferencia: dict[int, list[LeituraCreate]] = {}
+        for lote in aceitos:
+            # Lote reenviado com uma chave que já foi aplicada não é gravado de novo
+            if lote.chave_idempotencia and not marcar_lote_aplicado(
+                session, lote.conferencia_id, lote.chave_idempotencia
+            ):
+                continue
+            por_conferencia.setdefault(lote.conferencia_id, []).extend(lote.leituras)
+        resultados = {
+            conferencia_id: aplicar_leituras(session, conferencia_id, leituras)
+            for conferencia_id, leituras in por_conferencia.items()
+        }
+        session.commit()
+
+        for conferencia_id, resultado in resultados.items():
+            concluir_leituras(conferencia_id, resultado)
+            if estados[conferencia_id][0] != StatusConferencia.INICIADA:
+                # Lote atrasado de uma conferência encerrada: as tags dela não ficam em memória
+                tags_vistas.descartar(conferencia_id)
+        for lote in rejeitados:
+            logger.error(
+                f"Lote {lote.sequencia} da conferência {lote.conferencia_id} rejeitado: a conferência "
+                f"não existe ou foi encerrada antes de o lote ser gravado"
+            )
+        self._concluir(lotes, rejeitados=rejeitados, resultados=resultados)
+
+    def _aceito(self, lote: LoteEnfileirado, estado: tuple[StatusConferencia, datetime | None] | None) -> bool:
+        """
+        Lotes de conferências em andamento são gravados. O de uma conferência encerrada só é gravado se
+        foi recebido até `tolerancia_encerramento` depois do encerramento e ainda estiver dentro do
+        `prazo_apos_encerramento`.
+        """
+        if estado is None:
+            return False
+        situacao, finalizada_em = estado
+        if situacao == StatusConferencia.INICIADA:
+            return True
+        if finalizada_em is None:
+            return False
+        if finalizada_em.tzinfo is None:  # SQLite não guarda o fuso; as datas são gravadas em UTC
+            finalizada_em = finalizada_em.replace(tzinfo=timezone.utc)
+        return (
+            lote.recebido_em <= finalizada_em + self._tolerancia_encerramento
+            and datetime.now(timezone.utc) <= finalizada_em + self._prazo_apos_encerramento
+        )
+
+
+fila_ingestao = FilaIngestao(
+    leituras_por_transacao=app_settings.INGESTAO_FILA_LEITURAS_POR_TRANSACAO,
+    intervalo_segundos=app_settings.INGESTAO_FILA_INTERVALO_MS / 1000,
+    max_leituras_pendentes=app_settings.INGESTAO_FILA_MAX_LEITURAS_PENDENTES,
+    max_tentativas=app_settings.INGESTAO_FILA_MAX_TENTATIVAS,
+    tolerancia_encerramento_segundos=app_settings.ESTADO_CONFERENCIA_TTL_SEGUNDOS,
+    # Metade da carência da limpeza de tags fica de margem para que a partição ainda exista
+    prazo_apos_encerramento_segundos=app_settings.LIMPEZA_TAGS_CARENCIA_SEGUNDOS / 2,
+)
@@ -0,0 +1,157 @@
+from typing import Annotated, AsyncIterator
+
+from fastapi import Depends, Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import TypeAdapter, ValidationError
+
+from app.core import leitura_binaria
+from app.core.exceptions import CorpoMuitoGrande, FormatoNaoSuportado
+from app.schemas.conferencia import LeituraCreate
+from app.settings import app_settings
+
+TIPO_JSON = "application/json"
+TIPO_NDJSON = "application/x-ndjson"
+TIPO_BINARIO = leitura_binaria.TIPO_CONTEUDO
+
+# Adaptadores reutilizados entre requisições (o schema de validação é montado uma única vez)
+leituras_json = TypeAdapter(list[LeituraCreate])
+leitura_ndjson = TypeAdapter(LeituraCreate)
+
+# Documenta no OpenAPI os formatos aceitos pelo corpo lido manualmente em `lotes_de_leituras`
+CORPO_LEITURAS_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            TIPO_JSON: {"schema": {"type": "array", "items": {"$ref": "#/components/schemas/LeituraCreate"}}},
+            TIPO_NDJSON: {"schema": {"$ref": "#/components/schemas/LeituraCreate"}},
+            TIPO_BINARIO: {"schema": {"type": "string", "format": "binary"}},
+        },
+    }
+}
+
+
+def _erro_de_validacao(exc: ValidationError, *prefixo: str | int) -> RequestValidationError:
+    return RequestValidationError(
+        [{**erro, "loc": ("body", *prefixo, *erro["loc"])} for erro in exc.errors(include_url=False)]
+    )
+
+
+def _verificar_tamanho(tamanho: int):
+    if tamanho > app_settings.INGESTAO_CORPO_MAXIMO_BYTES:
+        raise CorpoMuitoGrande(f"Envio de leituras maior que {app_settings.INGESTAO_CORPO_MAXIMO_BYTES} bytes")
+
+
+async def _pedacos(request: Request) -> AsyncIterator[bytes]:
+    """Corpo da requisição em pedaços, recusado com 413 assim que passa de `INGESTAO_CORPO_MAXIMO_BYTES`."""
+    try:
+        _verificar_tamanho(int(request.headers.get("content-length", 0)))
+    except ValueError:
+        pass
+    recebidos = 0
+    async for pedaco in request.stream():
+        recebidos += len(pedaco)
+        _verificar_tamanho(recebidos)
+        yield pedaco
+
+
+async def _corpo(request: Request) -> bytes:
+    return b"".join([pedaco async for pedaco in _pedacos(request)])
+
+
+async def _lotes_json(request: Request) -> AsyncIterator[list[LeituraCreate]]:
+    try:
+        yield leituras_json.validate_json(await _corpo(request))
+    except ValidationError as exc:
+        raise _erro_de_validacao(exc)
+
+
+async def _lotes_ndjson(request: Request, linhas_por_lote: int) -> AsyncIterator[list[LeituraCreate]]:
+    """
+    Valida o corpo linha a linha enquanto ele chega, entregando lotes de tamanho fixo. Uma linha acima
+    de `INGESTAO_NDJSON_LINHA_MAXIMA_BYTES` é recusada com 413 sem ser acumulada por inteiro.
+    """
+    linha_maxima = app_settings.INGESTAO_NDJSON_LINHA_MAXIMA_BYTES
+    buffer = bytearray()
+    lote: list[LeituraCreate] = []
+    numero_linha = 0
+
+    def validar(linha: bytes):
+        nonlocal numero_linha
+        numero_linha += 1
+        if len(linha) > linha_maxima:
+            raise CorpoMuitoGrande(f"Linha {numero_linha} maior que {linha_maxima} bytes")
+        if not linha.strip():
+            return
+        try:
+            lote.append(leitura_ndjson.validate_json(linha))
+        except ValidationError as exc:
+            raise _erro_de_validacao(exc, f"linha {numero_linha}")
+
+    async for pedaco in _pedacos(request):
+        buffer.extend(pedaco)
+        inicio = 0
+        while (fim := buffer.find(b"\n", inicio)) >= 0:
+            validar(bytes(buffer[inicio:fim]))
+            inicio = fim + 1
+            if len(lote) >= linhas_por_lote:
+                yield lote
+                lote = []
+        del buffer[:inicio]
+        # O que sobrou é o início de uma linha ainda sem quebra
+        if len(buffer) > linha_maxima:
+            raise CorpoMuitoGrande(f"Linha {numero_linha + 1} maior que {linha_maxima} bytes")
+
+    validar(bytes(buffer))
+    if lote:
+        yield lote
+
+
+async def _lotes_binarios(request: Request, linhas_por_lote: int) -> AsyncIterator[list[LeituraCreate]]:
+    """Decodifica o formato de `app.core.leitura_binaria` e entrega lotes de tamanho fixo."""
+    try:
+        decodificadas = leitura_binaria.decodificar(await _corpo(request))
+    except ValueError as exc:
+        raise RequestValidationError(
+            [{"type": "value_error", "loc": ("body",), "msg": str(exc), "input": None}]
+        )
+
+    for inicio in range(0, len(decodificadas), linhas_por_lote):
+        yield leituras_json.validate_python(
+            [
+                {"rfid_etiqueta": etiqueta, "codigo_produto": codigo, "lido_em": lido_em}
+                for etiqueta, codigo, lido_em in decodificadas[inicio : inicio + linhas_por_lote]
+            ]
+        )
+
+
+async def lotes_de_leituras(request: Request) -> AsyncIterator[list[LeituraCreate]]:
+    """
+    Dependência que lê o corpo de um envio de leituras conforme o `Content-Type`, entregando as
+    leituras em lotes. JSON chega em um único lote; NDJSON é lido de forma incremental em lotes de
+    `INGESTAO_NDJSON_LINHAS_POR_LOTE`, mantendo a memória constante para qualquer tamanho de envio.
+    O formato binário (`application/vnd.ssrfid.leituras`) é decodificado de uma vez e gravado em
+    lotes do mesmo tamanho. Em todos os formatos o corpo é limitado a `INGESTAO_CORPO_MAXIMO_BYTES`.
+    """
+    tipo = request.headers.get("content-type", TIPO_JSON).split(";")[0].strip().lower()
+    if tipo == TIPO_JSON:
+        return _lotes_json(request)
+    if tipo == TIPO_NDJSON:
+        return _lotes_ndjson(request, app_settings.INGESTAO_NDJSON_LINHAS_POR_LOTE)
+    if tipo == TIPO_BINARIO:
+        return _lotes_binarios(request, app_settings.INGESTAO_NDJSON_LINHAS_POR_LOTE)
+    raise FormatoNaoSuportado(tipo)
+
+
+LotesDeLeituras = Annotated[AsyncIterator[list[LeituraCreate]], Depends(lotes_de_leituras)]
+
+
+async def com_ultimo(
+    lotes: AsyncIterator[list[LeituraCreate]],
+) -> AsyncIterator[tuple[list[LeituraCreate], bool]]:
+    """Acompanha cada lote de um indicador de último lote do envio (um corpo vazio gera um lote vazio)."""
+    anterior: list[LeituraCreate] | None = None
+    async for lote in lotes:
+        if anterior is not None:
+            yield anterior, False
+        anterior = lote
+    yield anterior or [], True
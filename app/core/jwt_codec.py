@@ -0,0 +1,125 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import time
+from calendar import timegm
+from datetime import datetime
+from typing import Protocol
+
+from jose import JWTError, jwt
+
+from app.settings import app_settings
+
+# Claims de data que, como no python-jose, são convertidas de datetime para segundos desde a época
+CLAIMS_DE_DATA = ("exp", "iat", "nbf")
+
+
+class TokenInvalido(Exception):
+    """Token malformado, com assinatura inválida ou fora da validade."""
+
+
+class CodecJWT(Protocol):
+    def codificar(self, claims: dict) -> str: ...
+
+    def decodificar(self, token: str) -> dict:
+        """Retorna as claims de um token válido ou levanta `TokenInvalido`."""
+        ...
+
+
+class CodecJose:
+    """Codec sobre o python-jose (HS256/HS384/HS512 e demais algoritmos suportados por ele)."""
+
+    def __init__(self, segredo: str, algoritmo: str):
+        self._segredo = segredo
+        self._algoritmo = algoritmo
+
+    def codificar(self, claims: dict) -> str:
+        return jwt.encode(claims, self._segredo, algorithm=self._algoritmo)
+
+    def decodificar(self, token: str) -> dict:
+        try:
+            return jwt.decode(token, self._segredo, algorithms=[self._algoritmo])
+        except JWTError as exc:
+            raise TokenInvalido(str(exc)) from exc
+
+
+class CodecHMAC:
+    """
+    Codec só com a biblioteca padrão para os algoritmos HMAC (HS256/HS384/HS512).
+
+    Gera tokens idênticos aos do python-jose (mesmo cabeçalho e serialização), então tokens emitidos
+    por um codec são aceitos pelo outro. Na verificação confere só o que o python-jose confere nos
+    tokens desta aplicação: algoritmo do cabeçalho, assinatura, `exp` e `nbf`.
+    """
+
+    HASHES = {"HS256": hashlib.sha256, "HS384": hashlib.sha384, "HS512": hashlib.sha512}
+
+    def __init__(self, segredo: str, algoritmo: str):
+        if algoritmo not in self.HASHES:
+            raise ValueError(f"O codec hmac não suporta o algoritmo {algoritmo}")
+        self._segredo = segredo.encode()
+        self._hash = self.HASHES[algoritmo]
+        self._algoritmo = algoritmo
+        self._cabecalho = _base64url(
+            json.dumps({"alg": algoritmo, "typ": "JWT"}, separators=(",", ":"), sort_keys=True).encode()
+        )
+
+    def codificar(self, claims: dict) -> str:
+        claims = {
+            chave: timegm(valor.utctimetuple())
+            if chave in CLAIMS_DE_DATA and isinstance(valor, datetime)
+            else valor
+            for chave, valor in claims.items()
+        }
+        assinado = self._cabecalho + b"." + _base64url(json.dumps(claims, separators=(",", ":")).encode())
+        return (assinado + b"." + _base64url(self._assinar(assinado))).decode()
+
+    def decodificar(self, token: str) -> dict:
+        try:
+            assinado, _, assinatura = token.encode().rpartition(b".")
+            cabecalho, _, corpo = assinado.partition(b".")
+            if not cabecalho or not corpo:
+                raise TokenInvalido("Token malformado")
+            # O cabeçalho é conferido antes da assinatura: recusa `alg: none` e troca de algoritmo
+            if json.loads(_de_base64url(cabecalho)).get("alg") != self._algoritmo:
+                raise TokenInvalido("Algoritmo não permitido")
+            if not hmac.compare_digest(_de_base64url(assinatura), self._assinar(assinado)):
+                raise TokenInvalido("Assinatura inválida")
+            claims = json.loads(_de_base64url(corpo))
+        except (ValueError, UnicodeError, binascii.Error, AttributeError) as exc:
+            raise TokenInvalido("Token malformado") from exc
+        if not isinstance(claims, dict):
+            raise TokenInvalido("Token malformado")
+
+        # Segundos inteiros e comparações como as do python-jose
+        agora = int(time.time())
+        if "exp" in claims and (not isinstance(claims["exp"], (int, float)) or claims["exp"] < agora):
+            raise TokenInvalido("Token expirado")
+        if "nbf" in claims and (not isinstance(claims["nbf"], (int, float)) or claims["nbf"] > agora):
+            raise TokenInvalido("Token ainda não é válido")
+        return claims
+
+    def _assinar(self, assinado: bytes) -> bytes:
+        return hmac.new(self._segredo, assinado, self._hash).digest()
+
+
+def _base64url(dados: bytes) -> bytes:
+    return base64.urlsafe_b64encode(dados).rstrip(b"=")
+
+
+def _de_base64url(dados: bytes) -> bytes:
+    return base64.urlsafe_b64decode(dados + b"=" * (-len(dados) % 4))
+
+
+CODECS = {"jose": CodecJose, "hmac": CodecHMAC}
+
+
+def criar_codec(nome: str, segredo: str, algoritmo: str) -> CodecJWT:
+    if nome not in CODECS:
+        raise ValueError(f"Codec JWT desconhecido: {nome} (opções: {', '.join(CODECS)})")
+    return CODECS[nome](segredo, algoritmo)
+
+
+codec_jwt = criar_codec(app_settings.JWT_CODEC, app_settings.JWT_SECRET, app_settings.JWT_ALGORITHM)
@@ -0,0 +1,106 @@
+"""
+Formato binário compacto para lotes de leituras RFID (`application/vnd.ssrfid.leituras`).
+
+Em JSON cada leitura repete as chaves e o código do produto como texto; aqui o lote leva um
+dicionário de códigos de produto uma única vez e cada leitura ocupa um registro de tamanho fixo:
+
+    cabeçalho   "SSRL" | versão u8 | bytes por EPC u8 | qtd. códigos u16 | qtd. leituras u32 | base ms i64
+    dicionário  por código: tamanho u8 | código UTF-8
+    registros   por leitura: EPC (bytes fixos) | índice do código u16 | ms desde a base u32
+
+Inteiros em little-endian. `base ms` é o menor `lido_em` do lote em milissegundos desde a época
+(UTC) e cada registro guarda o deslocamento em relação a ela, cobrindo lotes de até ~49 dias.
+O EPC é enviado como bytes (a etiqueta em hexadecimal) e volta decodificado em hexadecimal
+maiúsculo, o formato em que os leitores reportam as etiquetas.
+
+O módulo usa somente a biblioteca padrão para que possa ser copiado para os clientes (coletores).
+"""
+
+import struct
+from datetime import datetime, timedelta, timezone
+from typing import Iterable
+
+TIPO_CONTEUDO = "application/vnd.ssrfid.leituras"
+ASSINATURA = b"SSRL"
+VERSAO = 1
+
+_CABECALHO = struct.Struct("<4sBBHIq")
+_EPOCA = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_UM_MS = timedelta(milliseconds=1)
+
+
+def _registro(bytes_por_epc: int) -> struct.Struct:
+    return struct.Struct(f"<{bytes_por_epc}sHI")
+
+
+def _para_ms(momento: datetime) -> int:
+    # Datas sem fuso são tratadas como UTC
+    if momento.tzinfo is None:
+        momento = momento.replace(tzinfo=timezone.utc)
+    return (momento - _EPOCA) // _UM_MS
+
+
+def codificar(leituras: Iterable[tuple[str, str, datetime]]) -> bytes:
+    """
+    Codifica um lote de leituras `(rfid_etiqueta, codigo_produto, lido_em)`.
+
+    Todas as etiquetas devem estar em hexadecimal e ter o mesmo tamanho (ex.: EPC de 96 bits).
+    """
+    leituras = [(bytes.fromhex(etiqueta), codigo, _para_ms(lido_em)) for etiqueta, codigo, lido_em in leituras]
+    bytes_por_epc = len(leituras[0][0]) if leituras else 0
+    base_ms = min((ms for _, _, ms in leituras), default=0)
+
+    indices: dict[str, int] = {}
+    registro = _registro(bytes_por_epc)
+    registros = bytearray()
+    for epc, codigo, ms in leituras:
+        if len(epc) != bytes_por_epc:
+            raise ValueError("Todas as etiquetas do lote devem ter o mesmo tamanho")
+        indice = indices.setdefault(codigo, len(indices))
+        registros += registro.pack(epc, indice, ms - base_ms)
+
+    dicionario = bytearray()
+    for codigo in indices:
+        codigo_bytes = codigo.encode()
+        dicionario += struct.pack("<B", len(codigo_bytes)) + codigo_bytes
+
+    cabecalho = _CABECALHO.pack(ASSINATURA, VERSAO, bytes_por_epc, len(indices), len(leituras), base_ms)
+    return cabecalho + bytes(dicionario) + bytes(registros)
+
+
+def decodificar(dados: bytes) -> list[tuple[str, str, datetime]]:
+    """
+    Decodifica um lote gerado por `codificar` em `(rfid_etiqueta, codigo_produto, lido_em)`.
+
+    Levanta `ValueError` se o corpo estiver malformado; nesse caso nenhuma leitura é retornada.
+    """
+    if len(dados) < _CABECALHO.size:
+        raise ValueError("Corpo menor que o cabeçalho")
+    assinatura, versao, bytes_por_epc, qtd_codigos, qtd_leituras, base_ms = _CABECALHO.unpack_from(dados)
+    if assinatura != ASSINATURA or versao != VERSAO:
+        raise ValueError("Assinatura ou versão do formato desconhecida")
+
+    posicao = _CABECALHO.size
+    codigos: list[str] = []
+    for _ in range(qtd_codigos):
+        if posicao >= len(dados):
+            raise ValueError("Dicionário de códigos incompleto")
+        tamanho = dados[posicao]
+        codigo = dados[posicao + 1 : posicao + 1 + tamanho]
+        if len(codigo) != tamanho:
+            raise ValueError("Dicionário de códigos incompleto")
+        codigos.append(codigo.decode())
+        posicao += 1 + tamanho
+
+    registro = _registro(bytes_por_epc)
+    if len(dados) - posicao != qtd_leituras * registro.size:
+        raise ValueError("Quantidade de leituras não confere com o tamanho do corpo")
+
+    base = _EPOCA + base_ms * _UM_MS
+    try:
+        return [
+            (epc.hex().upper(), codigos[indice], base + deslocamento * _UM_MS)
+            for epc, indice, deslocamento in registro.iter_unpack(memoryview(dados)[posicao:])
+        ]
+    except IndexError:
+        raise ValueError("Índice de código fora do dicionário") from None
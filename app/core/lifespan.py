@@ -1,8 +1,24 @@
+import asyncio
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
+from app.core.catalogo import catalogo_pecas
+from app.core.contadores_leitura import contadores_leitura
+from app.core.debounce import debounce_leituras
+from app.core.estado_conferencias import estado_conferencias
+from app.core.fila_ingestao import fila_ingestao
+from app.core.limite_autenticacao import limites_autenticacao
+from app.core.limpeza_tags import limpeza_tags
 from app.core.logger import setup_logging
+from app.core.notificacoes import ouvinte_notificacoes
+from app.core.principais import cache_principais
+from app.core.senhas import pool_senhas
+from app.core.tags_vistas import tags_vistas
+from app.core.tokens_verificados import tokens_verificados
+from app.core.versoes_tokens import versoes_tokens
+from app.database import fabrica_de_sessoes
+from app.settings import app_settings
 
 
 @asynccontextmanager
@@ -15,4 +31,38 @@ async def lifespan(app: FastAPI):
     """
 
     setup_logging()
+
+    fabrica = fabrica_de_sessoes(app)
+    with fabrica() as db:
+        catalogo_pecas.carregar(db)
+        tags_vistas.carregar(db)
+    versoes_tokens.limpar()
+    versoes_tokens.carregar(fabrica)
+    catalogo_pecas.limpar_estatisticas()
+    debounce_leituras.limpar()
+    estado_conferencias.limpar()
+    cache_principais.limpar()
+    tokens_verificados.limpar()
+    limites_autenticacao.limpar()
+    if app_settings.NOTIFICACOES_ATIVAS:
+        ouvinte_notificacoes.iniciar(app_settings.POSTGRES_URL)
+
+    fila_ingestao.limpar()
+    if app_settings.INGESTAO_FILA_ESCRITOR_ATIVO:
+        fila_ingestao.iniciar(fabrica)
+    if app_settings.LIMPEZA_TAGS_ATIVA:
+        limpeza_tags.iniciar(fabrica)
+    contadores_leitura.limpar()
+    if app_settings.CONTADORES_WRITE_BEHIND_ATIVO:
+        contadores_leitura.iniciar(fabrica)
+
     yield
+
+    limpeza_tags.parar()
+    ouvinte_notificacoes.parar()
+
+    # Garante que nenhum lote aceito com 202 se perca no shutdown
+    await asyncio.to_thread(fila_ingestao.parar, fabrica)
+    # Depois da fila, que ainda pode somar quantidades ao gravar os últimos lotes
+    await asyncio.to_thread(contadores_leitura.parar, fabrica)
+    await asyncio.to_thread(pool_senhas.parar)
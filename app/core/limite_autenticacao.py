@@ -0,0 +1,184 @@
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qs
+
+from fastapi import status
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.auth import verify_token
+from app.settings import app_settings
+
+ROTAS_LIMITADAS = {"/auth/login", "/auth/refresh"}
+
+
+class LimitadorGCRA:
+    """
+    Limite de taxa por chave com GCRA (generic cell rate algorithm): equivale a um token bucket com
+    `rajada` fichas repostas a `por_minuto`, mas guarda um único float por chave, o instante teórico
+    de chegada (TAT) da próxima requisição.
+
+    As chaves ficam em ordem de uso: acima de `capacidade` chaves a usada há mais tempo é descartada
+    em O(1). Normalmente seu TAT já passou, e descartá-la equivale a encher o balde; sob muitas chaves
+    ativas (varredura de IPs) ela perde o histórico antes das demais.
+    """
+
+    def __init__(self, por_minuto: int, rajada: int, capacidade: int = 100_000):
+        self._intervalo = 60 / por_minuto
+        self._tolerancia = self._intervalo * rajada
+        self._capacidade = capacidade
+        self._lock = threading.Lock()
+        self._tats: OrderedDict[str, float] = OrderedDict()
+
+    def consumir(self, chave: str) -> float:
+        """Registra uma requisição; retorna 0 se permitida ou quantos segundos esperar se rejeitada."""
+        agora = time.monotonic()
+        with self._lock:
+            tat = max(self._tats.get(chave, agora), agora) + self._intervalo
+            if tat - agora > self._tolerancia:
+                # Uma chave sendo rejeitada está em uso e não deve ser a próxima a ser esquecida
+                self._tats.move_to_end(chave)
+                return tat - agora - self._tolerancia
+            self._tats[chave] = tat
+            self._tats.move_to_end(chave)
+            if len(self._tats) > self._capacidade:
+                self._tats.popitem(last=False)
+            return 0.0
+
+    def limpar(self):
+        with self._lock:
+            self._tats.clear()
+
+    def __len__(self) -> int:
+        return len(self._tats)
+
+
+class LimitesAutenticacao:
+    """Limites de `/auth/login` e `/auth/refresh` por IP e por username, com contadores de rejeição."""
+
+    def __init__(self, por_ip: LimitadorGCRA, por_username: LimitadorGCRA):
+        self.por_ip = por_ip
+        self.por_username = por_username
+        self.rejeitadas_ip = 0
+        self.rejeitadas_username = 0
+
+    def verificar(self, ip: str | None, username: str | None) -> float:
+        """Retorna 0 se a requisição pode seguir ou os segundos até a próxima tentativa."""
+        if ip and (espera := self.por_ip.consumir(ip)):
+            self.rejeitadas_ip += 1
+            return espera
+        if username and (espera := self.por_username.consumir(username)):
+            self.rejeitadas_username += 1
+            return espera
+        return 0.0
+
+    def limpar(self):
+        self.por_ip.limpar()
+        self.por_username.limpar()
+        self.rejeitadas_ip = 0
+        self.rejeitadas_username = 0
+
+    def estatisticas(self) -> dict[str, int | bool]:
+        return {
+            "ativo": app_settings.LIMITE_AUTH_ATIVO,
+            "ips": len(self.por_ip),
+            "usernames": len(self.por_username),
+            "rejeitadas_ip": self.rejeitadas_ip,
+            "rejeitadas_username": self.rejeitadas_username,
+        }
+
+
+limites_autenticacao = LimitesAutenticacao(
+    por_ip=LimitadorGCRA(app_settings.LIMITE_AUTH_IP_POR_MINUTO, app_settings.LIMITE_AUTH_IP_RAJADA),
+    por_username=LimitadorGCRA(
+        app_settings.LIMITE_AUTH_USERNAME_POR_MINUTO, app_settings.LIMITE_AUTH_USERNAME_RAJADA
+    ),
+)
+
+
+def _username_da_requisicao(path: str, content_type: str, corpo: bytes) -> str | None:
+    """Username do formulário de login ou do refresh token; None se o corpo não permitir identificar."""
+    try:
+        if path == "/auth/login":
+            if not content_type.startswith("application/x-www-form-urlencoded"):
+                return None
+            return parse_qs(corpo.decode())["username"][0]
+        # Só refresh tokens válidos contam para o username, para que um token forjado não gaste o limite alheio
+        payload = verify_token(json.loads(corpo)["refresh_token"], token_type="refresh")
+        return payload.get("sub") if payload else None
+    except (KeyError, IndexError, TypeError, ValueError):
+        return None
+
+
+class LimiteAutenticacaoMiddleware:
+    """
+    Middleware ASGI que aplica `limites_autenticacao` em `POST /auth/login` e `POST /auth/refresh`
+    antes da rota, respondendo 429 com `Retry-After`. O corpo é lido para identificar o username e
+    repassado intacto à aplicação; corpos acima de `LIMITE_AUTH_CORPO_MAXIMO_BYTES` (um login ou
+    refresh tem poucas centenas de bytes) são recusados com 413 sem serem lidos até o fim.
+
+    O IP é o do `client` do ASGI; atrás de um proxy, o servidor precisa repassar o IP real
+    (`uvicorn --proxy-headers`).
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or scope["path"] not in ROTAS_LIMITADAS
+            or not app_settings.LIMITE_AUTH_ATIVO
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        maximo = app_settings.LIMITE_AUTH_CORPO_MAXIMO_BYTES
+        try:
+            excede = int(headers.get(b"content-length", 0)) > maximo
+        except ValueError:
+            excede = False
+        mensagens: list[Message] = []
+        corpo = b""
+        while not excede:
+            mensagem = await receive()
+            mensagens.append(mensagem)
+            if mensagem["type"] != "http.request":
+                break
+            corpo += mensagem.get("body", b"")
+            excede = len(corpo) > maximo
+            if not mensagem.get("more_body"):
+                break
+        if excede:
+            resposta = JSONResponse(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                content={"detail": "Corpo da requisição muito grande"},
+            )
+            await resposta(scope, receive, send)
+            return
+
+        content_type = headers.get(b"content-type", b"").decode("latin-1")
+        ip = scope["client"][0] if scope.get("client") else None
+        espera = limites_autenticacao.verificar(
+            ip, _username_da_requisicao(scope["path"], content_type, corpo)
+        )
+        if espera:
+            resposta = JSONResponse(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                content={"detail": "Muitas tentativas de autenticação, tente novamente em instantes"},
+                headers={"Retry-After": str(math.ceil(espera))},
+            )
+            await resposta(scope, receive, send)
+            return
+
+        async def reenviar() -> Message:
+            if mensagens:
+                return mensagens.pop(0)
+            return await receive()
+
+        await self.app(scope, reenviar, send)
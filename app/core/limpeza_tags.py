@@ -0,0 +1,169 @@
+import logging
+import re
+import threading
+from contextlib import AbstractContextManager
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+from sqlalchemy import Connection, delete, func, or_, select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.models.conferencia import Conferencia, StatusConferencia, TagLida
+from app.settings import app_settings
+
+logger = logging.getLogger(__name__)
+
+_NOME_PARTICAO = re.compile(r"^tag_lida_(\d+)$")
+# Chave do advisory lock que impede dois workers de descartarem as mesmas partições ao mesmo tempo
+CHAVE_LOCK_LIMPEZA = 7_140_112
+# Espera máxima pela trava de `tag_lida` ao desanexar uma partição (as gravações esperam atrás dela)
+TEMPO_MAXIMO_TRAVA_MS = 2000
+
+
+class LimpezaTags:
+    """
+    Descarta em segundo plano as tags de conferências que não estão mais em andamento.
+
+    No Postgres cada conferência tem sua partição de `tag_lida`; a limpeza desanexa e remove as
+    partições, de modo que iniciar uma conferência não depende do tamanho da anterior. O Postgres não
+    aceita `DETACH ... CONCURRENTLY` com a partição padrão, então cada partição sai em uma transação
+    curta com `lock_timeout` (`TEMPO_MAXIMO_TRAVA_MS`): a trava exclusiva em `tag_lida` segura as
+    gravações por no máximo esse tempo, e uma partição que não conseguiu a trava fica para a próxima
+    rodada. Em outros
+    bancos as linhas são apagadas com um DELETE. A limpeza é acordada pelo encerramento de uma
+    conferência e no startup, para recuperar partições que tenham ficado para trás. Uma gravação que
+    ainda chegue depois do descarte vai para a partição padrão (`tag_lida_default`), limpa na rodada
+    seguinte, e o advisory lock `CHAVE_LOCK_LIMPEZA` deixa só um worker por vez descartando partições.
+
+    As tags de uma conferência encerrada são mantidas por `carencia_segundos`, para que lotes aceitos
+    antes do encerramento e ainda na fila de ingestão de outros workers continuem deduplicando contra
+    elas; a limpeza também roda a cada `carencia_segundos` para descartá-las depois do prazo.
+    """
+
+    def __init__(self, carencia_segundos: float = 0):
+        self.carencia_segundos = carencia_segundos
+        self._condicao = threading.Condition()
+        self._agendada = False
+        self._parar = False
+        self._thread: threading.Thread | None = None
+
+    def agendar(self):
+        with self._condicao:
+            self._agendada = True
+            self._condicao.notify()
+
+    def iniciar(self, fabrica_sessoes: Callable[[], AbstractContextManager[Session]]):
+        with self._condicao:
+            self._parar = False
+            self._agendada = True
+        self._thread = threading.Thread(
+            target=self._executar, args=(fabrica_sessoes,), name="limpeza-tags", daemon=True
+        )
+        self._thread.start()
+
+    def parar(self):
+        with self._condicao:
+            self._parar = True
+            self._condicao.notify()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def limpar(self, session: Session) -> int:
+        """Descarta as tags das conferências que não estão em andamento; retorna quantas foram limpas."""
+        if session.get_bind().dialect.name != "postgresql":
+            encerradas = session.scalars(
+                select(TagLida.conferencia_id)
+                .where(TagLida.conferencia_id.not_in(self._retidas(session)))
+                .distinct()
+            ).all()
+            session.execute(delete(TagLida).where(TagLida.conferencia_id.in_(encerradas)))
+            session.commit()
+            return len(encerradas)
+
+        with session.get_bind().connect() as conexao:
+            # Todo worker roda a limpeza no startup: só quem obtém o lock descarta, os demais desistem.
+            # O lock é de sessão e continua valendo entre as transações abaixo
+            obtido = conexao.scalar(select(func.pg_try_advisory_lock(CHAVE_LOCK_LIMPEZA)))
+            conexao.commit()
+            if not obtido:
+                return 0
+            descartadas = 0
+            try:
+                # As partições são listadas antes das conferências retidas: uma conferência criada entre
+                # as duas consultas não tem sua partição na lista e por isso nunca é descartada por engano
+                particoes = conexao.scalars(
+                    text(
+                        """
+                        SELECT c.relname
+                        FROM pg_inherits i
+                        JOIN pg_class c ON c.oid = i.inhrelid
+                        WHERE i.inhparent = 'tag_lida'::regclass
+                        """
+                    )
+                ).all()
+                retidas = self._retidas(conexao)
+                conexao.commit()
+
+                # Partições de conferências encerradas (fora da carência) ou removidas
+                descartar = [
+                    nome
+                    for nome in particoes
+                    if (m := _NOME_PARTICAO.match(nome)) and int(m.group(1)) not in retidas
+                ]
+                for nome in descartar:
+                    try:
+                        conexao.execute(text(f"SET LOCAL lock_timeout = {TEMPO_MAXIMO_TRAVA_MS}"))
+                        conexao.execute(text(f"ALTER TABLE tag_lida DETACH PARTITION {nome}"))
+                        conexao.execute(text(f"DROP TABLE {nome}"))
+                        conexao.commit()
+                        descartadas += 1
+                    except OperationalError:
+                        conexao.rollback()
+                        logger.warning(f"Partição {nome} ocupada; o descarte fica para a próxima rodada")
+                # Tags que caíram na partição padrão depois que a partição da conferência foi descartada
+                conexao.execute(
+                    text(
+                        "DELETE FROM tag_lida_default WHERE conferencia_id <> ALL(CAST(:retidas AS integer[]))"
+                    ),
+                    {"retidas": sorted(retidas)},
+                )
+                conexao.commit()
+            finally:
+                conexao.rollback()
+                conexao.execute(select(func.pg_advisory_unlock(CHAVE_LOCK_LIMPEZA)))
+                conexao.commit()
+        return descartadas
+
+    def _retidas(self, session: Session | Connection) -> set[int]:
+        """Conferências cujas tags ainda são necessárias: em andamento ou encerradas dentro da carência."""
+        limite = datetime.now(timezone.utc) - timedelta(seconds=self.carencia_segundos)
+        return set(
+            session.scalars(
+                select(Conferencia.id).where(
+                    or_(Conferencia.status == StatusConferencia.INICIADA, Conferencia.finalizada_em > limite)
+                )
+            )
+        )
+
+    def _executar(self, fabrica_sessoes: Callable[[], AbstractContextManager[Session]]):
+        while True:
+            with self._condicao:
+                # Sem agendamento, roda a cada carência para descartar as conferências que saíram dela
+                self._condicao.wait_for(
+                    lambda: self._agendada or self._parar, timeout=self.carencia_segundos or None
+                )
+                if self._parar:
+                    return
+                self._agendada = False
+            try:
+                with fabrica_sessoes() as session:
+                    descartadas = self.limpar(session)
+                if descartadas:
+                    logger.info(f"Tags de {descartadas} conferência(s) encerrada(s) descartadas")
+            except Exception:
+                logger.exception("Falha ao descartar as tags de conferências encerradas")
+
+
+limpeza_tags = LimpezaTags(carencia_segundos=app_settings.LIMPEZA_TAGS_CARENCIA_SEGUNDOS)
@@ -1,5 +1,6 @@
 # app/core/logging_config.py
 import logging.config
+import os
 
 LOGGING_CONFIG = {
     "version": 1,
@@ -38,4 +39,5 @@ LOGGING_CONFIG = {
 
 
 def setup_logging():
+    os.makedirs(os.path.dirname(LOGGING_CONFIG["handlers"]["file"]["filename"]), exist_ok=True)
     logging.config.dictConfig(LOGGING_CONFIG)
@@ -0,0 +1,78 @@
+import logging
+import threading
+from typing import Callable
+
+import psycopg
+from psycopg import sql
+from sqlalchemy import func, select
+from sqlalchemy.engine import Connection, make_url
+
+logger = logging.getLogger(__name__)
+
+# Recebe o payload da notificação, ou None quando mensagens podem ter sido perdidas (reconexão)
+Assinante = Callable[[str | None], None]
+
+
+def notificar(conexao: Connection, canal: str, mensagem: str):
+    """
+    Publica `mensagem` no canal com `pg_notify` na transação da conexão; o Postgres só entrega a
+    notificação no commit. Em outros bancos não faz nada.
+    """
+    if conexao.dialect.name == "postgresql":
+        conexao.execute(select(func.pg_notify(canal, mensagem)))
+
+
+class OuvinteNotificacoes:
+    """
+    Escuta canais `LISTEN/NOTIFY` do Postgres em uma thread, com uma conexão própria fora do pool,
+    e repassa cada notificação aos assinantes do canal.
+
+    Notificações não são guardadas pelo Postgres: as enviadas enquanto a conexão estava caída se
+    perdem. Por isso, a cada (re)conexão os assinantes recebem `None` e devem descartar o que
+    tiverem em cache.
+    """
+
+    def __init__(self):
+        self._assinantes: dict[str, list[Assinante]] = {}
+        self._parar = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def assinar(self, canal: str, assinante: Assinante):
+        self._assinantes.setdefault(canal, []).append(assinante)
+
+    def iniciar(self, url: str):
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._executar, args=(url,), name="notificacoes", daemon=True)
+        self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _entregar(self, canal: str, mensagem: str | None):
+        for assinante in self._assinantes.get(canal, []):
+            try:
+                assinante(mensagem)
+            except Exception:
+                logger.exception(f"Falha ao processar notificação do canal {canal}")
+
+    def _executar(self, url: str):
+        conninfo = make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+        while not self._parar.is_set():
+            try:
+                with psycopg.connect(conninfo, autocommit=True) as conexao:
+                    for canal in self._assinantes:
+                        conexao.execute(sql.SQL("LISTEN {}").format(sql.Identifier(canal)))
+                        self._entregar(canal, None)
+                    while not self._parar.is_set():
+                        # O timeout devolve o controle periodicamente para verificar o pedido de parada
+                        for notificacao in conexao.notifies(timeout=1.0):
+                            self._entregar(notificacao.channel, notificacao.payload)
+            except Exception:
+                logger.exception("Conexão de notificações perdida; nova tentativa em 5 segundos")
+                self._parar.wait(5)
+
+
+ouvinte_notificacoes = OuvinteNotificacoes()
@@ -0,0 +1,92 @@
+import threading
+import time
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from app.core.notificacoes import notificar, ouvinte_notificacoes
+from app.models.usuario import Usuario
+from app.schemas.usuario import Principal
+from app.settings import app_settings
+
+CANAL_PRINCIPAIS = "principais"
+
+
+class CachePrincipais:
+    """
+    Cache em memória de `username (sub do token) -> Principal`, para que as requisições autenticadas
+    não consultem a tabela `usuarios`.
+
+    Toda alteração de um `Usuario` pelo ORM (inativação, mudança de role) invalida a entrada no commit,
+    neste worker, e publica o username no canal `principais` para os demais. O TTL limita o tempo de
+    uma entrada velha caso uma notificação se perca ou o usuário seja alterado fora da aplicação.
+    """
+
+    def __init__(self, ttl_segundos: float):
+        self._ttl_segundos = ttl_segundos
+        self._lock = threading.Lock()
+        self._principais: dict[str, tuple[Principal, float]] = {}
+        # Incrementada a cada invalidação; impede guardar um principal lido antes dela
+        self.geracao = 0
+        self.acertos = 0
+        self.falhas = 0
+
+    def obter(self, username: str) -> Principal | None:
+        with self._lock:
+            guardado = self._principais.get(username)
+            if guardado and time.monotonic() < guardado[1]:
+                self.acertos += 1
+                return guardado[0]
+            self.falhas += 1
+            return None
+
+    def guardar(self, principal: Principal, geracao: int):
+        """Guarda um principal lido do banco quando a geração era `geracao`."""
+        with self._lock:
+            if geracao != self.geracao:
+                return
+            self._principais[principal.username] = (principal, time.monotonic() + self._ttl_segundos)
+
+    def invalidar(self, username: str | None = None):
+        """Remove um username do cache, ou todos quando None."""
+        with self._lock:
+            self.geracao += 1
+            if username is None:
+                self._principais.clear()
+            else:
+                self._principais.pop(username, None)
+
+    def limpar(self):
+        with self._lock:
+            self.geracao += 1
+            self._principais.clear()
+            self.acertos = 0
+            self.falhas = 0
+
+    def estatisticas(self) -> dict[str, int]:
+        with self._lock:
+            return {"acertos": self.acertos, "falhas": self.falhas, "itens": len(self._principais)}
+
+
+cache_principais = CachePrincipais(ttl_segundos=app_settings.PRINCIPAL_CACHE_TTL_SEGUNDOS)
+ouvinte_notificacoes.assinar(CANAL_PRINCIPAIS, cache_principais.invalidar)
+
+
+@event.listens_for(Usuario, "after_update")
+@event.listens_for(Usuario, "after_delete")
+def _registrar_alteracao(mapper, conexao, usuario: Usuario):
+    # O username antigo também sai do cache se ele foi trocado
+    historico = inspect(usuario).attrs.username.history
+    usernames = {*historico.added, *historico.deleted, *historico.unchanged}
+    for username in usernames:
+        notificar(conexao, CANAL_PRINCIPAIS, username)
+    session = object_session(usuario)
+    if session is not None:
+        session.info.setdefault("principais_alterados", set()).update(usernames)
+
+
+# Se a transação for desfeita, os usernames ficam para o próximo commit: invalidar a mais só custa uma consulta
+@event.listens_for(Session, "after_commit")
+def _invalidar_alterados(session: Session):
+    for username in session.info.pop("principais_alterados", ()):
+        cache_principais.invalidar(username)
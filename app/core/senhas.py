@@ -0,0 +1,140 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable
+
+from fastapi.concurrency import run_in_threadpool
+from passlib.context import CryptContext
+
+from app.core.exceptions import HashSenhasSobrecarregado
+from app.settings import app_settings
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+# Funções executadas nos processos do pool: precisam ser importáveis no nível do módulo
+def _gerar_hash(senha: str) -> str:
+    return pwd_context.hash(senha)
+
+
+def _verificar(senha: str, hash_senha: str) -> bool:
+    return pwd_context.verify(senha, hash_senha)
+
+
+class PoolSenhas:
+    """
+    Pool de processos dedicado ao bcrypt de login e cadastro de usuários.
+
+    No threadpool do Starlette, uma troca de turno com dezenas de logins simultâneos ocupava todas as
+    threads com hashing e as requisições de leitura esperavam atrás delas. Aqui o bcrypt roda em
+    `processos` processos próprios (criados na primeira chamada, com `spawn`) e no máximo
+    `max_pendentes` operações podem estar em execução ou na fila; acima disso a chamada falha na hora
+    com 503, em vez de acumular espera.
+
+    Com `processos = 0` o hash é calculado na thread de quem chama (ou no threadpool, nas chamadas
+    assíncronas), como antes do pool, mantendo o limite de pendentes.
+
+    Se um processo do pool morre (OOM killer, por exemplo), o executor fica quebrado e toda chamada
+    falharia com `BrokenProcessPool`; o executor quebrado é descartado, a chamada é repetida uma vez
+    em um pool novo e as seguintes já usam o pool recriado.
+    """
+
+    def __init__(self, processos: int, max_pendentes: int):
+        self.processos = processos
+        self.max_pendentes = max_pendentes
+        self._lock = threading.Lock()
+        self._executor: ProcessPoolExecutor | None = None
+        self._pendentes = 0
+        self.rejeitadas = 0
+
+    def gerar_hash(self, senha: str) -> str:
+        return self._executar(_gerar_hash, senha)
+
+    def verificar(self, senha: str, hash_senha: str) -> bool:
+        return self._executar(_verificar, senha, hash_senha)
+
+    async def verificar_async(self, senha: str, hash_senha: str) -> bool:
+        """Como `verificar`, sem ocupar uma thread do threadpool enquanto o processo calcula."""
+        if not self.processos:
+            # Sem processos o bcrypt não pode rodar no event loop: vai para o threadpool
+            return await run_in_threadpool(self.verificar, senha, hash_senha)
+        try:
+            return await asyncio.wrap_future(self._submeter(_verificar, senha, hash_senha))
+        except BrokenProcessPool:
+            return await asyncio.wrap_future(self._submeter(_verificar, senha, hash_senha))
+
+    def parar(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def estatisticas(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "processos": self.processos,
+                "pendentes": self._pendentes,
+                "max_pendentes": self.max_pendentes,
+                "rejeitadas": self.rejeitadas,
+            }
+
+    def _executar(self, funcao: Callable, *args):
+        try:
+            return self._submeter(funcao, *args).result()
+        except BrokenProcessPool:
+            return self._submeter(funcao, *args).result()
+
+    def _submeter(self, funcao: Callable, *args) -> Future:
+        with self._lock:
+            if self._pendentes >= self.max_pendentes:
+                self.rejeitadas += 1
+                raise HashSenhasSobrecarregado()
+            self._pendentes += 1
+            if self.processos and self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processos, mp_context=multiprocessing.get_context("spawn")
+                )
+            executor = self._executor
+
+        try:
+            if executor:
+                try:
+                    futuro = executor.submit(funcao, *args)
+                except BrokenProcessPool:
+                    self._descartar(executor)
+                    raise
+            else:
+                futuro = Future()
+                try:
+                    futuro.set_result(funcao(*args))
+                except Exception as exc:
+                    futuro.set_exception(exc)
+        except BaseException:
+            self._concluir(None)
+            raise
+        futuro.add_done_callback(lambda futuro: self._concluir(futuro, executor))
+        return futuro
+
+    def _concluir(self, futuro: Future | None, executor: ProcessPoolExecutor | None = None):
+        with self._lock:
+            self._pendentes -= 1
+        if futuro is not None and not futuro.cancelled() and isinstance(futuro.exception(), BrokenProcessPool):
+            self._descartar(executor)
+
+    def _descartar(self, executor: ProcessPoolExecutor | None):
+        """
+        Tira de uso um executor quebrado; a próxima chamada cria um novo.
+
+        Não chama `shutdown`: o executor quebrado já encerra os próprios processos, e este método
+        pode rodar no callback da thread de gerenciamento dele, que segura o lock usado pelo `shutdown`.
+        """
+        with self._lock:
+            if executor is not None and self._executor is executor:
+                self._executor = None
+
+
+pool_senhas = PoolSenhas(
+    processos=app_settings.SENHAS_PROCESSOS, max_pendentes=app_settings.SENHAS_MAX_PENDENTES
+)
@@ -0,0 +1,73 @@
+import logging
+import threading
+from typing import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.conferencia import Conferencia, StatusConferencia, TagLida
+
+logger = logging.getLogger(__name__)
+
+
+class TagsVistas:
+    """
+    Conjunto, por conferência, das tags RFID que este worker já sabe estarem gravadas em `tag_lida`.
+
+    Uma tag só entra no conjunto depois do commit que a gravou, então estar no conjunto é a
+    confirmação de que ela já está no banco e a leitura repetida pode ser descartada sem ir ao
+    Postgres. Tags fora do conjunto seguem para o banco, que continua sendo quem deduplica.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tags: dict[int, set[str]] = {}
+        self.descartadas = 0
+
+    def carregar(self, session: Session):
+        """Reconstrói os conjuntos a partir de `tag_lida` para as conferências em andamento."""
+        stmt = (
+            select(TagLida.conferencia_id, TagLida.rfid_uuid)
+            .join(Conferencia, Conferencia.id == TagLida.conferencia_id)
+            .where(Conferencia.status == StatusConferencia.INICIADA)
+        )
+        tags: dict[int, set[str]] = {}
+        for conferencia_id, rfid_uuid in session.execute(stmt):
+            tags.setdefault(conferencia_id, set()).add(rfid_uuid)
+        with self._lock:
+            self._tags = tags
+            self.descartadas = 0
+        logger.info(f"Tags já lidas carregadas para {len(tags)} conferência(s) em andamento")
+
+    def filtrar_novas(self, conferencia_id: int, tags_rfid: Iterable[str]) -> list[str]:
+        """Retorna, na ordem recebida, apenas as tags que ainda não foram vistas na conferência."""
+        tags_rfid = list(tags_rfid)
+        with self._lock:
+            vistas = self._tags.get(conferencia_id, set())
+            novas = [tag for tag in tags_rfid if tag not in vistas]
+            self.descartadas += len(tags_rfid) - len(novas)
+        return novas
+
+    def registrar(self, conferencia_id: int, tags_rfid: Iterable[str]):
+        """Marca como vistas tags cuja gravação em `tag_lida` já foi confirmada (após o commit)."""
+        with self._lock:
+            self._tags.setdefault(conferencia_id, set()).update(tags_rfid)
+
+    def descartar(self, conferencia_id: int | None = None):
+        """Esquece as tags de uma conferência ou, sem argumentos, de todas."""
+        with self._lock:
+            if conferencia_id is None:
+                self._tags.clear()
+            else:
+                self._tags.pop(conferencia_id, None)
+
+    def estatisticas(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "conferencias": len(self._tags),
+                "tags": sum(len(tags) for tags in self._tags.values()),
+                "descartadas": self.descartadas,
+            }
+
+
+tags_vistas = TagsVistas()
@@ -0,0 +1,61 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from app.settings import app_settings
+
+
+class TokensVerificados:
+    """
+    LRU em memória dos payloads de tokens JWT já verificados, chaveado pelo SHA-256 do token inteiro
+    (assinatura incluída), para que o mesmo token de um coletor não passe por `jwt.decode` a cada
+    requisição.
+
+    Só entram tokens com assinatura válida e com `exp`; cada entrada vale até o `exp` do próprio
+    token, então um token expirado volta a ser decodificado (e rejeitado) como antes.
+    """
+
+    def __init__(self, capacidade: int):
+        self._capacidade = capacidade
+        self._lock = threading.Lock()
+        self._payloads: OrderedDict[bytes, tuple[dict, float]] = OrderedDict()
+        self.acertos = 0
+        self.falhas = 0
+
+    def obter(self, token: str) -> dict | None:
+        chave = hashlib.sha256(token.encode()).digest()
+        with self._lock:
+            guardado = self._payloads.get(chave)
+            if guardado is None or time.time() >= guardado[1]:
+                self._payloads.pop(chave, None)
+                self.falhas += 1
+                return None
+            self._payloads.move_to_end(chave)
+            self.acertos += 1
+        # Cópia: quem chama pode alterar o payload sem afetar o cache
+        return dict(guardado[0])
+
+    def guardar(self, token: str, payload: dict):
+        exp = payload.get("exp")
+        if not isinstance(exp, (int, float)):
+            return
+        chave = hashlib.sha256(token.encode()).digest()
+        with self._lock:
+            self._payloads[chave] = (dict(payload), exp)
+            self._payloads.move_to_end(chave)
+            while len(self._payloads) > self._capacidade:
+                self._payloads.popitem(last=False)
+
+    def limpar(self):
+        with self._lock:
+            self._payloads.clear()
+            self.acertos = 0
+            self.falhas = 0
+
+    def estatisticas(self) -> dict[str, int]:
+        with self._lock:
+            return {"acertos": self.acertos, "falhas": self.falhas, "itens": len(self._payloads)}
+
+
+tokens_verificados = TokensVerificados(capacidade=app_settings.JWT_CACHE_CAPACIDADE)
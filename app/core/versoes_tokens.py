@@ -0,0 +1,98 @@
+import logging
+import threading
+from contextlib import AbstractContextManager
+from typing import Callable
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session, object_session
+
+from app.core.notificacoes import notificar, ouvinte_notificacoes
+from app.models.usuario import Usuario
+
+logger = logging.getLogger(__name__)
+
+CANAL_VERSOES_TOKENS = "versoes_tokens"
+
+
+class VersoesTokens:
+    """
+    Mapa em memória `usuario_id -> token_versao` dos usuários que já tiveram tokens revogados
+    (`token_versao > 0`); os demais estão implicitamente na versão 0.
+
+    Um access token carrega id, role e a versão do usuário na emissão, e vale enquanto essa versão não
+    for menor que a do mapa. Inativar o usuário ou trocar sua role incrementa `usuarios.token_versao`
+    (ver `_incrementar_versao`), o que revoga os tokens emitidos antes sem consultar o banco a cada
+    requisição. O mapa é atualizado no commit neste worker e pelo canal `versoes_tokens` nos demais.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versoes: dict[int, int] = {}
+        self._fabrica_sessoes: Callable[[], AbstractContextManager[Session]] | None = None
+        self.rejeitados = 0
+
+    def valido(self, usuario_id: int, versao: int) -> bool:
+        if versao >= self._versoes.get(usuario_id, 0):
+            return True
+        self.rejeitados += 1
+        return False
+
+    def atualizar(self, usuario_id: int, versao: int):
+        # Versões só aumentam: uma notificação atrasada não desfaz uma revogação mais nova
+        with self._lock:
+            if versao > self._versoes.get(usuario_id, 0):
+                self._versoes[usuario_id] = versao
+
+    def carregar(self, fabrica_sessoes: Callable[[], AbstractContextManager[Session]]):
+        """Carrega o mapa do banco; a fábrica fica guardada para recarregar após perda de notificações."""
+        self._fabrica_sessoes = fabrica_sessoes
+        with fabrica_sessoes() as session:
+            linhas = session.execute(
+                select(Usuario.id, Usuario.token_versao).where(Usuario.token_versao > 0)
+            ).all()
+        with self._lock:
+            self._versoes = dict(linhas)
+
+    def notificado(self, mensagem: str | None):
+        if mensagem is None:
+            if self._fabrica_sessoes:
+                self.carregar(self._fabrica_sessoes)
+            return
+        usuario_id, versao = mensagem.split(":")
+        self.atualizar(int(usuario_id), int(versao))
+
+    def limpar(self):
+        with self._lock:
+            self._versoes.clear()
+            self.rejeitados = 0
+
+    def estatisticas(self) -> dict[str, int]:
+        with self._lock:
+            return {"usuarios": len(self._versoes), "rejeitados": self.rejeitados}
+
+
+versoes_tokens = VersoesTokens()
+ouvinte_notificacoes.assinar(CANAL_VERSOES_TOKENS, versoes_tokens.notificado)
+
+
+@event.listens_for(Usuario, "before_update")
+def _incrementar_versao(mapper, conexao, usuario: Usuario):
+    estado = inspect(usuario)
+    if estado.attrs.is_active.history.has_changes() or estado.attrs.role.history.has_changes():
+        usuario.token_versao = (usuario.token_versao or 0) + 1
+
+
+@event.listens_for(Usuario, "after_update")
+def _publicar_versao(mapper, conexao, usuario: Usuario):
+    if not inspect(usuario).attrs.token_versao.history.has_changes():
+        return
+    notificar(conexao, CANAL_VERSOES_TOKENS, f"{usuario.id}:{usuario.token_versao}")
+    session = object_session(usuario)
+    if session is not None:
+        session.info.setdefault("versoes_alteradas", {})[usuario.id] = usuario.token_versao
+
+
+@event.listens_for(Session, "after_commit")
+def _aplicar_versoes(session: Session):
+    for usuario_id, versao in session.info.pop("versoes_alteradas", {}).items():
+        versoes_tokens.atualizar(usuario_id, versao)
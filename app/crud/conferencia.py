@@ -1,112 +1,485 @@
-from typing import Tuple
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Iterable, Tuple
 
 from fastapi_filters import FilterValues
 from fastapi_filters.ext.sqlalchemy import apply_filters
-from sqlalchemy import delete, select
+from sqlalchemy import delete, func, or_, select, text
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session, joinedload
 
-from app.core.exceptions import PecaNotFound
+from app.core.catalogo import catalogo_pecas
+from app.core.contadores_leitura import LINHAS_POR_INSERCAO, contadores_leitura, somar_quantidades
+from app.core.estado_conferencias import CANAL_CONFERENCIAS, estado_conferencias
+from app.core.exceptions import ConferenciaAlreadyOpened
+from app.core.limpeza_tags import limpeza_tags
+from app.core.notificacoes import notificar
+from app.core.tags_vistas import tags_vistas
 from app.crud.usuario import get_usuario_by_username
-from app.models.conferencia import Conferencia, Evento, Leitura, StatusConferencia, TagLida
-from app.models.peca import Peca
+from app.models.conferencia import (
+    Conferencia,
+    Evento,
+    Leitura,
+    LeituraQuarentena,
+    LoteAplicado,
+    LoteFalho,
+    StatusConferencia,
+    TagLida,
+)
 from app.schemas.conferencia import ConferenciaCreate, EventoCreate, LeituraCreate
 
+# Chave do advisory lock que serializa o início de conferências (ver `criar_conferencia`)
+CHAVE_LOCK_CONFERENCIAS = 7_140_113
+
+
+@dataclass
+class ResultadoLeituras:
+    """
+    Resultado de um lote de leituras aplicado. Depois do commit, `tags_gravadas` vão para
+    `tags_vistas` e `quantidades` (adiadas quando os contadores write-behind estão ativos) para
+    `contadores_leitura` (ver `concluir_leituras`).
+    """
+
+    recebidas: int = 0
+    suprimidas: int = 0  # Repetições descartadas pela janela de debounce antes da gravação
+    contabilizadas: int = 0
+    fora_da_zona: int = 0  # Tags de produtos de outra localização, ignoradas na conferência de zona
+    tags_gravadas: list[str] = field(default_factory=list)
+    quarentena: Counter[str] = field(default_factory=Counter)  # código desconhecido -> tags
+    quantidades: Counter[tuple[int, str]] = field(default_factory=Counter)  # (produto_id, código) -> tags
+
+    def acumular(self, outro: "ResultadoLeituras"):
+        self.recebidas += outro.recebidas
+        self.suprimidas += outro.suprimidas
+        self.contabilizadas += outro.contabilizadas
+        self.fora_da_zona += outro.fora_da_zona
+        self.tags_gravadas.extend(outro.tags_gravadas)
+        self.quarentena.update(outro.quarentena)
+        self.quantidades.update(outro.quantidades)
+
+
+def lote_ja_aplicado(session: Session, conferencia_id: int, chave: str) -> bool:
+    stmt = select(LoteAplicado.chave).where(
+        LoteAplicado.conferencia_id == conferencia_id, LoteAplicado.chave == chave
+    )
+    return session.execute(stmt).first() is not None
+
+
+def marcar_lote_aplicado(session: Session, conferencia_id: int, chave: str) -> bool:
+    """
+    Registra a chave de idempotência na transação atual. Retorna False se um envio com a mesma
+    chave já foi aplicado (um reenvio concorrente espera o commit do primeiro e cai no conflito).
+    """
+    stmt = (
+        insert(LoteAplicado)
+        .values(conferencia_id=conferencia_id, chave=chave)
+        .on_conflict_do_nothing()
+        .returning(LoteAplicado.chave)
+    )
+    return session.execute(stmt).first() is not None
+
+
+def guardar_lote_falho(
+    session: Session,
+    conferencia_id: int,
+    sequencia: int,
+    leituras: list[LeituraCreate],
+    chave_idempotencia: str | None,
+    recebido_em: datetime,
+    erro: str,
+):
+    """Guarda em `lote_falho` um lote da fila de ingestão que não pôde ser gravado (sem commit)."""
+    session.add(
+        LoteFalho(
+            conferencia_id=conferencia_id,
+            sequencia=sequencia,
+            chave_idempotencia=chave_idempotencia,
+            leituras=[leitura.model_dump(mode="json") for leitura in leituras],
+            erro=erro,
+            recebido_em=recebido_em,
+        )
+    )
+
 
 def registrar_eventos_em_conferencia(
     session: Session,
-    conferencia_atual: Conferencia,
+    conferencia_id: int,
     eventos: list[EventoCreate],
+    chave_idempotencia: str | None = None,
 ):
+    if chave_idempotencia and not marcar_lote_aplicado(session, conferencia_id, chave_idempotencia):
+        session.rollback()
+        return
+
     eventos_criados = [
         Evento(
             **evento.model_dump(exclude=["tipo"]),
             tipo_evento=evento.tipo,
+            conferencia_id=conferencia_id,
         )
         for evento in eventos
     ]
     session.add_all(eventos_criados)
-    conferencia_atual.eventos.extend(eventos_criados)
     session.commit()
 
-    return conferencia_atual
 
+def criar_particao_tags(session: Session, conferencia_id: int):
+    """Cria a partição de `tag_lida` da conferência (somente no Postgres; sem commit)."""
+    if session.get_bind().dialect.name != "postgresql":
+        return
+    conferencia_id = int(conferencia_id)
+    session.execute(
+        text(
+            f"CREATE TABLE IF NOT EXISTS tag_lida_{conferencia_id} "
+            f"PARTITION OF tag_lida FOR VALUES IN ({conferencia_id})"
+        )
+    )
 
-def limpar_tabela_tags(session: Session):
-    session.execute(delete(TagLida))
-    session.commit()
 
+def inserir_tags_novas(session: Session, conferencia_id: int, tags_rfid: Iterable[str]) -> set[str]:
+    """
+    Insere as tags em `tag_lida` em um único INSERT multi-linhas e retorna somente as que ainda não
+    tinham sido lidas (as demais são descartadas pelo ON CONFLICT DO NOTHING).
+    """
+    linhas = [{"conferencia_id": conferencia_id, "rfid_uuid": tag} for tag in tags_rfid]
+    if not linhas:
+        return set()
 
-def pegar_tag_ou_criar(session: Session, conferencia_id: int, tag_rfid: str) -> Tuple[TagLida, bool]:
     stmt = (
-        insert(TagLida)
-        .values(conferencia_id=conferencia_id, rfid_uuid=tag_rfid)
-        .on_conflict_do_nothing(index_elements=["rfid_uuid"])
-        .returning(TagLida)
+        insert(TagLida.__table__)
+        .on_conflict_do_nothing(index_elements=["conferencia_id", "rfid_uuid"])
+        .returning(TagLida.__table__.c.rfid_uuid)
+        .execution_options(insertmanyvalues_page_size=LINHAS_POR_INSERCAO)
+    )
+    return set(session.execute(stmt, linhas).scalars())
+
+
+def acumular_quantidades(
+    session: Session,
+    conferencia_id: int,
+    quantidades: dict[Tuple[int, str], int],
+):
+    """
+    Soma as quantidades por produto com um único upsert multi-linhas em `uq_conferencia_produto`,
+    em ordem de `produto_id` (ver `somar_quantidades`).
+    """
+    somar_quantidades(
+        session,
+        {
+            (conferencia_id, produto_id, codigo_produto): quantidade
+            for (produto_id, codigo_produto), quantidade in quantidades.items()
+        },
     )
 
-    result = session.execute(stmt).fetchone()
 
-    if result:
-        instance = result[0]
-        session.add(instance)
-        return instance, True
+def quarentenar_leituras(session: Session, conferencia_id: int, leituras: list[LeituraCreate]):
+    """Guarda leituras de produtos desconhecidos; reenvios da mesma tag são ignorados."""
+    linhas = [
+        {
+            "conferencia_id": conferencia_id,
+            "rfid_uuid": leitura.rfid_etiqueta,
+            "codigo_produto": leitura.codigo_produto,
+            "lido_em": leitura.lido_em,
+        }
+        for leitura in leituras
+    ]
+    for inicio in range(0, len(linhas), LINHAS_POR_INSERCAO):
+        stmt = insert(LeituraQuarentena).values(linhas[inicio : inicio + LINHAS_POR_INSERCAO])
+        session.execute(stmt.on_conflict_do_nothing(index_elements=["conferencia_id", "rfid_uuid"]))
+
+
+def aplicar_leituras(
+    session: Session, conferencia_id: int, leituras: list[LeituraCreate]
+) -> ResultadoLeituras:
+    """
+    Grava um lote de leituras com operações em conjunto: o catálogo em cache para os produtos (com
+    uma consulta só para os que faltarem), um INSERT para as tags e um upsert para as quantidades,
+    independente do tamanho do lote.
+
+    Leituras de produtos desconhecidos não invalidam o lote: vão para `leitura_quarentena` e as
+    demais são gravadas normalmente. Numa conferência de zona só contam os produtos cuja
+    `localizacao` é a zona; os demais são ignorados (`fora_da_zona`), de modo que conferências de
+    zonas diferentes em andamento nunca contam o mesmo produto. Não faz commit.
+    """
+    # Mantém somente a primeira leitura de cada tag dentro do lote
+    primeira_por_tag: dict[str, LeituraCreate] = {}
+    for leitura in leituras:
+        primeira_por_tag.setdefault(leitura.rfid_etiqueta, leitura)
 
-    instance = session.query(TagLida).filter_by(conferencia_id=conferencia_id, rfid_uuid=tag_rfid).one()
-    return instance, False
+    resultado = ResultadoLeituras(recebidas=len(leituras))
+
+    # Tags que este worker já viu gravadas nem chegam ao banco
+    tags_a_gravar = tags_vistas.filtrar_novas(conferencia_id, primeira_por_tag)
+    if not tags_a_gravar:
+        return resultado
+
+    produtos = catalogo_pecas.resolver(
+        session, (primeira_por_tag[tag].codigo_produto for tag in tags_a_gravar)
+    )
+    desconhecidas = [
+        primeira_por_tag[tag] for tag in tags_a_gravar if primeira_por_tag[tag].codigo_produto not in produtos
+    ]
+    if desconhecidas:
+        quarentenar_leituras(session, conferencia_id, desconhecidas)
+        resultado.quarentena = Counter(leitura.codigo_produto for leitura in desconhecidas)
+
+    conhecidas = [tag for tag in tags_a_gravar if primeira_por_tag[tag].codigo_produto in produtos]
+    estado = estado_conferencias.obter(session, conferencia_id)
+    zona = estado.zona if estado else None
+    if zona is not None:
+        resultado.tags_gravadas = [
+            tag for tag in conhecidas if produtos[primeira_por_tag[tag].codigo_produto][2] == zona
+        ]
+        resultado.fora_da_zona = len(conhecidas) - len(resultado.tags_gravadas)
+    else:
+        resultado.tags_gravadas = conhecidas
+    tags_novas = inserir_tags_novas(session, conferencia_id, resultado.tags_gravadas)
+    resultado.contabilizadas = len(tags_novas)
+
+    quantidades = Counter(produtos[primeira_por_tag[tag].codigo_produto][:2] for tag in tags_novas)
+    if contadores_leitura.ativo:
+        # Somadas em memória após o commit e gravadas em conjunto pelos contadores write-behind
+        resultado.quantidades = quantidades
+    else:
+        acumular_quantidades(session, conferencia_id, quantidades)
+    return resultado
+
+
+def concluir_leituras(conferencia_id: int, resultado: ResultadoLeituras):
+    """Atualiza o estado em memória depois do commit de leituras aplicadas por `aplicar_leituras`."""
+    tags_vistas.registrar(conferencia_id, resultado.tags_gravadas)
+    if resultado.quantidades:
+        contadores_leitura.somar(conferencia_id, resultado.quantidades)
 
 
 def registrar_leituras_em_conferencia(
     session: Session,
-    conferencia_atual: Conferencia,
+    conferencia_id: int,
+    leituras: list[LeituraCreate],
+    chave_idempotencia: str | None = None,
+) -> ResultadoLeituras | None:
+    """
+    Registra um lote de leituras em uma transação própria (ver `aplicar_leituras`).
+
+    Com `chave_idempotencia` o lote é ignorado (retorna None) se a chave já tiver sido aplicada na
+    conferência.
+    """
+    if chave_idempotencia and not marcar_lote_aplicado(session, conferencia_id, chave_idempotencia):
+        session.rollback()
+        return None
+    resultado = aplicar_leituras(session, conferencia_id, leituras)
+    session.commit()
+    concluir_leituras(conferencia_id, resultado)
+    return resultado
+
+
+def get_resumo_quarentena(session: Session, conferencia_id: int) -> list[tuple[str, int]]:
+    """Códigos desconhecidos em quarentena na conferência, com a quantidade de tags de cada um."""
+    stmt = (
+        select(LeituraQuarentena.codigo_produto, func.count())
+        .where(LeituraQuarentena.conferencia_id == conferencia_id)
+        .group_by(LeituraQuarentena.codigo_produto)
+        .order_by(LeituraQuarentena.codigo_produto)
+    )
+    return [tuple(linha) for linha in session.execute(stmt)]
+
+
+def reprocessar_quarentena(session: Session, conferencia_id: int) -> ResultadoLeituras:
+    """
+    Reaplica em uma transação as leituras em quarentena da conferência. As que agora têm peça
+    cadastrada são contabilizadas e saem da quarentena; as demais permanecem.
+    """
+    stmt = select(
+        LeituraQuarentena.rfid_uuid, LeituraQuarentena.codigo_produto, LeituraQuarentena.lido_em
+    ).where(LeituraQuarentena.conferencia_id == conferencia_id)
+    leituras = [
+        LeituraCreate(rfid_etiqueta=rfid_uuid, codigo_produto=codigo_produto, lido_em=lido_em)
+        for rfid_uuid, codigo_produto, lido_em in session.execute(stmt)
+    ]
+    if not leituras:
+        return ResultadoLeituras()
+
+    # Se a partição de uma conferência encerrada já foi descartada, as tags vão para `tag_lida_default`
+    resultado = aplicar_leituras(session, conferencia_id, leituras)
+    session.execute(
+        delete(LeituraQuarentena).where(
+            LeituraQuarentena.conferencia_id == conferencia_id,
+            LeituraQuarentena.codigo_produto.not_in(resultado.quarentena.keys()),
+        )
+    )
+    session.commit()
+    concluir_leituras(conferencia_id, resultado)
+    return resultado
+
+
+def registrar_leituras_via_copy(
+    session: Session,
+    conferencia_id: int,
     leituras: list[LeituraCreate],
-) -> Conferencia | None:
+    chave_idempotencia: str | None = None,
+) -> ResultadoLeituras | None:
+    """
+    Variante de `registrar_leituras_em_conferencia` para uploads muito grandes (backlog offline).
+
+    As leituras são enviadas com `COPY` para uma tabela temporária e mescladas em `tag_lida`,
+    `leitura` e `leitura_quarentena` com comandos SQL em conjunto, mantendo a mesma deduplicação
+    (primeira leitura de cada tag no lote, tags já lidas ignoradas), a mesma soma de `quantidade` e
+    a mesma quarentena de produtos desconhecidos e o mesmo filtro de zona. Fora do Postgres (ex.: SQLite nos testes) usa o
+    caminho padrão.
+    """
+    if session.get_bind().dialect.name != "postgresql":
+        return registrar_leituras_em_conferencia(session, conferencia_id, leituras, chave_idempotencia)
+
+    if chave_idempotencia and not marcar_lote_aplicado(session, conferencia_id, chave_idempotencia):
+        session.rollback()
+        return None
+
+    primeira_por_tag: dict[str, LeituraCreate] = {}
     for leitura in leituras:
-        _, tag_foi_criada = pegar_tag_ou_criar(session, conferencia_atual.id, leitura.rfid_etiqueta)
-
-        if not tag_foi_criada:
-            continue  # TAG já lida, aborta
-
-        produto = session.query(Peca).filter(Peca.codigo_produto == leitura.codigo_produto).one_or_none()
-        if not produto:
-            raise PecaNotFound(f"Produto {leitura.codigo_produto} não encontrado")
-
-        stmt = (
-            insert(Leitura)
-            .values(
-                conferencia_id=conferencia_atual.id,
-                produto_id=produto.id,
-                codigo_categoria=produto.codigo_produto,
-                quantidade=1,
-            )
-            # Caso exista um conflito (leitura já registrada) atualiza somente a quantidade
-            .on_conflict_do_update(
-                index_elements=["conferencia_id", "produto_id"],
-                set_={"quantidade": Leitura.quantidade + 1},
+        primeira_por_tag.setdefault(leitura.rfid_etiqueta, leitura)
+
+    resultado = ResultadoLeituras(recebidas=len(leituras))
+    tags_a_gravar = tags_vistas.filtrar_novas(conferencia_id, primeira_por_tag)
+    if not tags_a_gravar:
+        session.commit()
+        return resultado
+
+    with session.connection().connection.cursor() as cursor:
+        cursor.execute(
+            "CREATE TEMP TABLE leitura_staging "
+            "(rfid_uuid text PRIMARY KEY, codigo_produto text NOT NULL, lido_em timestamptz NOT NULL) "
+            "ON COMMIT DROP"
+        )
+        with cursor.copy("COPY leitura_staging (rfid_uuid, codigo_produto, lido_em) FROM STDIN") as copy:
+            for tag in tags_a_gravar:
+                leitura = primeira_por_tag[tag]
+                copy.write_row((tag, leitura.codigo_produto, leitura.lido_em))
+
+    # Mesma regra do caminho padrão: numa conferência de zona, produtos de outra localização não contam
+    fora_da_zona: set[str] = set()
+    estado = estado_conferencias.obter(session, conferencia_id)
+    if estado and estado.zona is not None:
+        fora_da_zona = set(
+            session.scalars(
+                text(
+                    """
+                    DELETE FROM leitura_staging s
+                    USING pecas p
+                    WHERE p.codigo_produto = s.codigo_produto AND p.localizacao <> :zona
+                    RETURNING s.rfid_uuid
+                    """
+                ),
+                {"zona": estado.zona},
             )
         )
+        resultado.fora_da_zona = len(fora_da_zona)
+
+    # Produtos desconhecidos vão para a quarentena
+    parametros = {"conferencia_id": conferencia_id}
+    resultado.quarentena = Counter(
+        dict(
+            session.execute(
+                text(
+                    """
+                    SELECT s.codigo_produto, count(*)
+                    FROM leitura_staging s
+                    LEFT JOIN pecas p ON p.codigo_produto = s.codigo_produto
+                    WHERE p.id IS NULL
+                    GROUP BY s.codigo_produto
+                    """
+                )
+            ).all()
+        )
+    )
+    if resultado.quarentena:
+        session.execute(
+            text(
+                """
+                INSERT INTO leitura_quarentena (conferencia_id, rfid_uuid, codigo_produto, lido_em)
+                SELECT :conferencia_id, s.rfid_uuid, s.codigo_produto, s.lido_em
+                FROM leitura_staging s
+                LEFT JOIN pecas p ON p.codigo_produto = s.codigo_produto
+                WHERE p.id IS NULL
+                ON CONFLICT (conferencia_id, rfid_uuid) DO NOTHING
+                """
+            ),
+            parametros,
+        )
 
-        session.execute(stmt)
-
+    resultado.contabilizadas = session.execute(
+        text(
+            """
+            WITH novas AS (
+                INSERT INTO tag_lida (conferencia_id, rfid_uuid)
+                SELECT :conferencia_id, s.rfid_uuid
+                FROM leitura_staging s
+                JOIN pecas p ON p.codigo_produto = s.codigo_produto
+                ON CONFLICT (conferencia_id, rfid_uuid) DO NOTHING
+                RETURNING rfid_uuid
+            ), somadas AS (
+                INSERT INTO leitura (conferencia_id, produto_id, codigo_categoria, quantidade)
+                SELECT :conferencia_id, p.id, p.codigo_produto, count(*)
+                FROM novas n
+                JOIN leitura_staging s ON s.rfid_uuid = n.rfid_uuid
+                JOIN pecas p ON p.codigo_produto = s.codigo_produto
+                GROUP BY p.id, p.codigo_produto
+                ORDER BY p.id
+                ON CONFLICT (conferencia_id, produto_id)
+                DO UPDATE SET quantidade = leitura.quantidade + excluded.quantidade
+            )
+            SELECT count(*) FROM novas
+            """
+        ),
+        parametros,
+    ).scalar_one()
     session.commit()
-    return conferencia_atual
 
-
-def existe_conferencia_ativa(session: Session) -> bool:
-    return session.query(Conferencia).filter(Conferencia.status == StatusConferencia.INICIADA).count() > 0
+    resultado.tags_gravadas = [
+        tag
+        for tag in tags_a_gravar
+        if primeira_por_tag[tag].codigo_produto not in resultado.quarentena and tag not in fora_da_zona
+    ]
+    tags_vistas.registrar(conferencia_id, resultado.tags_gravadas)
+    return resultado
 
 
-def get_conferencia_ativa(session: Session) -> Conferencia | None:
-    return session.query(Conferencia).filter(Conferencia.status == StatusConferencia.INICIADA).first()
+def existe_conferencia_ativa(session: Session, zona: str | None = None) -> bool:
+    """
+    Indica se uma nova conferência da `zona` conflita com outra em andamento: conferências de zonas
+    diferentes rodam em paralelo, mas a conferência geral (sem zona) cobre o estoque todo e conflita
+    com qualquer outra.
+    """
+    query = session.query(Conferencia).filter(Conferencia.status == StatusConferencia.INICIADA)
+    if zona is not None:
+        query = query.filter(or_(Conferencia.zona == zona, Conferencia.zona.is_(None)))
+    return query.count() > 0
 
 
-def get_conferencia_by_id(session: Session, conferencia_id: int) -> Conferencia:
-    return (
+def get_conferencia_ativa(session: Session, zona: str | None = None) -> Conferencia | None:
+    """Conferência em andamento com suas leituras, para a resposta com os detalhes."""
+    query = (
         session.query(Conferencia)
         .options(joinedload(Conferencia.leituras))
-        .filter(Conferencia.id == conferencia_id)
-        .first()
+        .filter(Conferencia.status == StatusConferencia.INICIADA)
     )
+    if zona is not None:
+        query = query.filter(Conferencia.zona == zona)
+    conferencia = query.order_by(Conferencia.id).first()
+    if conferencia:
+        # As leituras são recarregadas após o commit da descarga dos contadores write-behind (só os deste
+        # worker; ver `ContadoresLeitura`)
+        contadores_leitura.descarregar(session, conferencia.id)
+    return conferencia
+
+
+def get_conferencia_by_id(session: Session, conferencia_id: int) -> Conferencia:
+    """
+    Carrega a conferência sem leituras nem eventos. Os endpoints de gravação, que só validam o
+    status, usam `estado_conferencias`.
+    """
+    return session.get(Conferencia, conferencia_id)
 
 
 def get_readings_from_conference(
@@ -119,6 +492,8 @@ def get_readings_from_conference(
 ) -> list[Leitura]:
     if not session.query(Conferencia).filter(Conferencia.id == id_conference):
         return None
+    # Quantidades ainda nos contadores write-behind deste worker vão para o banco antes da consulta
+    contadores_leitura.descarregar(session, id_conference)
     stmt = select(Leitura).filter(Leitura.conferencia_id == id_conference).limit(limit).offset(offset)
     stmt_filtered = apply_filters(stmt, filters)
     result = session.execute(stmt_filtered)
@@ -146,13 +521,35 @@ def get_conferencias(session: Session) -> list[Conferencia]:
 
 
 def criar_conferencia(session: Session, nova_conferencia: ConferenciaCreate) -> Conferencia:
-    limpar_tabela_tags(session)
+    """
+    Cria a conferência, ou levanta `ConferenciaAlreadyOpened` se ela conflitar com outra em andamento
+    (ver `existe_conferencia_ativa`).
+
+    O índice `uq_conferencia_ativa_por_zona` só barra duas conferências da mesma zona; a regra entre a
+    conferência geral e as de zona é verificada aqui. No Postgres a verificação e o INSERT rodam sob o
+    advisory lock `CHAVE_LOCK_CONFERENCIAS`, mantido até o commit, para que duas conferências que
+    conflitam não sejam criadas ao mesmo tempo por requisições concorrentes.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        session.execute(select(func.pg_advisory_xact_lock(CHAVE_LOCK_CONFERENCIAS)))
+    # Mudanças de status ainda pendentes na sessão entram na verificação, como entrariam no índice
+    session.flush()
+    if existe_conferencia_ativa(session, nova_conferencia.zona):
+        session.rollback()
+        raise ConferenciaAlreadyOpened()
     funcionario_rel = get_usuario_by_username(session, nova_conferencia.username_funcionario)
     conferencia = Conferencia(
         **nova_conferencia.model_dump(exclude=["id", "username_funcionario"]),
         id_funcionario=funcionario_rel.id,
     )
     session.add(conferencia)
+    try:
+        session.flush()
+    except IntegrityError:
+        # Outra conferência da mesma zona foi iniciada ao mesmo tempo (`uq_conferencia_ativa_por_zona`)
+        session.rollback()
+        raise ConferenciaAlreadyOpened()
+    criar_particao_tags(session, conferencia.id)
     session.commit()
     return conferencia
 
@@ -162,6 +559,17 @@ def mudar_status_conferencia(
     conferencia: Conferencia,
     status_conferencia: StatusConferencia,
 ) -> Conferencia:
+    contadores_leitura.descarregar(session, conferencia.id)
     conferencia.status = status_conferencia
+    if status_conferencia != StatusConferencia.INICIADA:
+        # Também marca até quando a fila de ingestão aceita lotes recebidos por outros workers
+        conferencia.finalizada_em = datetime.now(timezone.utc)
     session.add(conferencia)
+    # Os outros workers invalidam o estado e descartam as tags vistas da conferência no commit
+    notificar(session.connection(), CANAL_CONFERENCIAS, str(conferencia.id))
     session.commit()
+    estado_conferencias.invalidar(conferencia.id)
+    if status_conferencia != StatusConferencia.INICIADA:
+        tags_vistas.descartar(conferencia.id)
+        # As tags da conferência deixam de ser necessárias; a partição é descartada em segundo plano
+        limpeza_tags.agendar()
@@ -1,17 +1,19 @@
 from sqlalchemy.orm import Session
 
+from app.core.catalogo import catalogo_pecas
 from app.models.peca import Peca
-from app.models.usuario import Usuario
 from app.schemas.peca import PecaCreate, PecaFilter, PecaUpdate
+from app.schemas.usuario import Principal
 
 
 # CRUD Peça
-def create_peca(db: Session, peca: PecaCreate, created_by: Usuario):
+def create_peca(db: Session, peca: PecaCreate, created_by: Principal):
     db_peca = Peca(**peca.model_dump())
     db_peca.created_by = created_by.id
     db.add(db_peca)
     db.commit()
     db.refresh(db_peca)
+    catalogo_pecas.invalidar(db_peca.codigo_produto)
     return db_peca
 
 
@@ -29,10 +31,12 @@ def get_peca(db: Session, peca_id: int):
 def update_peca(db: Session, peca_id: int, peca: PecaUpdate):
     db_peca = db.query(Peca).filter(Peca.id == peca_id).first()
     if db_peca:
+        codigo_anterior = db_peca.codigo_produto
         for key, value in peca.model_dump(exclude_unset=True).items():
             setattr(db_peca, key, value)
         db.commit()
         db.refresh(db_peca)
+        catalogo_pecas.invalidar(codigo_anterior, db_peca.codigo_produto)
     return db_peca
 
 
@@ -56,4 +60,5 @@ def delete_peca(db: Session, peca_id: int):
     if db_peca:
         db.delete(db_peca)
         db.commit()
+        catalogo_pecas.invalidar(db_peca.codigo_produto)
     return db_peca
@@ -1,9 +1,13 @@
 from datetime import datetime
 
-from sqlalchemy import func
+from sqlalchemy import Float, and_, func, select
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import FunctionElement
 
+from app.core.contadores_leitura import contadores_leitura
 from app.models.conferencia import Conferencia, Leitura, StatusConferencia
+from app.models.usuario import Usuario
 from app.schemas.relatorio import ConferenciaRelatorio, DashboardFilters, FuncionarioMetricas, MetricasGerais
 
 
@@ -15,50 +19,90 @@ def calcular_duracao_minutos(iniciada_em: datetime, finalizada_em: datetime | No
     return duracao.total_seconds() / 60
 
 
-def get_metricas_gerais(db: Session, filters: DashboardFilters) -> MetricasGerais:
-    """Retorna métricas gerais do sistema de inventário."""
-
-    data_inicio = filters.data_inicio
-    data_fim = filters.data_fim
-
-    # Filtros de data para as queries
-    conferencia_query = db.query(Conferencia)
-    if data_inicio and data_fim:
-        conferencia_query = conferencia_query.filter(Conferencia.iniciada_em.between(data_inicio, data_fim))
-    elif data_inicio:
-        conferencia_query = conferencia_query.filter(Conferencia.iniciada_em >= data_inicio)
-    elif data_fim:
-        conferencia_query = conferencia_query.filter(Conferencia.iniciada_em <= data_fim)
-
-    # Estatísticas básicas
-    total_conferencias = conferencia_query.count()
-    finalizadas = conferencia_query.filter(Conferencia.status == StatusConferencia.FINALIZADA).count()
-    canceladas = conferencia_query.filter(Conferencia.status == StatusConferencia.CANCELADA).count()
-    em_andamento = conferencia_query.filter(Conferencia.status == StatusConferencia.INICIADA).count()
-
-    # Tempo médio geral (apenas finalizadas)
-    conferencias_finalizadas_query = conferencia_query.filter(
-        Conferencia.status == StatusConferencia.FINALIZADA,
-        Conferencia.finalizada_em.isnot(None),
+class duracao_em_minutos(FunctionElement):
+    """Duração em minutos entre duas colunas de data, compilada para o dialeto do banco."""
+
+    type = Float()
+    inherit_cache = True
+
+
+# Postgres (e demais bancos com EXTRACT(EPOCH ...)); o SQLite dos testes tem a própria versão
+@compiles(duracao_em_minutos)
+def _duracao_em_minutos_padrao(elemento, compilador, **kw):
+    inicio, fim = elemento.clauses
+    return f"(EXTRACT(EPOCH FROM {compilador.process(fim, **kw)} - {compilador.process(inicio, **kw)}) / 60)"
+
+
+@compiles(duracao_em_minutos, "sqlite")
+def _duracao_em_minutos_sqlite(elemento, compilador, **kw):
+    inicio, fim = elemento.clauses
+    return f"((julianday({compilador.process(fim, **kw)}) - julianday({compilador.process(inicio, **kw)})) * 1440)"
+
+
+def _condicoes_periodo(filters: DashboardFilters | None) -> list:
+    if not filters:
+        return []
+    if filters.data_inicio and filters.data_fim:
+        return [Conferencia.iniciada_em.between(filters.data_inicio, filters.data_fim)]
+    if filters.data_inicio:
+        return [Conferencia.iniciada_em >= filters.data_inicio]
+    if filters.data_fim:
+        return [Conferencia.iniciada_em <= filters.data_fim]
+    return []
+
+
+def _agregados_por_funcionario(db: Session, condicoes: list):
+    """
+    Uma linha por funcionário (inclusive `id_funcionario` nulo) com as contagens por status e a soma e
+    a quantidade das durações das conferências finalizadas. Soma e quantidade, em vez da média, permitem
+    compor a média geral a partir das mesmas linhas, sem uma segunda consulta.
+    """
+    finalizada = Conferencia.status == StatusConferencia.FINALIZADA
+    com_duracao = and_(finalizada, Conferencia.finalizada_em.isnot(None))
+    stmt = (
+        select(
+            Conferencia.id_funcionario,
+            Usuario.username,
+            func.count().label("total"),
+            func.count().filter(finalizada).label("finalizadas"),
+            func.count().filter(Conferencia.status == StatusConferencia.CANCELADA).label("canceladas"),
+            func.count().filter(Conferencia.status == StatusConferencia.INICIADA).label("em_andamento"),
+            func.sum(duracao_em_minutos(Conferencia.iniciada_em, Conferencia.finalizada_em))
+            .filter(com_duracao)
+            .label("soma_duracoes"),
+            func.count().filter(com_duracao).label("com_duracao"),
+        )
+        .outerjoin(Usuario, Usuario.id == Conferencia.id_funcionario)
+        .where(*condicoes)
+        .group_by(Conferencia.id_funcionario, Usuario.username)
+        .order_by(Conferencia.id_funcionario)
     )
-    conferencias_finalizadas = conferencias_finalizadas_query.all()
-
-    tempo_medio_geral = 0.0
-    if conferencias_finalizadas:
-        duracoes = [calcular_duracao_minutos(c.iniciada_em, c.finalizada_em) for c in conferencias_finalizadas]
-        tempo_medio_geral = sum(d for d in duracoes if d) / len(duracoes) if duracoes else 0.0
-
-    # Métricas por funcionário
-    funcionarios = (
-        conferencia_query.with_entities(Conferencia.id_funcionario, func.count(Conferencia.id).label("total"))
-        .group_by(Conferencia.id_funcionario)
-        .all()
+    return db.execute(stmt).all()
+
+
+def _metricas_da_linha(linha) -> FuncionarioMetricas:
+    return FuncionarioMetricas(
+        funcionario_id=linha.id_funcionario,
+        funcionario_username=linha.username or "Desconhecido",
+        total_conferencias=linha.total,
+        tempo_medio_minutos=round(linha.soma_duracoes / linha.com_duracao, 2) if linha.com_duracao else 0.0,
+        conferencias_finalizadas=linha.finalizadas,
+        conferencias_canceladas=linha.canceladas,
     )
 
-    metricas_por_funcionario = []
-    for func_id, _ in funcionarios:
-        metricas_funcionario = get_metricas_funcionario(db, func_id, filters)
-        metricas_por_funcionario.append(metricas_funcionario)
+
+def get_metricas_gerais(db: Session, filters: DashboardFilters) -> MetricasGerais:
+    """Retorna métricas gerais do sistema de inventário, calculadas em uma única consulta agregada."""
+    linhas = _agregados_por_funcionario(db, _condicoes_periodo(filters))
+
+    # Conferências sem funcionário entram nos totais, mas não nas métricas por funcionário
+    metricas_por_funcionario = [
+        _metricas_da_linha(linha) for linha in linhas if linha.id_funcionario is not None
+    ]
+    com_duracao = sum(linha.com_duracao for linha in linhas)
+    tempo_medio_geral = (
+        sum(linha.soma_duracoes or 0.0 for linha in linhas) / com_duracao if com_duracao else 0.0
+    )
 
     # Top 5 funcionários mais rápidos
     funcionarios_rapidos = sorted(
@@ -66,10 +110,10 @@ def get_metricas_gerais(db: Session, filters: DashboardFilters) -> MetricasGerai
     )[:5]
 
     return MetricasGerais(
-        total_conferencias=total_conferencias,
-        conferencias_finalizadas=finalizadas,
-        conferencias_canceladas=canceladas,
-        conferencias_em_andamento=em_andamento,
+        total_conferencias=sum(linha.total for linha in linhas),
+        conferencias_finalizadas=sum(linha.finalizadas for linha in linhas),
+        conferencias_canceladas=sum(linha.canceladas for linha in linhas),
+        conferencias_em_andamento=sum(linha.em_andamento for linha in linhas),
         tempo_medio_geral_minutos=round(tempo_medio_geral, 2),
         funcionarios_mais_rapidos=funcionarios_rapidos,
         metricas_por_funcionario=metricas_por_funcionario,
@@ -80,46 +124,20 @@ def get_metricas_funcionario(
     db: Session, funcionario_id: int, filters: DashboardFilters | None = None
 ) -> FuncionarioMetricas:
     """Retorna métricas de um funcionário específico."""
-    from app.models.usuario import Usuario
-
-    funcionario = db.query(Usuario).filter(Usuario.id == funcionario_id).first()
-
-    # Aplicar filtros de data se fornecidos
-    conferencias_query = db.query(Conferencia).filter(Conferencia.id_funcionario == funcionario_id)
-
-    if filters:
-        if filters.data_inicio and filters.data_fim:
-            conferencias_query = conferencias_query.filter(
-                Conferencia.iniciada_em.between(filters.data_inicio, filters.data_fim)
-            )
-        elif filters.data_inicio:
-            conferencias_query = conferencias_query.filter(Conferencia.iniciada_em >= filters.data_inicio)
-        elif filters.data_fim:
-            conferencias_query = conferencias_query.filter(Conferencia.iniciada_em <= filters.data_fim)
-
-    conferencias = conferencias_query.all()
-
-    total = len(conferencias)
-    finalizadas = len([c for c in conferencias if c.status == StatusConferencia.FINALIZADA])
-    canceladas = len([c for c in conferencias if c.status == StatusConferencia.CANCELADA])
-
-    # Tempo médio
-    conferencias_finalizadas = [
-        c for c in conferencias if c.status == StatusConferencia.FINALIZADA and c.finalizada_em
-    ]
-
-    tempo_medio = 0.0
-    if conferencias_finalizadas:
-        duracoes = [calcular_duracao_minutos(c.iniciada_em, c.finalizada_em) for c in conferencias_finalizadas]
-        tempo_medio = sum(d for d in duracoes if d) / len(duracoes) if duracoes else 0.0
+    linhas = _agregados_por_funcionario(
+        db, [Conferencia.id_funcionario == funcionario_id, *_condicoes_periodo(filters)]
+    )
+    if linhas:
+        return _metricas_da_linha(linhas[0])
 
+    funcionario = db.get(Usuario, funcionario_id)
     return FuncionarioMetricas(
         funcionario_id=funcionario_id,
         funcionario_username=funcionario.username if funcionario else "Desconhecido",
-        total_conferencias=total,
-        tempo_medio_minutos=round(tempo_medio, 2),
-        conferencias_finalizadas=finalizadas,
-        conferencias_canceladas=canceladas,
+        total_conferencias=0,
+        tempo_medio_minutos=0.0,
+        conferencias_finalizadas=0,
+        conferencias_canceladas=0,
     )
 
 
@@ -127,18 +145,8 @@ def get_conferencias_para_relatorio(
     db: Session, filters: DashboardFilters | None = None
 ) -> list[ConferenciaRelatorio]:
     """Retorna todas as conferências formatadas para relatório."""
-    conferencias_query = db.query(Conferencia)
-
-    # Aplicar filtros de data se fornecidos
-    if filters:
-        if filters.data_inicio and filters.data_fim:
-            conferencias_query = conferencias_query.filter(
-                Conferencia.iniciada_em.between(filters.data_inicio, filters.data_fim)
-            )
-        elif filters.data_inicio:
-            conferencias_query = conferencias_query.filter(Conferencia.iniciada_em >= filters.data_inicio)
-        elif filters.data_fim:
-            conferencias_query = conferencias_query.filter(Conferencia.iniciada_em <= filters.data_fim)
+    contadores_leitura.descarregar(db)
+    conferencias_query = db.query(Conferencia).filter(*_condicoes_periodo(filters))
 
     conferencias = conferencias_query.order_by(Conferencia.iniciada_em.desc()).all()
 
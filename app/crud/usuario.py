@@ -1,18 +1,16 @@
-from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 
+from app.core.senhas import pool_senhas
 from app.models.usuario import Usuario
 from app.schemas.usuario import UsuarioCreate
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return pool_senhas.gerar_hash(password)
 
 
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return pool_senhas.verificar(plain_password, hashed_password)
 
 
 def get_usuario_by_id(db: Session, id: str):
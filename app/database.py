@@ -1,5 +1,9 @@
+from contextlib import AbstractContextManager, contextmanager
+from typing import Callable
+
+from fastapi import FastAPI
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 
 from app.settings import app_settings
 
@@ -15,3 +19,11 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def fabrica_de_sessoes(app: FastAPI) -> Callable[[], AbstractContextManager[Session]]:
+    """
+    Retorna uma fábrica de sessões para uso fora de requisições (startup, tarefas em segundo plano),
+    respeitando o override de `get_db` aplicado pelos testes.
+    """
+    return contextmanager(app.dependency_overrides.get(get_db, get_db))
@@ -3,13 +3,16 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import RedirectResponse
 
 from app.core.exception_handler import ExceptionHandler
-from app.routers import auth, conferencia, peca, relatorio, usuario
+from app.core.limite_autenticacao import LimiteAutenticacaoMiddleware
+from app.core.lifespan import lifespan
+from app.routers import auth, conferencia, diagnostico, peca, relatorio, usuario
 from app.settings import app_settings
 
 app = FastAPI(
     title=app_settings.PROJECT_NAME,
     description=app_settings.PROJECT_DESCRIPTION,
     version=app_settings.PROJECT_VERSION,
+    lifespan=lifespan,
 )
 
 
@@ -19,6 +22,8 @@ def redirect_to_docs():
     return RedirectResponse(url="/docs")
 
 
+# Registrado antes do CORS, que fica por fora e põe os headers CORS também nas respostas 429 e 413
+app.add_middleware(LimiteAutenticacaoMiddleware)
 # Configuração do CORS
 app.add_middleware(
     CORSMiddleware,
@@ -34,5 +39,6 @@ app.include_router(peca.router)
 app.include_router(usuario.router)
 app.include_router(conferencia.router)
 app.include_router(relatorio.router)
+app.include_router(diagnostico.router)
 
 ExceptionHandler.handle(app)
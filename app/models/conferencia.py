@@ -1,6 +1,20 @@
 import enum
 
-from sqlalchemy import Column, DateTime, Enum, ForeignKey, Integer, String, UniqueConstraint, func
+from sqlalchemy import (
+    DDL,
+    JSON,
+    Column,
+    DateTime,
+    Enum,
+    ForeignKey,
+    Index,
+    Integer,
+    PrimaryKeyConstraint,
+    String,
+    UniqueConstraint,
+    event,
+    func,
+)
 from sqlalchemy.orm import relationship
 
 from app.models.base import Base
@@ -15,12 +29,60 @@ class StatusConferencia(str, enum.Enum):
     CANCELADA = "cancelada"
 
 
-# Tabela somente para consultas otimizadas de unicidade
+# Tabela somente para consultas otimizadas de unicidade. No Postgres é particionada por conferência
+# (`tag_lida_<id>`), para que as tags de uma conferência encerrada sejam descartadas com um DROP
 class TagLida(Base):
     __tablename__ = "tag_lida"
-    id = Column(Integer, primary_key=True, index=True)
     conferencia_id = Column(Integer, ForeignKey("conferencia.id"), nullable=False)
-    rfid_uuid = Column(String, nullable=False, unique=True)
+    rfid_uuid = Column(String, nullable=False)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("conferencia_id", "rfid_uuid", name="pk_tag_lida"),
+        {"postgresql_partition_by": "LIST (conferencia_id)"},
+    )
+
+
+# Partição padrão: recebe as tags de uma conferência cuja partição já foi descartada, em vez de o INSERT
+# falhar; a limpeza de tags apaga essas linhas junto com as partições
+event.listen(
+    TagLida.__table__,
+    "after_create",
+    DDL("CREATE TABLE tag_lida_default PARTITION OF tag_lida DEFAULT").execute_if(dialect="postgresql"),
+)
+
+
+# Chaves de idempotência dos lotes já aplicados, para que reenvios não gravem de novo
+class LoteAplicado(Base):
+    __tablename__ = "lote_aplicado"
+    conferencia_id = Column(Integer, ForeignKey("conferencia.id", ondelete="CASCADE"), primary_key=True)
+    chave = Column(String(128), primary_key=True)
+
+
+# Lotes da fila de ingestão que falharam em todas as tentativas, guardados para análise e reenvio. Sem
+# chave estrangeira: o lote precisa poder ser guardado mesmo que o erro venha da própria conferência
+class LoteFalho(Base):
+    __tablename__ = "lote_falho"
+    id = Column(Integer, primary_key=True, index=True)
+    conferencia_id = Column(Integer, nullable=False, index=True)
+    sequencia = Column(Integer, nullable=False)
+    chave_idempotencia = Column(String(128), nullable=True)
+    leituras = Column(JSON, nullable=False)
+    erro = Column(String, nullable=False)
+    recebido_em = Column(DateTime(timezone=True), nullable=False)
+    falhou_em = Column(DateTime(timezone=True), server_default=func.now())
+
+
+# Leituras com código de produto desconhecido, guardadas para reprocessar quando a peça for criada
+class LeituraQuarentena(Base):
+    __tablename__ = "leitura_quarentena"
+    id = Column(Integer, primary_key=True, index=True)
+    conferencia_id = Column(Integer, ForeignKey("conferencia.id", ondelete="CASCADE"), nullable=False)
+    rfid_uuid = Column(String, nullable=False)
+    codigo_produto = Column(String, nullable=False)
+    lido_em = Column(DateTime(timezone=True), nullable=False)
+    recebida_em = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (UniqueConstraint("conferencia_id", "rfid_uuid", name="uq_quarentena_conferencia_tag"),)
 
 
 class Leitura(Base):
@@ -60,7 +122,19 @@ class Conferencia(TimestampMixin, Base):
     iniciada_em = Column(DateTime(timezone=True), server_default=func.now())
     finalizada_em = Column(DateTime(timezone=True), nullable=True)
     status = Column(Enum(StatusConferencia), nullable=False, default=StatusConferencia.INICIADA)
+    # Zona contada (mesmo valor de `Peca.localizacao`); nula quando a conferência cobre o estoque todo
+    zona = Column(String, nullable=True)
 
     funcionario = relationship("Usuario")
     leituras = relationship("Leitura", back_populates="conferencia")
     eventos = relationship("Evento", back_populates="conferencia")
+
+
+# Garante no banco uma única conferência em andamento por zona (a conferência geral usa a zona '')
+Index(
+    "uq_conferencia_ativa_por_zona",
+    func.coalesce(Conferencia.zona, ""),
+    unique=True,
+    postgresql_where=Conferencia.status == StatusConferencia.INICIADA,
+    sqlite_where=Conferencia.status == StatusConferencia.INICIADA,
+)
@@ -14,6 +14,8 @@ class Usuario(Base):
     is_active = Column(Boolean, default=True, nullable=False)
     password_hash = Column(String, nullable=False)
     role = Column(Enum(RoleEnum), nullable=False)
+    # Incrementada ao inativar ou trocar a role; tokens de acesso emitidos com versão anterior deixam de valer
+    token_versao = Column(Integer, default=0, server_default="0", nullable=False)
     created_at = Column(DateTime(timezone=True), default=datetime.now, nullable=False)
     created_by_id = Column(ForeignKey("usuarios.id"))
     created_by = relationship(
@@ -6,14 +6,15 @@ from app.auth import (
     authenticate_user,
     create_access_token,
     create_refresh_token,
+    dados_do_token,
     get_current_user,
     verify_token,
 )
 from app.crud.usuario import get_usuario_by_username
 from app.database import get_db
-from app.models.usuario import Usuario
 from app.schemas.usuario import (
     LoginResponse,
+    Principal,
     RefreshTokenRequest,
     TokenResponse,
     UsuarioOut,
@@ -23,19 +24,19 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 
 
 @router.post("/login", response_model=LoginResponse)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     """
     Realiza login de usuário no padrão Oauth2.
     Retorna access_token (validade: 1h) e refresh_token (validade: 7 dias).
     """
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Usuário ou senha inválidos")
 
     if not user.is_active:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Usuário inativo")
 
-    access_token, access_expire = create_access_token(data={"sub": user.username, "role": user.role})
+    access_token, access_expire = create_access_token(data=dados_do_token(user))
     refresh_token, refresh_expire = create_refresh_token(data={"sub": user.username})
 
     return {
@@ -78,7 +79,7 @@ def refresh_access_token(token_data: RefreshTokenRequest, db: Session = Depends(
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Usuário inativo")
 
     # Gera novo access token
-    new_access_token, access_expire = create_access_token(data={"sub": user.username, "role": user.role})
+    new_access_token, access_expire = create_access_token(data=dados_do_token(user))
     refresh_token, refresh_expire = create_refresh_token(data={"sub": user.username})
 
     return {
@@ -91,7 +92,7 @@ def refresh_access_token(token_data: RefreshTokenRequest, db: Session = Depends(
 
 
 @router.get("/me", response_model=UsuarioOut)
-def get_usuario_atual(current_user: Usuario = Depends(get_current_user)):
+def get_usuario_atual(current_user: Principal = Depends(get_current_user)):
     """
     Obtém o usuário atualmente logado
     """
@@ -1,80 +1,379 @@
-from fastapi import APIRouter, Depends, Response, status
+import asyncio
+import logging
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    Query,
+    Response,
+    WebSocket,
+    WebSocketDisconnect,
+    WebSocketException,
+    status,
+)
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
 from fastapi_filters import FilterValues, create_filters_from_model
+from pydantic import TypeAdapter, ValidationError
 from sqlalchemy.orm import Session
 
+from app.auth import get_current_active_user, get_current_user
+from app.core.debounce import debounce_leituras
+from app.core.estado_conferencias import estado_conferencias
 from app.core.exceptions import (
+    AppException,
     ConferenciaAlreadyClosed,
-    ConferenciaAlreadyOpened,
     ConferenciaNotFound,
     FuncionarioNotFound,
 )
+from app.core.fila_ingestao import fila_ingestao
+from app.core.formatos_leitura import CORPO_LEITURAS_OPENAPI, LotesDeLeituras, com_ultimo
 from app.crud.conferencia import (
+    ResultadoLeituras,
     criar_conferencia,
-    existe_conferencia_ativa,
     get_conferencia_ativa,
     get_conferencia_by_id,
     get_conferencias,
     get_events_from_conference,
     get_readings_from_conference,
+    get_resumo_quarentena,
+    lote_ja_aplicado,
     mudar_status_conferencia,
     registrar_eventos_em_conferencia,
     registrar_leituras_em_conferencia,
+    registrar_leituras_via_copy,
+    reprocessar_quarentena,
 )
 from app.crud.usuario import get_usuario_by_username
 from app.database import get_db
 from app.models.conferencia import StatusConferencia
-from app.schemas.auth import CurrentUser
+from app.schemas.auth import AdminUser, CurrentUser
 from app.schemas.conferencia import (
+    ChaveIdempotencia,
     ConferenciaCreate,
     ConferenciaDetailsOut,
+    ConferenciaLeituraOut,
     ConferenciaMinimalOut,
     EventoCreate,
     EventoOut,
+    IngestaoProgressoOut,
     LeituraCreate,
     LeituraDetailsOut,
+    LeituraEnfileiradaOut,
+    QuarentenaOut,
+    ResumoLeiturasOut,
+    StreamAckOut,
 )
 from app.schemas.shared import PaginatedResponse
+from app.settings import app_settings
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/conferencia", tags=["conferencia"])
 
+frames_de_leitura = TypeAdapter(LeituraCreate | list[LeituraCreate])
+
 
 @router.post("", response_model=ConferenciaMinimalOut)
 def iniciar_conferencia(nova_conferencia: ConferenciaCreate, user: CurrentUser, db: Session = Depends(get_db)):
-    """Inicia uma nova sessão de conferência de estoque."""
+    """
+    Inicia uma nova sessão de conferência de estoque.
+
+    Com `zona` a conferência cobre só as peças daquela localização, e equipes diferentes podem contar
+    zonas diferentes em paralelo; só uma conferência por zona fica em andamento. Leituras de produtos
+    de outra localização não são contadas nela (`fora_da_zona` no resumo), então um produto nunca é
+    contado em duas conferências de zona. Sem `zona` ela cobre o estoque todo e não convive com
+    nenhuma outra.
+    """
     if not get_usuario_by_username(db, nova_conferencia.username_funcionario):
         raise FuncionarioNotFound()
-    if existe_conferencia_ativa(db):
-        raise ConferenciaAlreadyOpened()
     conferencia_criada = criar_conferencia(db, nova_conferencia)
     return ConferenciaMinimalOut.from_conferencia_model(conferencia_criada)
 
 
-@router.post("/{conferencia_id}/leitura", response_model=ConferenciaMinimalOut)
-def registrar_leitura_na_conferencia(
-    conferencia_id: int, leituras: list[LeituraCreate], user: CurrentUser, db: Session = Depends(get_db)
+@router.post(
+    "/{conferencia_id}/leitura",
+    response_model=ConferenciaLeituraOut,
+    responses={status.HTTP_202_ACCEPTED: {"model": LeituraEnfileiradaOut}},
+    openapi_extra=CORPO_LEITURAS_OPENAPI,
+)
+async def registrar_leitura_na_conferencia(
+    conferencia_id: int,
+    lotes: LotesDeLeituras,
+    user: CurrentUser,
+    chave_idempotencia: ChaveIdempotencia = None,
+    assincrono: bool = Query(False, description="Aceita o lote (202) e grava em segundo plano"),
+    db: Session = Depends(get_db),
 ):
-    """Registra leituras de tags RFID em uma conferência ativa."""
-    conferencia_found = get_conferencia_by_id(db, conferencia_id)
-    if not conferencia_found:
+    """
+    Registra leituras de tags RFID em uma conferência ativa.
+
+    O corpo pode ser uma lista JSON (`application/json`), uma leitura por linha
+    (`application/x-ndjson`) ou o formato binário compacto de `app.core.leitura_binaria`
+    (`application/vnd.ssrfid.leituras`). Em NDJSON o corpo é validado e gravado em lotes à medida que chega,
+    com um commit por lote: uma linha inválida interrompe o envio (422 indicando a linha) e os lotes
+    anteriores permanecem gravados, podendo o envio ser repetido sem contagem dupla.
+
+    Leituras de produtos sem peça cadastrada não rejeitam o envio: vão para a quarentena da
+    conferência e aparecem no `resumo` da resposta, junto com o que foi contabilizado e repetido.
+
+    Repetições da mesma tag dentro de `DEBOUNCE_JANELA_MS` (pelo `lido_em`) são descartadas antes
+    de chegar ao banco e contadas em `resumo.suprimidas`.
+
+    Com o cabeçalho `Idempotency-Key` um reenvio de um envio já aplicado responde com a conferência
+    sem tocar nas leituras, mesmo que ela já tenha sido encerrada. A chave é registrada junto com o
+    último lote do envio.
+
+    Com `assincrono=true` os lotes são apenas enfileirados e a resposta 202 traz o número de
+    sequência do último lote; o progresso da gravação é consultado em `GET /conferencia/{id}/ingestao`.
+    """
+    estado = await run_in_threadpool(estado_conferencias.obter, db, conferencia_id)
+    if not estado:
         raise ConferenciaNotFound()
-    if conferencia_found.status != StatusConferencia.INICIADA:
+    if chave_idempotencia and await run_in_threadpool(
+        lote_ja_aplicado, db, conferencia_id, chave_idempotencia
+    ):
+        return ConferenciaLeituraOut.from_estado(estado)
+    if estado.status != StatusConferencia.INICIADA:
         raise ConferenciaAlreadyClosed()
-    conferencia_atualizada = registrar_leituras_em_conferencia(db, conferencia_found, leituras)
-    return ConferenciaMinimalOut.from_conferencia_model(conferencia_atualizada)
+    if assincrono:
+        sequencia = fila_ingestao.progresso(conferencia_id)["sequencia_recebida"]
+        async for leituras, ultimo in com_ultimo(lotes):
+            filtradas, marcas = debounce_leituras.filtrar(conferencia_id, leituras)
+            sequencia = fila_ingestao.enfileirar(
+                conferencia_id, filtradas, chave_idempotencia if ultimo else None
+            )
+            debounce_leituras.confirmar(marcas)
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content=LeituraEnfileiradaOut(conferencia_id=conferencia_id, sequencia=sequencia).model_dump(),
+        )
+    resultado = ResultadoLeituras()
+    async for leituras, ultimo in com_ultimo(lotes):
+        filtradas, marcas = debounce_leituras.filtrar(conferencia_id, leituras)
+        resultado_lote = await run_in_threadpool(
+            registrar_leituras_em_conferencia,
+            db,
+            conferencia_id,
+            filtradas,
+            chave_idempotencia if ultimo else None,
+        )
+        debounce_leituras.confirmar(marcas)
+        if resultado_lote is None:  # Chave aplicada por um reenvio concorrente
+            resultado = None
+            break
+        resultado.acumular(resultado_lote)
+        resultado.recebidas += len(leituras) - len(filtradas)
+        resultado.suprimidas += len(leituras) - len(filtradas)
+    resposta = ConferenciaLeituraOut.from_estado(estado)
+    resposta.resumo = ResumoLeiturasOut.from_resultado(resultado) if resultado else None
+    return resposta
+
+
+@router.post("/{conferencia_id}/leitura/lote", response_model=ConferenciaLeituraOut)
+def registrar_lote_de_leituras_na_conferencia(
+    conferencia_id: int,
+    leituras: list[LeituraCreate],
+    user: CurrentUser,
+    chave_idempotencia: ChaveIdempotencia = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Registra um volume grande de leituras (ex.: sincronização de backlog offline de um coletor)
+    usando `COPY` para uma tabela temporária e uma mesclagem em conjunto no banco.
+    """
+    estado = estado_conferencias.obter(db, conferencia_id)
+    if not estado:
+        raise ConferenciaNotFound()
+    if chave_idempotencia and lote_ja_aplicado(db, conferencia_id, chave_idempotencia):
+        return ConferenciaLeituraOut.from_estado(estado)
+    if estado.status != StatusConferencia.INICIADA:
+        raise ConferenciaAlreadyClosed()
+    filtradas, marcas = debounce_leituras.filtrar(conferencia_id, leituras)
+    resultado = registrar_leituras_via_copy(db, conferencia_id, filtradas, chave_idempotencia)
+    debounce_leituras.confirmar(marcas)
+    if resultado:
+        resultado.recebidas += len(leituras) - len(filtradas)
+        resultado.suprimidas += len(leituras) - len(filtradas)
+    resposta = ConferenciaLeituraOut.from_estado(estado)
+    resposta.resumo = ResumoLeiturasOut.from_resultado(resultado) if resultado else None
+    return resposta
+
+
+@router.websocket("/{conferencia_id}/stream")
+async def stream_de_leituras(
+    websocket: WebSocket,
+    conferencia_id: int,
+    token: str | None = Query(
+        None, description="Access token, caso o cliente não envie o header Authorization"
+    ),
+    db: Session = Depends(get_db),
+):
+    """
+    Recebe um fluxo contínuo de leituras de leitores fixos e portais.
+
+    O token é validado uma única vez, na conexão (query `token` ou header `Authorization: Bearer`).
+    Cada frame é um `LeituraCreate` ou uma lista deles; os frames são agrupados em micro-lotes
+    (`STREAM_LEITURAS_POR_LOTE` leituras ou `STREAM_INTERVALO_MS`) e cada micro-lote gravado é
+    confirmado com um `StreamAckOut` contendo os totais acumulados da conexão.
+    """
+    esquema, _, credencial = websocket.headers.get("authorization", "").partition(" ")
+    token = token or (credencial if esquema.lower() == "bearer" else None)
+    if not token:
+        raise WebSocketException(code=status.WS_1008_POLICY_VIOLATION, reason="Token não informado")
+    try:
+        get_current_active_user(await run_in_threadpool(get_current_user, token, db))
+    except AppException as exc:
+        raise WebSocketException(code=status.WS_1008_POLICY_VIOLATION, reason=exc.detail)
+
+    estado = await run_in_threadpool(estado_conferencias.obter, db, conferencia_id)
+    if not estado:
+        raise WebSocketException(code=status.WS_1008_POLICY_VIOLATION, reason=ConferenciaNotFound().detail)
+    if estado.status != StatusConferencia.INICIADA:
+        raise WebSocketException(
+            code=status.WS_1008_POLICY_VIOLATION, reason=ConferenciaAlreadyClosed().detail
+        )
+
+    await websocket.accept()
+
+    def gravar(leituras: list[LeituraCreate]):
+        # O status é consultado a cada micro-lote: um encerramento neste worker é percebido no
+        # micro-lote seguinte e, em outro worker, em até `ESTADO_CONFERENCIA_TTL_SEGUNDOS`.
+        # Uma conferência excluída durante o stream encerra a conexão por violação de política
+        estado = estado_conferencias.obter(db, conferencia_id)
+        if estado is None:
+            raise ConferenciaNotFound()
+        if estado.status != StatusConferencia.INICIADA:
+            raise ConferenciaAlreadyClosed()
+        try:
+            return registrar_leituras_em_conferencia(db, conferencia_id, leituras)
+        except Exception:
+            # A sessão é reaproveitada pelos próximos micro-lotes da conexão
+            db.rollback()
+            raise
+
+    # Um leitor dedicado entrega os frames por uma fila, para que esperar o prazo do micro-lote
+    # nunca cancele um receive em andamento no socket
+    frames: asyncio.Queue[str | None] = asyncio.Queue()
+
+    async def ler_frames():
+        try:
+            while True:
+                await frames.put(await websocket.receive_text())
+        except WebSocketDisconnect:
+            await frames.put(None)
+
+    leitor = asyncio.create_task(ler_frames())
+    loop = asyncio.get_running_loop()
+    intervalo = app_settings.STREAM_INTERVALO_MS / 1000
+    pendentes: list[LeituraCreate] = []
+    # Marcas do debounce das leituras pendentes, confirmadas só depois que o micro-lote é gravado
+    marcas: dict[tuple[int, str], int] = {}
+    prazo = 0.0
+    lote = recebidas = suprimidas = processadas = em_quarentena = 0
+
+    try:
+        while True:
+            try:
+                frame = await asyncio.wait_for(
+                    frames.get(), max(prazo - loop.time(), 0) if pendentes else None
+                )
+            except TimeoutError:
+                frame = ""  # Prazo do micro-lote expirou
+
+            if frame is None:  # Cliente desconectou: grava o que sobrou sem enviar ack
+                if pendentes:
+                    try:
+                        await run_in_threadpool(gravar, pendentes)
+                        debounce_leituras.confirmar(marcas)
+                    except Exception:
+                        logger.exception(
+                            f"Falha ao gravar o último micro-lote do stream da conferência {conferencia_id}"
+                        )
+                return
+
+            if frame:
+                try:
+                    leituras = frames_de_leitura.validate_json(frame)
+                except ValidationError as exc:
+                    erro = f"Frame inválido: {exc.errors()[0]['msg']}"
+                    ack = StreamAckOut(
+                        lote=lote, leituras_recebidas=recebidas, leituras_processadas=processadas, erro=erro
+                    )
+                    await websocket.send_json(ack.model_dump())
+                    continue
+                leituras = leituras if isinstance(leituras, list) else [leituras]
+                recebidas += len(leituras)
+                filtradas, marcas = debounce_leituras.filtrar(conferencia_id, leituras, marcas)
+                suprimidas += len(leituras) - len(filtradas)
+                if not filtradas and not pendentes:
+                    continue
+                if not pendentes:
+                    prazo = loop.time() + intervalo
+                pendentes.extend(filtradas)
+                if len(pendentes) < app_settings.STREAM_LEITURAS_POR_LOTE:
+                    continue
+
+            lote += 1
+            erro = None
+            fechamento = None
+            try:
+                resultado = await run_in_threadpool(gravar, pendentes)
+                debounce_leituras.confirmar(marcas)
+                processadas += len(pendentes)
+                em_quarentena += sum(resultado.quarentena.values())
+            except ConferenciaNotFound as exc:
+                erro, fechamento = exc.detail, status.WS_1008_POLICY_VIOLATION
+            except ConferenciaAlreadyClosed as exc:
+                erro, fechamento = exc.detail, status.WS_1000_NORMAL_CLOSURE
+            except AppException as exc:
+                erro = exc.detail
+            except Exception:
+                # O micro-lote não é confirmado no debounce e pode ser reenviado pelo leitor
+                logger.exception(
+                    f"Falha ao gravar o micro-lote {lote} do stream da conferência {conferencia_id}"
+                )
+                erro = "Falha ao gravar o micro-lote"
+            pendentes, marcas = [], {}
+            ack = StreamAckOut(
+                lote=lote,
+                leituras_recebidas=recebidas,
+                leituras_processadas=processadas,
+                leituras_suprimidas=suprimidas,
+                leituras_em_quarentena=em_quarentena,
+                erro=erro,
+            )
+            await websocket.send_json(ack.model_dump())
+
+            if fechamento is not None:
+                await websocket.close(code=fechamento, reason=erro)
+                return
+    finally:
+        leitor.cancel()
 
 
 @router.post("/{conferencia_id}/evento", response_model=ConferenciaMinimalOut)
 def registrar_eventos_na_conferencia(
-    conferencia_id: int, eventos: list[EventoCreate], user: CurrentUser, db: Session = Depends(get_db)
+    conferencia_id: int,
+    eventos: list[EventoCreate],
+    user: CurrentUser,
+    chave_idempotencia: ChaveIdempotencia = None,
+    db: Session = Depends(get_db),
 ):
-    """Registra eventos (ex: Pausa) em uma conferência ativa."""
-    conferencia_found = get_conferencia_by_id(db, conferencia_id)
-    if not conferencia_found:
+    """
+    Registra eventos (ex: Pausa) em uma conferência ativa.
+
+    Com o cabeçalho `Idempotency-Key` um reenvio já aplicado não duplica os eventos.
+    """
+    estado = estado_conferencias.obter(db, conferencia_id)
+    if not estado:
         raise ConferenciaNotFound()
-    if conferencia_found.status != StatusConferencia.INICIADA:
+    if chave_idempotencia and lote_ja_aplicado(db, conferencia_id, chave_idempotencia):
+        return ConferenciaMinimalOut.from_estado(estado)
+    if estado.status != StatusConferencia.INICIADA:
         raise ConferenciaAlreadyClosed()
-    conferencia_atualizada = registrar_eventos_em_conferencia(db, conferencia_found, eventos)
-    return ConferenciaMinimalOut.from_conferencia_model(conferencia_atualizada)
+    registrar_eventos_em_conferencia(db, conferencia_id, eventos, chave_idempotencia)
+    return ConferenciaMinimalOut.from_estado(estado)
 
 
 @router.put("/{conferencia_id}/encerrar", response_model=ConferenciaMinimalOut)
@@ -85,6 +384,9 @@ def encerrar_conferencia(conferencia_id: int, user: CurrentUser, db: Session = D
         raise ConferenciaNotFound()
     if conferencia_found.status != StatusConferencia.INICIADA:
         raise ConferenciaAlreadyClosed()
+    # Lotes aceitos com 202 por este worker são gravados antes do fechamento; os que estão na fila de
+    # outros workers são gravados por eles logo depois (ver `FilaIngestao`)
+    fila_ingestao.descarregar(db, conferencia_id)
     mudar_status_conferencia(db, conferencia_found, StatusConferencia.FINALIZADA)
     return ConferenciaMinimalOut.from_conferencia_model(conferencia_found)
 
@@ -97,6 +399,7 @@ def cancelar_conferencia(conferencia_id: int, user: CurrentUser, db: Session = D
         raise ConferenciaNotFound()
     if conferencia_found.status != StatusConferencia.INICIADA:
         raise ConferenciaAlreadyClosed()
+    fila_ingestao.descarregar(db, conferencia_id)
     mudar_status_conferencia(db, conferencia_found, StatusConferencia.CANCELADA)
     return ConferenciaMinimalOut.from_conferencia_model(conferencia_found)
 
@@ -108,6 +411,40 @@ def listar_conferencia(user: CurrentUser, db: Session = Depends(get_db)):
     return [ConferenciaMinimalOut.from_conferencia_model(conferencia) for conferencia in conferencias]
 
 
+@router.get("/{conferencia_id}/ingestao", response_model=IngestaoProgressoOut)
+def progresso_da_ingestao(conferencia_id: int, user: CurrentUser):
+    """
+    Informa até qual sequência os lotes aceitos com `assincrono=true` já foram gravados.
+    A fila é mantida por worker, então o progresso se refere aos lotes recebidos por este worker.
+    Lotes que falharam em todas as tentativas de gravação ficam em `lote_falho` (`lotes_falhos`).
+    """
+    return IngestaoProgressoOut(conferencia_id=conferencia_id, **fila_ingestao.progresso(conferencia_id))
+
+
+@router.get("/{conferencia_id}/quarentena", response_model=list[QuarentenaOut])
+def quarentena_da_conferencia(conferencia_id: int, user: CurrentUser, db: Session = Depends(get_db)):
+    """Lista os códigos de produto desconhecidos em quarentena, com quantas tags aguardam cada um."""
+    if not estado_conferencias.obter(db, conferencia_id):
+        raise ConferenciaNotFound()
+    return [
+        QuarentenaOut(codigo_produto=codigo, tags=tags)
+        for codigo, tags in get_resumo_quarentena(db, conferencia_id)
+    ]
+
+
+@router.post("/{conferencia_id}/quarentena/reprocessar", response_model=ResumoLeiturasOut)
+def reprocessar_quarentena_da_conferencia(
+    conferencia_id: int, admin: AdminUser, db: Session = Depends(get_db)
+):
+    """
+    Reprocessa em conjunto as leituras em quarentena depois que as peças que faltavam forem
+    cadastradas. As leituras ainda sem peça continuam em quarentena.
+    """
+    if not estado_conferencias.obter(db, conferencia_id):
+        raise ConferenciaNotFound()
+    return ResumoLeiturasOut.from_resultado(reprocessar_quarentena(db, conferencia_id))
+
+
 @router.get("/{id_conferencia}/leituras", response_model=PaginatedResponse[LeituraDetailsOut])
 def readings_from_conference(
     id_conferencia: int,
@@ -120,8 +457,7 @@ def readings_from_conference(
     ),
 ):
     """Lista todas as leituras assossiadas a uma conferência"""
-    conferencia_found = get_conferencia_by_id(db, id_conferencia)
-    if not conferencia_found:
+    if not estado_conferencias.obter(db, id_conferencia):
         raise ConferenciaNotFound
     readings = get_readings_from_conference(
         session=db, filters=filters, limit=limit, offset=offset, id_conference=id_conferencia
@@ -153,8 +489,7 @@ def events_from_conference(
     db: Session = Depends(get_db),
     filters: FilterValues = Depends(create_filters_from_model(EventoOut)),
 ):
-    conferencia_found = get_conferencia_by_id(db, id_conferencia)
-    if not conferencia_found:
+    if not estado_conferencias.obter(db, id_conferencia):
         raise ConferenciaNotFound
     events = get_events_from_conference(
         db,
@@ -172,9 +507,13 @@ def events_from_conference(
 
 
 @router.get("-ativa", response_model=ConferenciaDetailsOut)
-def pegar_conferencia_ativa(user: CurrentUser, db: Session = Depends(get_db)):
-    """Retorna a conferência ativa atualmente"""
-    conferencia = get_conferencia_ativa(db)
+def pegar_conferencia_ativa(
+    user: CurrentUser,
+    zona: str | None = Query(None, description="Zona da conferência (mesmo valor de `Peca.localizacao`)"),
+    db: Session = Depends(get_db),
+):
+    """Retorna a conferência ativa atualmente (a da zona informada, quando houver `zona`)"""
+    conferencia = get_conferencia_ativa(db, zona)
     if not conferencia:
         return Response(status_code=status.HTTP_204_NO_CONTENT)
     return ConferenciaDetailsOut.from_conferencia_model(conferencia)
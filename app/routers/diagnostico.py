@@ -0,0 +1,44 @@
+from fastapi import APIRouter
+
+from app.core.catalogo import catalogo_pecas
+from app.core.contadores_leitura import contadores_leitura
+from app.core.debounce import debounce_leituras
+from app.core.estado_conferencias import estado_conferencias
+from app.core.limite_autenticacao import limites_autenticacao
+from app.core.principais import cache_principais
+from app.core.senhas import pool_senhas
+from app.core.tags_vistas import tags_vistas
+from app.core.tokens_verificados import tokens_verificados
+from app.core.versoes_tokens import versoes_tokens
+from app.schemas.auth import AdminUser
+from app.schemas.diagnostico import (
+    DiagnosticoOut,
+    EstatisticasCache,
+    EstatisticasContadores,
+    EstatisticasDebounce,
+    EstatisticasLimiteAutenticacao,
+    EstatisticasSenhas,
+    EstatisticasTagsVistas,
+    EstatisticasVersoesTokens,
+)
+
+router = APIRouter(prefix="/diagnostico", tags=["diagnostico"])
+
+
+@router.get("", response_model=DiagnosticoOut)
+def obter_diagnostico(user: AdminUser):
+    """
+    Retorna os contadores das estruturas em memória deste worker (cada worker tem as suas).
+    """
+    return DiagnosticoOut(
+        catalogo_pecas=EstatisticasCache(**catalogo_pecas.estatisticas()),
+        estado_conferencias=EstatisticasCache(**estado_conferencias.estatisticas()),
+        principais=EstatisticasCache(**cache_principais.estatisticas()),
+        tokens_verificados=EstatisticasCache(**tokens_verificados.estatisticas()),
+        versoes_tokens=EstatisticasVersoesTokens(**versoes_tokens.estatisticas()),
+        tags_vistas=EstatisticasTagsVistas(**tags_vistas.estatisticas()),
+        debounce=EstatisticasDebounce(**debounce_leituras.estatisticas()),
+        contadores_leitura=EstatisticasContadores(**contadores_leitura.estatisticas()),
+        senhas=EstatisticasSenhas(**pool_senhas.estatisticas()),
+        limite_autenticacao=EstatisticasLimiteAutenticacao(**limites_autenticacao.estatisticas()),
+    )
@@ -12,8 +12,8 @@ from sqlalchemy.orm import Session
 from app.auth import get_current_user
 from app.crud.relatorio import get_conferencias_para_relatorio, get_metricas_gerais
 from app.database import get_db
-from app.models.usuario import Usuario
 from app.schemas.relatorio import DashboardFilters, MetricasGerais
+from app.schemas.usuario import Principal
 
 router = APIRouter(prefix="/relatorios", tags=["relatorios"])
 
@@ -22,7 +22,7 @@ router = APIRouter(prefix="/relatorios", tags=["relatorios"])
 def obter_metricas(
     filters: DashboardFilters = Query(),
     db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """
     Retorna métricas essenciais sobre inventários:
@@ -37,7 +37,7 @@ def obter_metricas(
 def gerar_relatorio_pdf(
     filters: DashboardFilters = Query(),
     db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     """
     Gera um PDF com relatório completo de todos os inventários em formato de tabela.
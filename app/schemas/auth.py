@@ -3,7 +3,7 @@ from typing import Annotated
 from fastapi import Depends
 
 from app.auth import get_admin_user, get_current_active_user
-from app.models.usuario import Usuario
+from app.schemas.usuario import Principal
 
-CurrentUser = Annotated[Usuario, Depends(get_current_active_user)]
-AdminUser = Annotated[Usuario, Depends(get_admin_user)]
+CurrentUser = Annotated[Principal, Depends(get_current_active_user)]
+AdminUser = Annotated[Principal, Depends(get_admin_user)]
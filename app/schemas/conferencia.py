@@ -1,10 +1,16 @@
 import datetime
 from enum import Enum
+from typing import TYPE_CHECKING, Annotated
 
+from fastapi import Header
 from pydantic import BaseModel, ConfigDict
 
 from app.models.conferencia import Conferencia
 
+if TYPE_CHECKING:
+    from app.core.estado_conferencias import EstadoConferencia
+    from app.crud.conferencia import ResultadoLeituras
+
 
 class PecaBase(BaseModel):
     nome: str
@@ -63,6 +69,7 @@ class LeituraCreate(LeituraBase):
 
 class ConferenciaBase(BaseModel):
     username_funcionario: str
+    zona: str | None = None  # Mesmo valor de `Peca.localizacao`; nula para o estoque todo
 
 
 class ConferenciaDetailsOut(ConferenciaBase):
@@ -79,6 +86,7 @@ class ConferenciaDetailsOut(ConferenciaBase):
             status=nova_conferencia.status,
             created_at=nova_conferencia.created_at,
             username_funcionario=nova_conferencia.funcionario.username,
+            zona=nova_conferencia.zona,
             leituras=[
                 LeituraMinimalOut(
                     id=leitura.id,
@@ -116,8 +124,101 @@ class ConferenciaMinimalOut(ConferenciaBase):
             created_at=nova_conferencia.created_at,
             status=nova_conferencia.status,
             username_funcionario=nova_conferencia.funcionario.username,
+            zona=nova_conferencia.zona,
+        )
+
+    @classmethod
+    def from_estado(cls, estado: "EstadoConferencia"):
+        return cls(
+            id=estado.id,
+            created_at=estado.created_at,
+            status=estado.status,
+            username_funcionario=estado.username_funcionario,
+            zona=estado.zona,
         )
 
 
+class ResumoLeiturasOut(BaseModel):
+    """
+    Resumo por item de um envio de leituras: o que foi contado, repetido, posto em quarentena ou
+    ignorado por ser de produto de outra zona.
+    """
+
+    recebidas: int
+    suprimidas: int
+    contabilizadas: int
+    duplicadas: int
+    em_quarentena: int
+    fora_da_zona: int
+    codigos_desconhecidos: list[str]
+
+    @classmethod
+    def from_resultado(cls, resultado: "ResultadoLeituras"):
+        em_quarentena = sum(resultado.quarentena.values())
+        return cls(
+            recebidas=resultado.recebidas,
+            suprimidas=resultado.suprimidas,
+            contabilizadas=resultado.contabilizadas,
+            duplicadas=resultado.recebidas
+            - resultado.suprimidas
+            - resultado.contabilizadas
+            - em_quarentena
+            - resultado.fora_da_zona,
+            em_quarentena=em_quarentena,
+            fora_da_zona=resultado.fora_da_zona,
+            codigos_desconhecidos=sorted(resultado.quarentena),
+        )
+
+
+class ConferenciaLeituraOut(ConferenciaMinimalOut):
+    """Conferência após um envio de leituras; `resumo` fica nulo no reenvio de uma chave já aplicada."""
+
+    resumo: ResumoLeiturasOut | None = None
+
+
+class QuarentenaOut(BaseModel):
+    """Código de produto desconhecido em quarentena e quantas tags aguardam por ele."""
+
+    codigo_produto: str
+    tags: int
+
+
+# Cabeçalho opcional dos envios de leituras e eventos; um reenvio com a mesma chave não grava de novo
+ChaveIdempotencia = Annotated[
+    str | None,
+    Header(alias="Idempotency-Key", max_length=128, description="Chave única do lote para reenvios seguros"),
+]
+
+
+class LeituraEnfileiradaOut(BaseModel):
+    """Resposta de um lote aceito para gravação assíncrona."""
+
+    conferencia_id: int
+    sequencia: int
+
+
+class IngestaoProgressoOut(BaseModel):
+    """Progresso da gravação dos lotes aceitos de forma assíncrona por este worker."""
+
+    conferencia_id: int
+    sequencia_recebida: int
+    sequencia_aplicada: int
+    lotes_pendentes: int
+    lotes_rejeitados: int
+    lotes_falhos: int
+    leituras_em_quarentena: int
+
+
+class StreamAckOut(BaseModel):
+    """Confirmação enviada pelo stream WebSocket após gravar cada micro-lote."""
+
+    lote: int
+    leituras_recebidas: int
+    leituras_processadas: int
+    leituras_suprimidas: int = 0
+    leituras_em_quarentena: int = 0
+    erro: str | None = None
+
+
 class LeituraFilter:
     pass
@@ -0,0 +1,76 @@
+from pydantic import BaseModel
+
+
+class EstatisticasCache(BaseModel):
+    """Contadores de um cache em memória do worker."""
+
+    acertos: int
+    falhas: int
+    itens: int
+
+
+class EstatisticasTagsVistas(BaseModel):
+    """Conjuntos de tags já gravadas, mantidos por conferência."""
+
+    conferencias: int
+    tags: int
+    descartadas: int
+
+
+class EstatisticasDebounce(BaseModel):
+    """Janela de debounce de leituras repetidas, aplicada antes da gravação."""
+
+    janela_ms: int
+    tags: int
+    aceitas: int
+    suprimidas: int
+
+
+class EstatisticasContadores(BaseModel):
+    """Contadores write-behind das quantidades de leitura."""
+
+    ativo: bool
+    pendentes: int
+    descargas: int
+    linhas_descarregadas: int
+
+
+class EstatisticasSenhas(BaseModel):
+    """Pool de processos do bcrypt usado no login e no cadastro de usuários."""
+
+    processos: int
+    pendentes: int
+    max_pendentes: int
+    rejeitadas: int
+
+
+class EstatisticasLimiteAutenticacao(BaseModel):
+    """Limites de tentativas de login e refresh por IP e por username."""
+
+    ativo: bool
+    ips: int
+    usernames: int
+    rejeitadas_ip: int
+    rejeitadas_username: int
+
+
+class EstatisticasVersoesTokens(BaseModel):
+    """Mapa de versões de token dos usuários com tokens revogados."""
+
+    usuarios: int
+    rejeitados: int
+
+
+class DiagnosticoOut(BaseModel):
+    """Estado dos caches e estruturas em memória do worker que atendeu a requisição."""
+
+    catalogo_pecas: EstatisticasCache
+    estado_conferencias: EstatisticasCache
+    principais: EstatisticasCache
+    tokens_verificados: EstatisticasCache
+    versoes_tokens: EstatisticasVersoesTokens
+    tags_vistas: EstatisticasTagsVistas
+    debounce: EstatisticasDebounce
+    contadores_leitura: EstatisticasContadores
+    senhas: EstatisticasSenhas
+    limite_autenticacao: EstatisticasLimiteAutenticacao
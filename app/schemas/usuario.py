@@ -1,7 +1,7 @@
 import datetime
 from enum import StrEnum
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 
 class RoleEnum(StrEnum):
@@ -27,6 +27,17 @@ class UsuarioOut(UsuarioBase):
         from_attributes = True
 
 
+class Principal(BaseModel):
+    """Usuário autenticado de uma requisição, sem o hash da senha; é o que fica no cache de principais."""
+
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+
+    id: int
+    username: str
+    role: RoleEnum
+    is_active: bool
+
+
 class RefreshTokenRequest(BaseModel):
     refresh_token: str
 
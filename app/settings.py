@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -14,9 +16,61 @@ class AppSettings(BaseSettings):
     POSTGRES_PORT: int = 5432
     POSTGRES_DB: str = "estoque"
     JWT_ALGORITHM: str = "HS256"
+    # Implementação de encode/decode dos tokens: python-jose ou HMAC só com a biblioteca padrão
+    JWT_CODEC: Literal["jose", "hmac"] = "jose"
     JWT_SECRET: str
     JWT_ACCESS_EXPIRE_MINUTES: int = 60  # Uma hora
     JWT_REFRESH_EXPIRE_DAYS: int = 7  # Uma semana
+    # Payloads de tokens já verificados, reaproveitados até o exp do token (LRU por worker)
+    JWT_CACHE_ATIVO: bool = True
+    JWT_CACHE_CAPACIDADE: int = 10_000
+    # Pool de processos do bcrypt (login e cadastro); acima de SENHAS_MAX_PENDENTES o login responde 503
+    SENHAS_PROCESSOS: int = 2
+    SENHAS_MAX_PENDENTES: int = 32
+    # Limite de tentativas em /auth/login e /auth/refresh (GCRA em memória, por worker); excedido responde 429
+    LIMITE_AUTH_ATIVO: bool = True
+    LIMITE_AUTH_IP_POR_MINUTO: int = 60
+    LIMITE_AUTH_IP_RAJADA: int = 30
+    LIMITE_AUTH_USERNAME_POR_MINUTO: int = 20
+    LIMITE_AUTH_USERNAME_RAJADA: int = 10
+    LIMITE_AUTH_CORPO_MAXIMO_BYTES: int = 8 * 1024  # Corpo lido pelo limitador; acima disso responde 413
+    # Usuário autenticado (id, role, ativo) guardado por username; mudanças invalidam na hora
+    PRINCIPAL_CACHE_TTL_SEGUNDOS: float = 60.0
+    # Escuta LISTEN/NOTIFY do Postgres para invalidar caches entre workers
+    NOTIFICACOES_ATIVAS: bool = True
+
+    CATALOGO_CACHE_TTL_SEGUNDOS: int = 300  # Recarrega o catálogo de peças a cada 5 minutos
+    # Por quanto tempo um worker confia no status em cache de uma conferência em andamento
+    ESTADO_CONFERENCIA_TTL_SEGUNDOS: float = 2.0
+    ESTADO_CONFERENCIA_CACHE_CAPACIDADE: int = 1000  # Conferências com estado em cache (LRU por worker)
+    DEBOUNCE_JANELA_MS: int = 2000  # Leituras repetidas da mesma tag nessa janela são descartadas (0 desliga)
+    LIMPEZA_TAGS_ATIVA: bool = True  # Descarta em segundo plano as tags de conferências encerradas
+    # Por quanto tempo as tags de uma conferência encerrada são mantidas: lotes aceitos antes do
+    # encerramento que ainda estejam na fila de outros workers são gravados dentro desse prazo
+    LIMPEZA_TAGS_CARENCIA_SEGUNDOS: int = 300
+    # Quantidades de leitura somadas em memória e gravadas em conjunto a cada intervalo (write-behind).
+    # As tags são commitadas antes das quantidades: se o worker cair, o que ainda estava em memória
+    # (até CONTADORES_INTERVALO_MS de leituras) se perde e a conferência fica com quantidades abaixo das
+    # tags, sem recuperação. As consultas só são exatas com um único worker; com vários, as quantidades
+    # dos outros aparecem em até um intervalo. Desligado por padrão por isso (ver `ContadoresLeitura`)
+    CONTADORES_WRITE_BEHIND_ATIVO: bool = False
+    CONTADORES_INTERVALO_MS: int = 500
+    CONTADORES_FATIAS: int = 16
+
+    # Fila de ingestão assíncrona (POST /conferencia/{id}/leitura?assincrono=true)
+    INGESTAO_FILA_ESCRITOR_ATIVO: bool = True
+    INGESTAO_FILA_LEITURAS_POR_TRANSACAO: int = 5000
+    INGESTAO_FILA_INTERVALO_MS: int = 200
+    INGESTAO_FILA_MAX_LEITURAS_PENDENTES: int = 200_000
+    INGESTAO_FILA_MAX_TENTATIVAS: int = 5  # Um lote que falha todas as vezes vai para `lote_falho`
+    INGESTAO_NDJSON_LINHAS_POR_LOTE: int = 2000  # Leituras gravadas por transação em envios NDJSON e binários
+    # Tamanho máximo de um envio de leituras (JSON, NDJSON ou binário) e de uma linha NDJSON; acima, 413
+    INGESTAO_CORPO_MAXIMO_BYTES: int = 64 * 1024 * 1024
+    INGESTAO_NDJSON_LINHA_MAXIMA_BYTES: int = 4096
+
+    # Micro-lotes do stream WebSocket (/conferencia/{id}/stream)
+    STREAM_LEITURAS_POR_LOTE: int = 500
+    STREAM_INTERVALO_MS: int = 250
 
     model_config: SettingsConfigDict = {
         "env_file": ".env",
@@ -0,0 +1 @@
+"""Benchmarks do caminho de ingestão, executados contra um banco local (ver bench/README.md)."""
@@ -0,0 +1,68 @@
+"""
+Tokens por segundo de `create_access_token`, `create_refresh_token` e `verify_token` com cada codec
+JWT (`JWT_CODEC`). A verificação é medida com o cache de tokens verificados desligado, para comparar o
+custo do decode. Não usa banco.
+
+    python -m bench.codec_jwt --codecs jose --codecs hmac --chamadas 20000
+"""
+
+import json
+import time
+from typing import Annotated
+
+import typer
+
+import app.auth
+from app.auth import create_access_token, create_refresh_token, verify_token
+from app.core.jwt_codec import CODECS, criar_codec
+from app.settings import app_settings
+
+cli = typer.Typer(pretty_exceptions_show_locals=False)
+
+
+def medir(operacao, chamadas: int) -> float:
+    inicio = time.perf_counter()
+    for i in range(chamadas):
+        operacao(i)
+    return time.perf_counter() - inicio
+
+
+@cli.command()
+def main(
+    codecs: Annotated[list[str], typer.Option(help="Codecs medidos")] = list(CODECS),
+    chamadas: Annotated[int, typer.Option(help="Chamadas por operação")] = 20_000,
+):
+    """Imprime uma linha JSON por codec e operação."""
+    if desconhecidos := set(codecs) - set(CODECS):
+        raise typer.BadParameter(f"Codecs desconhecidos: {', '.join(sorted(desconhecidos))}")
+    codec_original, cache_ativo = app.auth.codec_jwt, app_settings.JWT_CACHE_ATIVO
+    app_settings.JWT_CACHE_ATIVO = False
+    try:
+        for nome in codecs:
+            app.auth.codec_jwt = criar_codec(nome, app_settings.JWT_SECRET, app_settings.JWT_ALGORITHM)
+            claims = {"sub": "bench", "role": "stockist", "uid": 1, "ver": 0}
+            tokens = [create_access_token(data=claims)[0] for _ in range(100)]
+            operacoes = {
+                "create_access_token": lambda i: create_access_token(data=claims),
+                "create_refresh_token": lambda i: create_refresh_token(data={"sub": "bench"}),
+                "verify_token": lambda i: verify_token(tokens[i % len(tokens)]),
+            }
+            for operacao, funcao in operacoes.items():
+                duracao = medir(funcao, chamadas)
+                print(
+                    json.dumps(
+                        {
+                            "codec": nome,
+                            "operacao": operacao,
+                            "chamadas": chamadas,
+                            "tokens_por_segundo": round(chamadas / duracao),
+                            "us_por_chamada": round(duracao / chamadas * 1_000_000, 2),
+                        }
+                    )
+                )
+    finally:
+        app.auth.codec_jwt, app_settings.JWT_CACHE_ATIVO = codec_original, cache_ativo
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,75 @@
+"""
+Vazão do caminho com `COPY` (`registrar_leituras_via_copy`) comparada ao motor em lote
+(`registrar_leituras_em_conferencia`) para uploads grandes, como a sincronização de um backlog offline.
+
+    python -m bench.copy_vs_lote --tamanhos 10000 --tamanhos 50000
+"""
+
+import json
+import time
+from typing import Annotated
+
+import typer
+
+from app.crud.conferencia import registrar_leituras_em_conferencia, registrar_leituras_via_copy
+from app.settings import app_settings
+from bench.dados import (
+    abrir_sessao,
+    conferir_contagem,
+    gerar_lote,
+    limpar_dados,
+    nova_conferencia,
+    novo_prefixo,
+    preparar_dados,
+)
+
+cli = typer.Typer(pretty_exceptions_show_locals=False)
+
+METODOS = {
+    "lote": registrar_leituras_em_conferencia,
+    "copy": registrar_leituras_via_copy,
+}
+
+
+@cli.command()
+def main(
+    url: Annotated[str, typer.Option(help="URL SQLAlchemy do banco")] = app_settings.POSTGRES_URL,
+    tamanhos: Annotated[list[int], typer.Option(help="Tamanhos de upload medidos")] = [10_000, 50_000],
+    produtos: Annotated[int, typer.Option(help="Produtos distintos no catálogo")] = 500,
+):
+    """Envia o mesmo volume pelos dois caminhos e imprime uma linha JSON por método e tamanho."""
+    session = abrir_sessao(url)
+    dialeto = session.get_bind().dialect.name
+    prefixo = novo_prefixo()
+    usuario, pecas = preparar_dados(session, prefixo, produtos)
+    conferencia_ids = []
+    try:
+        for tamanho in tamanhos:
+            for rodada, (metodo, registrar) in enumerate(METODOS.items()):
+                conferencia = nova_conferencia(session, usuario)
+                conferencia_ids.append(conferencia.id)
+
+                lote = gerar_lote(prefixo, pecas, tamanho, rodada)
+                inicio = time.perf_counter()
+                registrar(session, conferencia.id, lote)
+                duracao = time.perf_counter() - inicio
+                conferir_contagem(session, conferencia.id)
+
+                print(
+                    json.dumps(
+                        {
+                            "metodo": metodo,
+                            "dialeto": dialeto,
+                            "leituras": tamanho,
+                            "duracao_s": round(duracao, 3),
+                            "leituras_por_segundo": round(tamanho / duracao),
+                        }
+                    )
+                )
+    finally:
+        limpar_dados(session, prefixo, conferencia_ids)
+        session.close()
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,141 @@
+"""Criação e remoção dos dados sintéticos usados pelos benchmarks."""
+
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, delete, func, select, update
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.limpeza_tags import limpeza_tags
+from app.crud.conferencia import criar_particao_tags
+from app.models.base import Base
+from app.models.conferencia import Conferencia, Leitura, StatusConferencia, TagLida
+from app.models.peca import Peca
+from app.models.usuario import Usuario
+from app.schemas.conferencia import LeituraCreate
+from app.schemas.usuario import RoleEnum
+
+
+def abrir_sessao(url: str) -> Session:
+    engine = create_engine(url)
+    if engine.dialect.name == "sqlite":
+        Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)()
+
+
+def novo_prefixo() -> str:
+    return f"bench-{uuid.uuid4().hex[:8]}"
+
+
+def preparar_dados(session: Session, prefixo: str, quantidade_produtos: int) -> tuple[Usuario, list[Peca]]:
+    usuario = Usuario(username=prefixo, password_hash="-", role=RoleEnum.stockist)
+    session.add(usuario)
+    session.flush()
+    pecas = [
+        Peca(
+            nome=f"Peça {i}",
+            codigo_produto=f"{prefixo}-{i:05d}",
+            descricao="Peça de benchmark",
+            # As conferências do benchmark são da zona `prefixo` e só contam peças dessa localização
+            localizacao=prefixo,
+            created_by=usuario.id,
+        )
+        for i in range(quantidade_produtos)
+    ]
+    session.add_all(pecas)
+    session.commit()
+    return usuario, pecas
+
+
+def nova_conferencia(session: Session, usuario: Usuario) -> Conferencia:
+    # Zona própria do benchmark (o username é o prefixo das peças), para não conflitar com conferências
+    # reais; a conferência anterior da execução é encerrada, já que só uma por zona fica em andamento
+    zona = usuario.username
+    session.execute(
+        update(Conferencia)
+        .where(Conferencia.zona == zona, Conferencia.status == StatusConferencia.INICIADA)
+        .values(status=StatusConferencia.FINALIZADA, finalizada_em=datetime.now(timezone.utc))
+    )
+    conferencia = Conferencia(id_funcionario=usuario.id, zona=zona)
+    session.add(conferencia)
+    session.flush()
+    criar_particao_tags(session, conferencia.id)
+    session.commit()
+    return conferencia
+
+
+def conferir_contagem(session: Session, conferencia_id: int):
+    """Falha se a medição não contou nenhuma tag, o que indicaria um benchmark medindo um no-op."""
+    session.commit()
+    contadas = session.scalar(
+        select(func.count()).select_from(TagLida).where(TagLida.conferencia_id == conferencia_id)
+    )
+    if not contadas:
+        raise RuntimeError(f"Nenhuma leitura contabilizada na conferência {conferencia_id}; medição inválida")
+
+
+def limpar_dados(session: Session, prefixo: str, conferencia_ids: list[int]):
+    session.execute(delete(Leitura).where(Leitura.conferencia_id.in_(conferencia_ids)))
+    session.execute(delete(TagLida).where(TagLida.conferencia_id.in_(conferencia_ids)))
+    session.execute(delete(Conferencia).where(Conferencia.id.in_(conferencia_ids)))
+    session.execute(delete(Peca).where(Peca.codigo_produto.like(f"{prefixo}-%")))
+    session.execute(delete(Usuario).where(Usuario.username == prefixo))
+    session.commit()
+    # Remove as partições de `tag_lida` que ficaram sem conferência
+    limpeza_tags.limpar(session)
+
+
+def gerar_lote(prefixo: str, pecas: list[Peca], tamanho: int, rodada: int) -> list[LeituraCreate]:
+    agora = datetime.now(timezone.utc)
+    return [
+        LeituraCreate(
+            codigo_produto=pecas[i % len(pecas)].codigo_produto,
+            rfid_etiqueta=f"{prefixo}-{tamanho}-{rodada}-{i}",
+            lido_em=agora,
+        )
+        for i in range(tamanho)
+    ]
+
+
+def gerar_trafego(
+    prefixo: str,
+    pecas: list[Peca],
+    quantidade_tags: int,
+    proporcao_duplicadas: float,
+    tamanho_lote: int,
+    quantidade_lotes: int,
+    intervalo_ms: int,
+    semente: int = 0,
+) -> list[list[LeituraCreate]]:
+    """
+    Simula o tráfego de leitores: `quantidade_tags` etiquetas distribuídas entre as peças e lidas
+    em lotes, com `lido_em` avançando `intervalo_ms` a cada leitura. Uma fração
+    `proporcao_duplicadas` das leituras repete uma etiqueta já lida; quando todas as etiquetas já
+    foram lidas, as leituras seguintes são todas repetições.
+    """
+    aleatorio = random.Random(semente)
+    etiquetas = [f"{prefixo}-T{i:07d}" for i in range(quantidade_tags)]
+    lidas = 0
+    momento = datetime.now(timezone.utc)
+    passo = timedelta(milliseconds=intervalo_ms)
+
+    lotes = []
+    for _ in range(quantidade_lotes):
+        lote = []
+        for _ in range(tamanho_lote):
+            if lidas < quantidade_tags and (lidas == 0 or aleatorio.random() >= proporcao_duplicadas):
+                indice = lidas
+                lidas += 1
+            else:
+                indice = aleatorio.randrange(lidas)
+            lote.append(
+                LeituraCreate(
+                    codigo_produto=pecas[indice % len(pecas)].codigo_produto,
+                    rfid_etiqueta=etiquetas[indice],
+                    lido_em=momento,
+                )
+            )
+            momento += passo
+        lotes.append(lote)
+    return lotes
@@ -0,0 +1,85 @@
+"""
+Bytes trafegados e custo de parse do formato binário (`app.core.leitura_binaria`) comparados ao
+corpo JSON do endpoint de leitura. Não usa banco: mede só a decodificação até `LeituraCreate`.
+
+    python -m bench.formato_binario --tamanhos 500 --tamanhos 5000
+"""
+
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Annotated
+
+import typer
+
+from app.core import leitura_binaria
+from app.core.formatos_leitura import leituras_json
+from app.schemas.conferencia import LeituraCreate
+
+cli = typer.Typer(pretty_exceptions_show_locals=False)
+
+
+def gerar_leituras(tamanho: int, produtos: int) -> list[tuple[str, str, datetime]]:
+    inicio = datetime.now(timezone.utc)
+    return [
+        (f"E2000017221101{i:010X}", f"PROD-{i % produtos:05d}", inicio + timedelta(milliseconds=7 * i))
+        for i in range(tamanho)
+    ]
+
+
+def decodificar_binario(corpo: bytes) -> list[LeituraCreate]:
+    # Mesmo caminho de `app.core.formatos_leitura`: registros decodificados e validados em um lote
+    return leituras_json.validate_python(
+        [
+            {"rfid_etiqueta": etiqueta, "codigo_produto": codigo, "lido_em": lido_em}
+            for etiqueta, codigo, lido_em in leitura_binaria.decodificar(corpo)
+        ]
+    )
+
+
+def medir(funcao, corpo: bytes, rodadas: int) -> float:
+    inicio = time.perf_counter()
+    for _ in range(rodadas):
+        funcao(corpo)
+    return (time.perf_counter() - inicio) / rodadas
+
+
+@cli.command()
+def main(
+    tamanhos: Annotated[list[int], typer.Option(help="Leituras por lote")] = [500, 5000],
+    produtos: Annotated[int, typer.Option(help="Produtos distintos por lote")] = 50,
+    rodadas: Annotated[int, typer.Option(help="Decodificações por medição")] = 50,
+):
+    """Imprime uma linha JSON por formato e tamanho de lote."""
+    for tamanho in tamanhos:
+        leituras = gerar_leituras(tamanho, produtos)
+        corpos = {
+            "json": (
+                json.dumps(
+                    [
+                        {"codigo_produto": codigo, "rfid_etiqueta": etiqueta, "lido_em": lido_em.isoformat()}
+                        for etiqueta, codigo, lido_em in leituras
+                    ]
+                ).encode(),
+                leituras_json.validate_json,
+            ),
+            "binario": (leitura_binaria.codificar(leituras), decodificar_binario),
+        }
+        for formato, (corpo, decodificar) in corpos.items():
+            duracao = medir(decodificar, corpo, rodadas)
+            print(
+                json.dumps(
+                    {
+                        "formato": formato,
+                        "leituras": tamanho,
+                        "bytes": len(corpo),
+                        "bytes_por_leitura": round(len(corpo) / tamanho, 1),
+                        "parse_ms": round(duracao * 1000, 3),
+                        "leituras_por_segundo": round(tamanho / duracao),
+                    }
+                )
+            )
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,132 @@
+"""
+Custo de `get_metricas_gerais` (GET /relatorios/metricas) com milhares de conferências. Compara a
+consulta agregada única com a abordagem anterior (contagens separadas, conferências finalizadas
+carregadas em Python e uma rodada de consultas por funcionário), reproduzida aqui como referência.
+
+    python -m bench.metricas --conferencias 5000 --conferencias 20000 --funcionarios 50
+
+As conferências do benchmark ficam em 2001, e as medições filtram esse período para não misturar os
+dados do banco de desenvolvimento.
+"""
+
+import json
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import Annotated
+
+import typer
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+
+from app.crud.relatorio import calcular_duracao_minutos, get_metricas_gerais
+from app.models.conferencia import Conferencia, StatusConferencia
+from app.models.usuario import Usuario
+from app.schemas.relatorio import DashboardFilters
+from app.schemas.usuario import RoleEnum
+from app.settings import app_settings
+from bench.dados import abrir_sessao, novo_prefixo
+from bench.trafego import ContadorConsultas
+
+cli = typer.Typer(pretty_exceptions_show_locals=False)
+
+PERIODO = DashboardFilters(data_inicio=datetime(2001, 1, 1), data_fim=datetime(2001, 12, 31))
+
+
+def preparar(session: Session, prefixo: str, conferencias: int, funcionarios: int) -> list[int]:
+    ids_funcionarios = []
+    for i in range(funcionarios):
+        usuario = Usuario(username=f"{prefixo}-f{i}", password_hash="-", role=RoleEnum.stockist)
+        session.add(usuario)
+        session.flush()
+        ids_funcionarios.append(usuario.id)
+
+    aleatorio = random.Random(0)
+    status = [StatusConferencia.FINALIZADA] * 8 + [StatusConferencia.CANCELADA]
+    inicio = datetime(2001, 1, 1)
+    linhas = []
+    for i in range(conferencias):
+        iniciada_em = inicio + timedelta(minutes=aleatorio.randrange(360 * 24 * 60))
+        situacao = aleatorio.choice(status)
+        linhas.append(
+            {
+                "id_funcionario": aleatorio.choice(ids_funcionarios),
+                "status": situacao,
+                "zona": f"{prefixo}-{i}",
+                "iniciada_em": iniciada_em,
+                "finalizada_em": iniciada_em + timedelta(minutes=aleatorio.randrange(5, 240))
+                if situacao == StatusConferencia.FINALIZADA
+                else None,
+            }
+        )
+    ids = list(session.scalars(insert(Conferencia).returning(Conferencia.id), linhas))
+    session.commit()
+    return ids
+
+
+def metricas_n_mais_1(db: Session, filters: DashboardFilters):
+    """A implementação anterior de `get_metricas_gerais`, mantida aqui só como referência de custo."""
+    periodo = Conferencia.iniciada_em.between(filters.data_inicio, filters.data_fim)
+    consulta = db.query(Conferencia).filter(periodo)
+    for situacao in (None, *StatusConferencia):
+        (consulta.filter(Conferencia.status == situacao) if situacao else consulta).count()
+    finalizadas = consulta.filter(
+        Conferencia.status == StatusConferencia.FINALIZADA, Conferencia.finalizada_em.isnot(None)
+    ).all()
+    [calcular_duracao_minutos(c.iniciada_em, c.finalizada_em) for c in finalizadas]
+    for (funcionario_id,) in consulta.with_entities(Conferencia.id_funcionario).group_by(
+        Conferencia.id_funcionario
+    ):
+        db.query(Usuario).filter(Usuario.id == funcionario_id).first()
+        db.query(Conferencia).filter(Conferencia.id_funcionario == funcionario_id, periodo).all()
+
+
+@cli.command()
+def main(
+    url: Annotated[str, typer.Option(help="URL SQLAlchemy do banco")] = app_settings.POSTGRES_URL,
+    conferencias: Annotated[list[int], typer.Option(help="Conferências no período medido")] = [5000, 20000],
+    funcionarios: Annotated[
+        int, typer.Option(help="Funcionários entre os quais as conferências se dividem")
+    ] = 50,
+    rodadas: Annotated[int, typer.Option(help="Execuções por medição")] = 5,
+):
+    """Imprime uma linha JSON por quantidade de conferências e implementação."""
+    session = abrir_sessao(url)
+    dialeto = session.get_bind().dialect.name
+    contador = ContadorConsultas(session)
+    implementacoes = {"agregada": get_metricas_gerais, "n_mais_1": metricas_n_mais_1}
+    for quantidade in conferencias:
+        prefixo = novo_prefixo()
+        ids = preparar(session, prefixo, quantidade, funcionarios)
+        try:
+            for nome, implementacao in implementacoes.items():
+                latencias = []
+                antes = contador.total
+                for _ in range(rodadas):
+                    inicio = time.perf_counter()
+                    implementacao(session, PERIODO)
+                    latencias.append((time.perf_counter() - inicio) * 1000)
+                    session.expunge_all()
+                print(
+                    json.dumps(
+                        {
+                            "implementacao": nome,
+                            "dialeto": dialeto,
+                            "conferencias": quantidade,
+                            "funcionarios": funcionarios,
+                            "mediana_ms": round(statistics.median(latencias), 3),
+                            "consultas": (contador.total - antes) // rodadas,
+                        }
+                    )
+                )
+        finally:
+            session.rollback()
+            session.execute(delete(Conferencia).where(Conferencia.id.in_(ids)))
+            session.execute(delete(Usuario).where(Usuario.username.like(f"{prefixo}-f%")))
+            session.commit()
+    session.close()
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,167 @@
+"""
+Latência da ingestão de leituras durante uma tempestade de logins (troca de turno). Um coletor envia
+lotes para `POST /conferencia/{id}/leitura` enquanto `--logins` operadores fazem login ao mesmo tempo,
+em ondas, pela aplicação ASGI (sem servidor HTTP).
+
+    python -m bench.tempestade_login --logins 60 --lotes 50 --modos sem_login --modos threadpool --modos pool
+
+Modos: `sem_login` é a referência; `threadpool` calcula o bcrypt nas threads do Starlette, como antes
+do pool (`SENHAS_PROCESSOS=0`); `pool` usa o pool de processos com `--processos`.
+"""
+
+import asyncio
+import json
+import time
+from typing import Annotated
+
+import httpx
+import typer
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.auth import create_access_token, dados_do_token
+from app.core.debounce import debounce_leituras
+from app.core.senhas import pool_senhas
+from app.database import get_db
+from app.main import app
+from app.settings import app_settings
+from bench.dados import (
+    abrir_sessao,
+    conferir_contagem,
+    gerar_lote,
+    limpar_dados,
+    nova_conferencia,
+    novo_prefixo,
+    preparar_dados,
+)
+from bench.trafego import percentis
+
+cli = typer.Typer(pretty_exceptions_show_locals=False)
+
+SENHA = "bench-senha"
+
+
+async def ingerir(cliente: httpx.AsyncClient, conferencia_id: int, token: str, lotes) -> list[float]:
+    latencias = []
+    for lote in lotes:
+        corpo = [leitura.model_dump(mode="json") for leitura in lote]
+        inicio = time.perf_counter()
+        resposta = await cliente.post(
+            f"/conferencia/{conferencia_id}/leitura", json=corpo, headers={"Authorization": f"Bearer {token}"}
+        )
+        latencias.append((time.perf_counter() - inicio) * 1000)
+        resposta.raise_for_status()
+    return latencias
+
+
+async def logar(cliente: httpx.AsyncClient, username: str, logins: int, fim: asyncio.Event) -> dict[int, int]:
+    """Dispara ondas de `logins` logins simultâneos até a ingestão terminar."""
+    respostas: dict[int, int] = {}
+    while not fim.is_set():
+        onda = await asyncio.gather(
+            *(
+                cliente.post("/auth/login", data={"username": username, "password": SENHA})
+                for _ in range(logins)
+            )
+        )
+        for resposta in onda:
+            respostas[resposta.status_code] = respostas.get(resposta.status_code, 0) + 1
+    return respostas
+
+
+async def medir(session: Session, username: str, conferencia_id: int, token: str, lotes, logins: int | None):
+    fabrica = sessionmaker(bind=session.get_bind(), autocommit=False, autoflush=False)
+
+    def sessao_do_benchmark():
+        db = fabrica()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = sessao_do_benchmark
+    try:
+        transporte = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transporte, base_url="http://bench", timeout=120) as cliente:
+            fim = asyncio.Event()
+            tempestade = asyncio.create_task(logar(cliente, username, logins, fim)) if logins else None
+            try:
+                latencias = await ingerir(cliente, conferencia_id, token, lotes)
+            finally:
+                fim.set()
+            return latencias, (await tempestade if tempestade else {})
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+
+
+@cli.command()
+def main(
+    url: Annotated[str, typer.Option(help="URL SQLAlchemy do banco")] = app_settings.POSTGRES_URL,
+    logins: Annotated[int, typer.Option(help="Logins simultâneos por onda")] = 60,
+    processos: Annotated[int, typer.Option(help="Processos do pool de senhas no modo pool")] = 2,
+    tamanho: Annotated[int, typer.Option(help="Leituras por lote")] = 200,
+    lotes: Annotated[int, typer.Option(help="Lotes enviados por modo")] = 50,
+    modos: Annotated[list[str], typer.Option(help="sem_login, threadpool e/ou pool")] = [
+        "sem_login",
+        "threadpool",
+        "pool",
+    ],
+):
+    """Imprime uma linha JSON por modo com a latência da ingestão e o resultado dos logins."""
+    if desconhecidos := set(modos) - {"sem_login", "threadpool", "pool"}:
+        raise typer.BadParameter(f"Modos desconhecidos: {', '.join(sorted(desconhecidos))}")
+    # A tempestade vem de um só IP e username: sem desligar o limite, quase todos os logins levariam 429
+    app_settings.LIMITE_AUTH_ATIVO = False
+    session = abrir_sessao(url)
+    prefixo = novo_prefixo()
+    usuario, pecas = preparar_dados(session, prefixo, 50)
+    usuario.password_hash = pool_senhas.gerar_hash(SENHA)
+    session.commit()
+    token, _ = create_access_token(data=dados_do_token(usuario))
+    conferencia_ids = []
+    try:
+        for modo in modos:
+            pool_senhas.parar()
+            pool_senhas.processos = processos if modo == "pool" else 0
+            # Sobe os processos antes da medição, para não contar o spawn
+            pool_senhas.verificar(SENHA, usuario.password_hash)
+            conferencia = nova_conferencia(session, usuario)
+            conferencia_ids.append(conferencia.id)
+            debounce_leituras.limpar()
+            trafego = [gerar_lote(prefixo, pecas, tamanho, rodada) for rodada in range(lotes)]
+
+            inicio = time.perf_counter()
+            latencias, respostas = asyncio.run(
+                medir(
+                    session,
+                    usuario.username,
+                    conferencia.id,
+                    token,
+                    trafego,
+                    logins if modo != "sem_login" else None,
+                )
+            )
+            duracao = time.perf_counter() - inicio
+            conferir_contagem(session, conferencia.id)
+            print(
+                json.dumps(
+                    {
+                        "modo": modo,
+                        "processos": pool_senhas.processos,
+                        "logins_por_onda": logins if modo != "sem_login" else 0,
+                        "tamanho_lote": tamanho,
+                        "lotes": lotes,
+                        **percentis(latencias),
+                        "leituras_por_segundo": round(tamanho * lotes / duracao),
+                        "logins_aceitos": respostas.get(200, 0),
+                        "logins_rejeitados_503": respostas.get(503, 0),
+                    }
+                )
+            )
+    finally:
+        pool_senhas.parar()
+        limpar_dados(session, prefixo, conferencia_ids)
+        session.close()
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,62 @@
+"""
+Custo de `verify_token` com e sem o cache de tokens verificados (`JWT_CACHE_ATIVO`). Não usa banco:
+gera tokens de acesso distintos e os verifica em rodízio, como coletores reaproveitando seus tokens.
+
+    python -m bench.tokens --tokens 1 --tokens 100 --chamadas 20000
+"""
+
+import json
+import time
+from typing import Annotated
+
+import typer
+
+from app.auth import create_access_token, verify_token
+from app.core.tokens_verificados import tokens_verificados
+from app.settings import app_settings
+
+cli = typer.Typer(pretty_exceptions_show_locals=False)
+
+
+def medir(tokens: list[str], chamadas: int) -> float:
+    inicio = time.perf_counter()
+    for i in range(chamadas):
+        verify_token(tokens[i % len(tokens)])
+    return (time.perf_counter() - inicio) / chamadas
+
+
+@cli.command()
+def main(
+    tokens: Annotated[list[int], typer.Option(help="Tokens distintos verificados em rodízio")] = [1, 100],
+    chamadas: Annotated[int, typer.Option(help="Verificações por medição")] = 20_000,
+):
+    """Imprime uma linha JSON por quantidade de tokens e modo (com e sem cache)."""
+    ativo = app_settings.JWT_CACHE_ATIVO
+    try:
+        for quantidade in tokens:
+            gerados = [
+                create_access_token(data={"sub": f"bench-{i}", "role": "stockist", "uid": i, "ver": 0})[0]
+                for i in range(quantidade)
+            ]
+            for cache in (False, True):
+                app_settings.JWT_CACHE_ATIVO = cache
+                tokens_verificados.limpar()
+                duracao = medir(gerados, chamadas)
+                print(
+                    json.dumps(
+                        {
+                            "cache": cache,
+                            "tokens": quantidade,
+                            "chamadas": chamadas,
+                            "us_por_chamada": round(duracao * 1_000_000, 2),
+                            "chamadas_por_segundo": round(1 / duracao),
+                            **({"acertos": tokens_verificados.estatisticas()["acertos"]} if cache else {}),
+                        }
+                    )
+                )
+    finally:
+        app_settings.JWT_CACHE_ATIVO = ativo
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,168 @@
+"""
+Tráfego sintético de leitores contra o caminho de ingestão: N produtos, M etiquetas, uma proporção
+de leituras repetidas e lotes de tamanho configurável. Mede o motor em lote
+(`registrar_leituras_em_conferencia`) chamado diretamente e o endpoint `POST /conferencia/{id}/leitura`
+pela aplicação ASGI, sem servidor HTTP, com a mesma sessão de banco.
+
+    python -m bench.trafego --produtos 200 --tags 20000 --duplicadas 0.3 --tamanhos 100 --tamanhos 1000
+
+Pelo endpoint as leituras passam também pelo debounce (`DEBOUNCE_JANELA_MS`); `--intervalo-ms`
+controla o espaçamento do `lido_em` entre leituras consecutivas.
+"""
+
+import asyncio
+import json
+import statistics
+import time
+from typing import Annotated
+
+import httpx
+import typer
+from sqlalchemy import event
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.auth import create_access_token, dados_do_token
+from app.core.debounce import debounce_leituras
+from app.crud.conferencia import registrar_leituras_em_conferencia
+from app.database import get_db
+from app.main import app
+from app.settings import app_settings
+from bench.dados import (
+    abrir_sessao,
+    conferir_contagem,
+    gerar_trafego,
+    limpar_dados,
+    nova_conferencia,
+    novo_prefixo,
+    preparar_dados,
+)
+
+cli = typer.Typer(pretty_exceptions_show_locals=False)
+
+
+class ContadorConsultas:
+    """Conta os comandos SQL enviados ao banco pelo engine da sessão."""
+
+    def __init__(self, session: Session):
+        self.total = 0
+        event.listen(session.get_bind(), "before_cursor_execute", self._contar)
+
+    def _contar(self, *args):
+        self.total += 1
+
+
+def percentis(latencias: list[float]) -> dict[str, float]:
+    if len(latencias) < 2:
+        return {f"p{p}_ms": round(latencias[0], 3) for p in (50, 95, 99)}
+    cortes = statistics.quantiles(latencias, n=100, method="inclusive")
+    return {f"p{p}_ms": round(cortes[p - 1], 3) for p in (50, 95, 99)}
+
+
+def medir_motor(session: Session, conferencia, lotes, contador: ContadorConsultas) -> tuple[list, list]:
+    latencias, consultas = [], []
+    for lote in lotes:
+        antes = contador.total
+        inicio = time.perf_counter()
+        registrar_leituras_em_conferencia(session, conferencia.id, lote)
+        latencias.append((time.perf_counter() - inicio) * 1000)
+        consultas.append(contador.total - antes)
+    return latencias, consultas
+
+
+async def medir_http(session: Session, conferencia, token: str, lotes, contador: ContadorConsultas):
+    fabrica = sessionmaker(bind=session.get_bind(), autocommit=False, autoflush=False)
+
+    def sessao_do_benchmark():
+        db = fabrica()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = sessao_do_benchmark
+    latencias, consultas = [], []
+    try:
+        transporte = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cliente:
+            for lote in lotes:
+                corpo = [leitura.model_dump(mode="json") for leitura in lote]
+                antes = contador.total
+                inicio = time.perf_counter()
+                resposta = await cliente.post(
+                    f"/conferencia/{conferencia.id}/leitura",
+                    json=corpo,
+                    headers={"Authorization": f"Bearer {token}"},
+                )
+                latencias.append((time.perf_counter() - inicio) * 1000)
+                consultas.append(contador.total - antes)
+                resposta.raise_for_status()
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+    return latencias, consultas
+
+
+@cli.command()
+def main(
+    url: Annotated[str, typer.Option(help="URL SQLAlchemy do banco")] = app_settings.POSTGRES_URL,
+    produtos: Annotated[int, typer.Option(help="Produtos distintos no catálogo (N)")] = 200,
+    tags: Annotated[int, typer.Option(help="Etiquetas distintas no estoque (M)")] = 20_000,
+    duplicadas: Annotated[float, typer.Option(help="Fração das leituras que repetem uma etiqueta")] = 0.3,
+    tamanhos: Annotated[list[int], typer.Option(help="Tamanhos de lote medidos")] = [100, 1000],
+    lotes: Annotated[int, typer.Option(help="Lotes enviados por tamanho e modo")] = 20,
+    intervalo_ms: Annotated[int, typer.Option(help="Espaçamento do lido_em entre leituras")] = 50,
+    modos: Annotated[list[str], typer.Option(help="motor e/ou http")] = ["motor", "http"],
+    semente: Annotated[int, typer.Option(help="Semente do gerador de tráfego")] = 0,
+):
+    """Imprime uma linha JSON por modo e tamanho de lote."""
+    if desconhecidos := set(modos) - {"motor", "http"}:
+        raise typer.BadParameter(f"Modos desconhecidos: {', '.join(sorted(desconhecidos))}")
+    session = abrir_sessao(url)
+    dialeto = session.get_bind().dialect.name
+    contador = ContadorConsultas(session)
+    prefixo = novo_prefixo()
+    usuario, pecas = preparar_dados(session, prefixo, produtos)
+    token, _ = create_access_token(data=dados_do_token(usuario))
+    conferencia_ids = []
+    try:
+        for tamanho in tamanhos:
+            trafego = gerar_trafego(prefixo, pecas, tags, duplicadas, tamanho, lotes, intervalo_ms, semente)
+            for modo in modos:
+                conferencia = nova_conferencia(session, usuario)
+                conferencia_ids.append(conferencia.id)
+                debounce_leituras.limpar()
+
+                inicio = time.perf_counter()
+                if modo == "http":
+                    latencias, consultas = asyncio.run(
+                        medir_http(session, conferencia, token, trafego, contador)
+                    )
+                else:
+                    latencias, consultas = medir_motor(session, conferencia, trafego, contador)
+                duracao = time.perf_counter() - inicio
+                conferir_contagem(session, conferencia.id)
+
+                leituras = tamanho * lotes
+                print(
+                    json.dumps(
+                        {
+                            "modo": modo,
+                            "dialeto": dialeto,
+                            "produtos": produtos,
+                            "tags": tags,
+                            "proporcao_duplicadas": duplicadas,
+                            "tamanho_lote": tamanho,
+                            "lotes": lotes,
+                            "leituras_por_segundo": round(leituras / duracao),
+                            **percentis(latencias),
+                            "consultas_por_lote": round(statistics.mean(consultas), 1),
+                            "leituras_suprimidas": debounce_leituras.estatisticas()["suprimidas"],
+                        }
+                    )
+                )
+    finally:
+        limpar_dados(session, prefixo, conferencia_ids)
+        session.close()
+
+
+if __name__ == "__main__":
+    cli()
@@ -1,11 +1,12 @@
 import alembic_postgresql_enum  # noqa
+import re
 from logging.config import fileConfig
 
 from alembic import context
 from sqlalchemy import engine_from_config, pool
 
 from app.models.base import Base
-from app.models.conferencia import Conferencia, Evento, Leitura  # noqa
+from app.models.conferencia import Conferencia, Evento, Leitura, LeituraQuarentena, LoteAplicado  # noqa
 from app.models.peca import Peca  # noqa
 from app.models.usuario import Usuario  # noqa
 from app.settings import app_settings
@@ -28,6 +29,14 @@ if config.config_file_name is not None:
 # target_metadata = mymodel.Base.metadata
 target_metadata = Base.metadata
 
+# Partições de tag_lida (uma por conferência e a padrão) são criadas e descartadas pela aplicação
+_PARTICAO_TAG_LIDA = re.compile(r"^tag_lida_(\d+|default)$")
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    return not (type_ == "table" and reflected and _PARTICAO_TAG_LIDA.match(name))
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -52,6 +61,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -72,7 +82,9 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        context.configure(
+            connection=connection, target_metadata=target_metadata, include_object=include_object
+        )
 
         with context.begin_transaction():
             context.run_migrations()
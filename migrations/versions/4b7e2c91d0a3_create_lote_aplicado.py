@@ -0,0 +1,34 @@
+"""create lote_aplicado
+
+Revision ID: 4b7e2c91d0a3
+Revises: d6f91f7cbb3b
+Create Date: 2026-10-18 16:05:12.418233
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b7e2c91d0a3'
+down_revision: Union[str, Sequence[str], None] = 'd6f91f7cbb3b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'lote_aplicado',
+        sa.Column('conferencia_id', sa.Integer(), nullable=False),
+        sa.Column('chave', sa.String(length=128), nullable=False),
+        sa.ForeignKeyConstraint(['conferencia_id'], ['conferencia.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('conferencia_id', 'chave'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('lote_aplicado')
@@ -0,0 +1,30 @@
+"""add token_versao to usuarios
+
+Revision ID: 5c0e7a9d2b41
+Revises: e1b84d0c6a59
+Create Date: 2026-10-18 21:14:05.537102
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c0e7a9d2b41'
+down_revision: Union[str, Sequence[str], None] = 'e1b84d0c6a59'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'usuarios', sa.Column('token_versao', sa.Integer(), server_default='0', nullable=False)
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('usuarios', 'token_versao')
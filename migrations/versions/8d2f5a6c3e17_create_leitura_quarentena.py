@@ -0,0 +1,41 @@
+"""create leitura_quarentena
+
+Revision ID: 8d2f5a6c3e17
+Revises: 4b7e2c91d0a3
+Create Date: 2026-10-18 16:48:37.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2f5a6c3e17'
+down_revision: Union[str, Sequence[str], None] = '4b7e2c91d0a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'leitura_quarentena',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('conferencia_id', sa.Integer(), nullable=False),
+        sa.Column('rfid_uuid', sa.String(), nullable=False),
+        sa.Column('codigo_produto', sa.String(), nullable=False),
+        sa.Column('lido_em', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('recebida_em', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['conferencia_id'], ['conferencia.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('conferencia_id', 'rfid_uuid', name='uq_quarentena_conferencia_tag'),
+    )
+    op.create_index(op.f('ix_leitura_quarentena_id'), 'leitura_quarentena', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_leitura_quarentena_id'), table_name='leitura_quarentena')
+    op.drop_table('leitura_quarentena')
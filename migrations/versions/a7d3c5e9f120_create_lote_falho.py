@@ -0,0 +1,43 @@
+"""create lote_falho
+
+Revision ID: a7d3c5e9f120
+Revises: 5c0e7a9d2b41
+Create Date: 2026-10-18 22:37:41.208163
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d3c5e9f120'
+down_revision: Union[str, Sequence[str], None] = '5c0e7a9d2b41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'lote_falho',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('conferencia_id', sa.Integer(), nullable=False),
+        sa.Column('sequencia', sa.Integer(), nullable=False),
+        sa.Column('chave_idempotencia', sa.String(length=128), nullable=True),
+        sa.Column('leituras', sa.JSON(), nullable=False),
+        sa.Column('erro', sa.String(), nullable=False),
+        sa.Column('recebido_em', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('falhou_em', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_lote_falho_id'), 'lote_falho', ['id'], unique=False)
+    op.create_index(op.f('ix_lote_falho_conferencia_id'), 'lote_falho', ['conferencia_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_lote_falho_conferencia_id'), table_name='lote_falho')
+    op.drop_index(op.f('ix_lote_falho_id'), table_name='lote_falho')
+    op.drop_table('lote_falho')
@@ -0,0 +1,28 @@
+"""add tag_lida default partition
+
+Revision ID: b4e8f1a2c6d3
+Revises: a7d3c5e9f120
+Create Date: 2026-10-18 23:05:18.774019
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4e8f1a2c6d3'
+down_revision: Union[str, Sequence[str], None] = 'a7d3c5e9f120'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Tags gravadas depois que a partição da conferência foi descartada caem aqui em vez de falhar
+    op.execute("CREATE TABLE tag_lida_default PARTITION OF tag_lida DEFAULT")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TABLE tag_lida_default")
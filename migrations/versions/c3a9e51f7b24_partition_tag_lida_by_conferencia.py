@@ -0,0 +1,83 @@
+"""partition tag_lida by conferencia
+
+Revision ID: c3a9e51f7b24
+Revises: 8d2f5a6c3e17
+Create Date: 2026-10-18 17:31:02.665480
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3a9e51f7b24'
+down_revision: Union[str, Sequence[str], None] = '8d2f5a6c3e17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Tabela particionada por conferência, sem o id e sem a unicidade global de rfid_uuid
+    op.execute(
+        """
+        CREATE TABLE tag_lida_nova (
+            conferencia_id integer NOT NULL REFERENCES conferencia (id),
+            rfid_uuid varchar NOT NULL,
+            CONSTRAINT pk_tag_lida PRIMARY KEY (conferencia_id, rfid_uuid)
+        ) PARTITION BY LIST (conferencia_id)
+        """
+    )
+    # Uma partição por conferência em andamento; as tags das encerradas não são mais necessárias
+    op.execute(
+        """
+        DO $$
+        DECLARE
+            id_conferencia integer;
+        BEGIN
+            FOR id_conferencia IN SELECT id FROM conferencia WHERE status = 'INICIADA' LOOP
+                EXECUTE format(
+                    'CREATE TABLE tag_lida_%s PARTITION OF tag_lida_nova FOR VALUES IN (%s)',
+                    id_conferencia, id_conferencia
+                );
+            END LOOP;
+        END $$;
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO tag_lida_nova (conferencia_id, rfid_uuid)
+        SELECT t.conferencia_id, t.rfid_uuid
+        FROM tag_lida t
+        JOIN conferencia c ON c.id = t.conferencia_id
+        WHERE c.status = 'INICIADA'
+        """
+    )
+    op.execute("DROP TABLE tag_lida")
+    op.execute("ALTER TABLE tag_lida_nova RENAME TO tag_lida")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(
+        """
+        CREATE TABLE tag_lida_antiga (
+            id serial PRIMARY KEY,
+            conferencia_id integer NOT NULL REFERENCES conferencia (id),
+            rfid_uuid varchar NOT NULL UNIQUE
+        )
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO tag_lida_antiga (conferencia_id, rfid_uuid)
+        SELECT DISTINCT ON (rfid_uuid) conferencia_id, rfid_uuid FROM tag_lida ORDER BY rfid_uuid, conferencia_id DESC
+        """
+    )
+    op.execute("DROP TABLE tag_lida CASCADE")
+    op.execute("ALTER TABLE tag_lida_antiga RENAME TO tag_lida")
+    op.execute("ALTER INDEX tag_lida_antiga_pkey RENAME TO tag_lida_pkey")
+    op.execute("ALTER INDEX tag_lida_antiga_rfid_uuid_key RENAME TO tag_lida_rfid_uuid_key")
+    op.execute("ALTER SEQUENCE tag_lida_antiga_id_seq RENAME TO tag_lida_id_seq")
+    op.execute("CREATE INDEX ix_tag_lida_id ON tag_lida (id)")
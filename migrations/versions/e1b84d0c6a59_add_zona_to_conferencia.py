@@ -0,0 +1,36 @@
+"""add zona to conferencia
+
+Revision ID: e1b84d0c6a59
+Revises: c3a9e51f7b24
+Create Date: 2026-10-18 18:02:44.190337
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1b84d0c6a59'
+down_revision: Union[str, Sequence[str], None] = 'c3a9e51f7b24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('conferencia', sa.Column('zona', sa.String(), nullable=True))
+    op.create_index(
+        'uq_conferencia_ativa_por_zona',
+        'conferencia',
+        [sa.text("coalesce(zona, '')")],
+        unique=True,
+        postgresql_where=sa.text("status = 'INICIADA'"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_conferencia_ativa_por_zona', table_name='conferencia')
+    op.drop_column('conferencia', 'zona')
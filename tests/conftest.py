@@ -1,15 +1,30 @@
+import os
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
-from app.auth import create_access_token
+from app.auth import create_access_token, dados_do_token
+from app.core.senhas import pool_senhas
 from app.crud.usuario import create_usuario
 from app.database import get_db
 from app.main import app
 from app.models.base import Base
 from app.schemas.usuario import RoleEnum, UsuarioCreate
+from app.settings import app_settings
+
+# O escritor da fila de ingestão rodaria em outra thread compartilhando a sessão de teste;
+# nos testes a fila é descarregada de forma explícita (encerramento da conferência ou shutdown)
+app_settings.INGESTAO_FILA_ESCRITOR_ATIVO = False
+# Pelo mesmo motivo a limpeza de tags de conferências encerradas é chamada diretamente nos testes
+app_settings.LIMPEZA_TAGS_ATIVA = False
+# Não há Postgres nos testes para o LISTEN/NOTIFY; as invalidações locais acontecem no commit
+app_settings.NOTIFICACOES_ATIVAS = False
+# O bcrypt roda na própria thread: subir processos com spawn a cada teste deixaria a suíte lenta
+pool_senhas.processos = 0
 
 # Cria banco de dados SQLite em memória para testes
 SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
@@ -34,6 +49,33 @@ def db_session():
         Base.metadata.drop_all(bind=engine)
 
 
+@pytest.fixture(scope="function")
+def pg_session():
+    """
+    Sessão em um Postgres de testes (`TEST_POSTGRES_URL`), para os caminhos que só existem nele:
+    partições de `tag_lida`, COPY e LISTEN/NOTIFY. As tabelas são recriadas a cada teste, então a URL
+    deve apontar para um banco descartável. Sem a variável ou sem conexão o teste é pulado.
+    """
+    url = os.environ.get("TEST_POSTGRES_URL")
+    if not url:
+        pytest.skip("TEST_POSTGRES_URL não definida")
+    pg_engine = create_engine(url)
+    try:
+        pg_engine.connect().close()
+    except OperationalError:
+        pytest.skip("Postgres de testes indisponível")
+
+    Base.metadata.drop_all(bind=pg_engine)
+    Base.metadata.create_all(bind=pg_engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=pg_engine)()
+    try:
+        yield db
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=pg_engine)
+        pg_engine.dispose()
+
+
 @pytest.fixture(scope="function")
 def client(db_session):
     """Cria um cliente de teste com banco de dados isolado."""
@@ -67,14 +109,14 @@ def stockist_user(db_session):
 @pytest.fixture(scope="function")
 def admin_token(admin_user):
     """Gera token JWT para usuário administrador."""
-    token, _ = create_access_token(data={"sub": admin_user.username, "role": admin_user.role})
+    token, _ = create_access_token(data=dados_do_token(admin_user))
     return token
 
 
 @pytest.fixture(scope="function")
 def stockist_token(stockist_user):
     """Gera token JWT para usuário stockist."""
-    token, _ = create_access_token(data={"sub": stockist_user.username, "role": stockist_user.role})
+    token, _ = create_access_token(data=dados_do_token(stockist_user))
     return token
 
 
@@ -88,3 +130,17 @@ def admin_headers(admin_token):
 def stockist_headers(stockist_token):
     """Headers HTTP com autenticação de stockist."""
     return {"Authorization": f"Bearer {stockist_token}"}
+
+
+@pytest.fixture(scope="function", params=["jose", "hmac"])
+def codec_jwt(request, monkeypatch):
+    """Troca o codec JWT da aplicação, para rodar um teste com cada implementação."""
+    import app.auth
+    from app.core.jwt_codec import criar_codec
+    from app.core.tokens_verificados import tokens_verificados
+
+    codec = criar_codec(request.param, app_settings.JWT_SECRET, app_settings.JWT_ALGORITHM)
+    monkeypatch.setattr(app_settings, "JWT_CODEC", request.param)
+    monkeypatch.setattr(app.auth, "codec_jwt", codec)
+    tokens_verificados.limpar()
+    return codec
@@ -183,3 +183,381 @@ class TestAuth:
 
         # Refresh deve expirar depois do access
         assert refresh_expire > access_expire
+
+    def test_requisicoes_autenticadas_nao_consultam_usuarios(self, client, admin_headers, db_session):
+        """Testa que, com o principal em cache, requisições autenticadas não consultam a tabela usuarios."""
+        from sqlalchemy import event
+
+        client.get("/conferencia", headers=admin_headers)
+
+        consultas = []
+
+        def registrar(conn, cursor, statement, parameters, context, executemany):
+            consultas.append(statement)
+
+        event.listen(db_session.get_bind(), "before_cursor_execute", registrar)
+        try:
+            response = client.get("/conferencia", headers=admin_headers)
+        finally:
+            event.remove(db_session.get_bind(), "before_cursor_execute", registrar)
+
+        assert response.status_code == 200
+        assert not [consulta for consulta in consultas if "FROM usuarios" in consulta]
+
+    def test_inativar_usuario_invalida_principal_em_cache(self, client, admin_headers, stockist_user):
+        """Testa que o token de um usuário inativado deixa de valer na requisição seguinte."""
+        stockist_token = client.post(
+            "/auth/login", data={"username": "stockist_test", "password": "stockist123"}
+        ).json()["access_token"]
+        stockist_headers = {"Authorization": f"Bearer {stockist_token}"}
+        assert client.get("/conferencia", headers=stockist_headers).status_code == 200
+
+        response = client.put(f"/usuarios/{stockist_user.id}/inativar", headers=admin_headers)
+        assert response.status_code == 200
+
+        assert client.get("/conferencia", headers=stockist_headers).status_code == 401
+
+    def test_mudanca_de_role_invalida_principal_em_cache(self, client, admin_user, db_session):
+        """Testa que a troca de role vale na requisição seguinte para um token sem claims de autorização."""
+        from app.auth import create_access_token
+        from app.schemas.usuario import RoleEnum
+
+        token, _ = create_access_token(data={"sub": admin_user.username, "role": admin_user.role})
+        headers = {"Authorization": f"Bearer {token}"}
+        assert client.get("/usuarios", headers=headers).status_code == 200
+
+        admin_user.role = RoleEnum.stockist
+        db_session.commit()
+
+        assert client.get("/usuarios", headers=headers).status_code == 403
+
+    def test_mudanca_de_role_revoga_tokens_emitidos(self, client, admin_headers, admin_user, db_session):
+        """Testa que a troca de role revoga os tokens com a versão anterior; um novo login já sai com a role nova."""
+        from app.schemas.usuario import RoleEnum
+
+        assert client.get("/usuarios", headers=admin_headers).status_code == 200
+
+        admin_user.role = RoleEnum.stockist
+        db_session.commit()
+
+        assert client.get("/usuarios", headers=admin_headers).status_code == 401
+        token = client.post("/auth/login", data={"username": "admin_test", "password": "admin123"}).json()[
+            "access_token"
+        ]
+        assert client.get("/usuarios", headers={"Authorization": f"Bearer {token}"}).status_code == 403
+
+    def test_principal_resolvido_uma_vez_por_requisicao(self, admin_user, db_session, monkeypatch):
+        """Testa que CurrentUser e AdminUser na mesma rota decodificam o token e consultam o usuário uma vez."""
+        from fastapi import Depends, FastAPI
+        from fastapi.testclient import TestClient
+        from sqlalchemy import event
+
+        import app.auth
+        from app.core.principais import cache_principais
+        from app.database import get_db
+        from app.schemas.auth import AdminUser, CurrentUser
+
+        rotas = FastAPI(dependencies=[Depends(app.auth.get_admin_user)])
+
+        @rotas.get("/empilhada")
+        def empilhada(usuario: CurrentUser, admin: AdminUser):
+            return {"mesmo_principal": usuario is admin}
+
+        rotas.dependency_overrides[get_db] = lambda: db_session
+        # Token sem as claims de autorização, que ainda carrega o usuário pelo banco
+        token, _ = app.auth.create_access_token(data={"sub": admin_user.username, "role": admin_user.role})
+
+        verificacoes = []
+        verify_token = app.auth.verify_token
+
+        def contar_verificacao(token, token_type="access"):
+            verificacoes.append(token_type)
+            return verify_token(token, token_type)
+
+        consultas = []
+
+        def registrar(conn, cursor, statement, parameters, context, executemany):
+            consultas.append(statement)
+
+        monkeypatch.setattr(app.auth, "verify_token", contar_verificacao)
+        cache_principais.limpar()
+        event.listen(db_session.get_bind(), "before_cursor_execute", registrar)
+        try:
+            response = TestClient(rotas).get("/empilhada", headers={"Authorization": f"Bearer {token}"})
+        finally:
+            event.remove(db_session.get_bind(), "before_cursor_execute", registrar)
+
+        assert response.status_code == 200
+        assert response.json() == {"mesmo_principal": True}
+        assert verificacoes == ["access"]
+        assert len([consulta for consulta in consultas if "FROM usuarios" in consulta]) == 1
+
+    def test_verify_token_reaproveita_payload_verificado(self, admin_token, monkeypatch):
+        """Testa que um token já verificado não é decodificado de novo e que outro token não aproveita a entrada."""
+        import app.auth
+        from app.auth import verify_token
+        from app.core.tokens_verificados import tokens_verificados
+
+        decodificacoes = []
+        decodificar = app.auth.codec_jwt.decodificar
+
+        def contar_decodificacao(token):
+            decodificacoes.append(token)
+            return decodificar(token)
+
+        monkeypatch.setattr(app.auth.codec_jwt, "decodificar", contar_decodificacao)
+        tokens_verificados.limpar()
+
+        assert verify_token(admin_token)["sub"] == "admin_test"
+        assert verify_token(admin_token)["sub"] == "admin_test"
+        assert verify_token(admin_token[:-2] + "xx") is None
+        # O tipo é conferido também para o payload em cache
+        assert verify_token(admin_token, token_type="refresh") is None
+
+        assert decodificacoes == [admin_token, admin_token[:-2] + "xx"]
+
+    def test_token_expirado_nao_vale_pelo_cache(self, admin_user):
+        """Testa que uma entrada do cache de tokens deixa de valer no exp do token."""
+        from datetime import timedelta
+
+        from jose import jwt
+
+        from app.auth import create_access_token, verify_token
+        from app.core.tokens_verificados import tokens_verificados
+        from app.settings import app_settings
+
+        token, _ = create_access_token(data={"sub": "admin_test"}, expires_delta=timedelta(seconds=-1))
+        payload = jwt.decode(
+            token,
+            app_settings.JWT_SECRET,
+            algorithms=[app_settings.JWT_ALGORITHM],
+            options={"verify_exp": False},
+        )
+        tokens_verificados.limpar()
+        tokens_verificados.guardar(token, payload)
+
+        assert verify_token(token) is None
+        assert tokens_verificados.estatisticas()["itens"] == 0
+
+    def test_login_sobrecarregado_responde_503(self, client, admin_user, monkeypatch):
+        """Testa que o login falha na hora com 503 quando o pool de senhas está no limite de pendentes."""
+        from app.core.senhas import pool_senhas
+
+        monkeypatch.setattr(pool_senhas, "max_pendentes", 0)
+
+        response = client.post("/auth/login", data={"username": "admin_test", "password": "admin123"})
+
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+        assert pool_senhas.estatisticas()["rejeitadas"] >= 1
+
+    def test_pool_de_processos_gera_e_verifica_hash(self):
+        """Testa o hash e a verificação de senhas em um processo separado do pool."""
+        from app.core.senhas import PoolSenhas
+
+        pool = PoolSenhas(processos=1, max_pendentes=2)
+        try:
+            hash_senha = pool.gerar_hash("senha123")
+
+            assert pool.verificar("senha123", hash_senha)
+            assert not pool.verificar("outra", hash_senha)
+            assert pool.estatisticas()["pendentes"] == 0
+        finally:
+            pool.parar()
+
+    def test_pool_de_processos_se_recupera_de_processo_morto(self):
+        """Testa que, após a morte de um processo do pool, a chamada é repetida em um pool recriado."""
+        from app.core.senhas import PoolSenhas
+
+        pool = PoolSenhas(processos=1, max_pendentes=2)
+        try:
+            hash_senha = pool.gerar_hash("senha123")
+            quebrado = pool._executor
+            for processo in list(quebrado._processes.values()):
+                processo.kill()
+                processo.join()
+
+            assert pool.verificar("senha123", hash_senha)
+            assert pool._executor is not quebrado
+            assert pool.verificar("senha123", hash_senha)
+            assert pool.estatisticas()["pendentes"] == 0
+        finally:
+            pool.parar()
+
+    def test_login_limitado_por_username(self, client, admin_user, admin_headers, monkeypatch):
+        """Testa que tentativas além da rajada por username recebem 429 e aparecem no diagnóstico."""
+        from app.core.limite_autenticacao import LimitadorGCRA, limites_autenticacao
+
+        monkeypatch.setattr(limites_autenticacao, "por_username", LimitadorGCRA(por_minuto=1, rajada=2))
+        credenciais = {"username": "admin_test", "password": "senha_errada"}
+
+        assert client.post("/auth/login", data=credenciais).status_code == 401
+        assert client.post("/auth/login", data=credenciais).status_code == 401
+        response = client.post("/auth/login", data=credenciais)
+
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) > 0
+        # Outro username segue com o próprio limite
+        outro = client.post("/auth/login", data={"username": "outro", "password": "x"})
+        assert outro.status_code == 401
+
+        diagnostico = client.get("/diagnostico", headers=admin_headers).json()["limite_autenticacao"]
+        assert diagnostico["rejeitadas_username"] == 1
+        assert diagnostico["rejeitadas_ip"] == 0
+
+    def test_refresh_limitado_por_ip(self, client, admin_user, monkeypatch):
+        """Testa o limite por IP no refresh, com o corpo da requisição chegando intacto à rota."""
+        from app.core.limite_autenticacao import LimitadorGCRA, limites_autenticacao
+
+        refresh_token = client.post(
+            "/auth/login", data={"username": "admin_test", "password": "admin123"}
+        ).json()["refresh_token"]
+        monkeypatch.setattr(limites_autenticacao, "por_ip", LimitadorGCRA(por_minuto=1, rajada=1))
+
+        assert client.post("/auth/refresh", json={"refresh_token": refresh_token}).status_code == 200
+        assert client.post("/auth/refresh", json={"refresh_token": refresh_token}).status_code == 429
+        assert limites_autenticacao.estatisticas()["rejeitadas_ip"] == 1
+
+    def test_rejeicao_do_limite_tem_headers_cors(self, client, monkeypatch):
+        """Testa que o 429 passa pelo CORS, para que o navegador entregue a resposta ao frontend."""
+        from app.core.limite_autenticacao import LimitadorGCRA, limites_autenticacao
+        from app.settings import app_settings
+
+        origem = app_settings.ALLOWED_ORIGINS[0]
+        monkeypatch.setattr(limites_autenticacao, "por_ip", LimitadorGCRA(por_minuto=1, rajada=1))
+        credenciais = {"username": "ninguem", "password": "x"}
+
+        client.post("/auth/login", data=credenciais, headers={"Origin": origem})
+        response = client.post("/auth/login", data=credenciais, headers={"Origin": origem})
+
+        assert response.status_code == 429
+        assert response.headers["access-control-allow-origin"] == origem
+
+    def test_corpo_grande_recusado_pelo_limite(self, client, monkeypatch):
+        """Testa que o limitador não lê corpos acima do máximo e responde 413."""
+        from app.settings import app_settings
+
+        monkeypatch.setattr(app_settings, "LIMITE_AUTH_CORPO_MAXIMO_BYTES", 64)
+
+        response = client.post("/auth/login", data={"username": "u" * 100, "password": "x"})
+
+        assert response.status_code == 413
+
+    def test_limitador_descarta_chave_usada_ha_mais_tempo(self):
+        """Testa que, acima da capacidade, o limitador esquece a chave usada há mais tempo."""
+        from app.core.limite_autenticacao import LimitadorGCRA
+
+        limitador = LimitadorGCRA(por_minuto=1, rajada=1, capacidade=2)
+        for chave in ["a", "b", "a", "c"]:
+            limitador.consumir(chave)
+
+        assert len(limitador) == 2
+        # "a" segue limitada (a rejeição também conta como uso); "b" foi descartada e volta com o balde cheio
+        assert limitador.consumir("a") > 0
+        assert limitador.consumir("b") == 0
+
+    def test_token_com_claims_autoriza_sem_banco(self, client, stockist_user, db_session):
+        """Testa que um token emitido no login autoriza sem consultar usuarios, mesmo sem principal em cache."""
+        from sqlalchemy import event
+
+        from app.core.principais import cache_principais
+
+        token = client.post(
+            "/auth/login", data={"username": "stockist_test", "password": "stockist123"}
+        ).json()["access_token"]
+        cache_principais.limpar()
+
+        consultas = []
+
+        def registrar(conn, cursor, statement, parameters, context, executemany):
+            consultas.append(statement)
+
+        event.listen(db_session.get_bind(), "before_cursor_execute", registrar)
+        try:
+            response = client.get("/conferencia", headers={"Authorization": f"Bearer {token}"})
+        finally:
+            event.remove(db_session.get_bind(), "before_cursor_execute", registrar)
+
+        assert response.status_code == 200
+        assert not [consulta for consulta in consultas if "FROM usuarios" in consulta]
+
+    def test_versao_notificada_por_outro_worker_revoga_token(self, client, stockist_headers, stockist_user):
+        """Testa que a versão recebida pelo canal de notificações revoga os tokens anteriores neste worker."""
+        from app.core.versoes_tokens import versoes_tokens
+
+        assert client.get("/conferencia", headers=stockist_headers).status_code == 200
+
+        versoes_tokens.notificado(f"{stockist_user.id}:1")
+
+        assert client.get("/conferencia", headers=stockist_headers).status_code == 401
+        assert versoes_tokens.estatisticas()["rejeitados"] == 1
+
+
+class TestCodecJWT:
+    """Conformidade dos codecs JWT (python-jose e HMAC da biblioteca padrão), configurados em JWT_CODEC."""
+
+    def test_tokens_de_acesso_e_refresh(self, codec_jwt):
+        """Testa a ida e volta dos dois tipos de token e a conferência do tipo."""
+        from app.auth import create_access_token, create_refresh_token, verify_token
+
+        acesso, expira = create_access_token(data={"sub": "admin_test", "role": "admin", "uid": 1, "ver": 0})
+        refresh, _ = create_refresh_token(data={"sub": "admin_test"})
+
+        payload = verify_token(acesso)
+        assert payload == {
+            "sub": "admin_test",
+            "role": "admin",
+            "uid": 1,
+            "ver": 0,
+            "exp": int(expira.timestamp()),
+            "type": "access",
+        }
+        assert verify_token(refresh, token_type="refresh")["sub"] == "admin_test"
+        assert verify_token(acesso, token_type="refresh") is None
+        assert verify_token(refresh) is None
+
+    def test_rejeita_tokens_invalidos(self, codec_jwt):
+        """Testa assinatura adulterada, segredo diferente, token expirado, lixo e `alg: none`."""
+        import base64
+        import json
+        from datetime import timedelta
+
+        from app.auth import create_access_token, verify_token
+        from app.core.jwt_codec import criar_codec
+        from app.settings import app_settings
+
+        token, _ = create_access_token(data={"sub": "admin_test"})
+        cabecalho, corpo, assinatura = token.split(".")
+        nenhum = base64.urlsafe_b64encode(json.dumps({"alg": "none", "typ": "JWT"}).encode()).rstrip(b"=")
+        outro_segredo = criar_codec(app_settings.JWT_CODEC, "outro-segredo", app_settings.JWT_ALGORITHM)
+        expirado, _ = create_access_token(data={"sub": "admin_test"}, expires_delta=timedelta(seconds=-5))
+
+        assert verify_token(f"{cabecalho}.{corpo}.{assinatura[:-4]}AAAA") is None
+        assert verify_token(outro_segredo.codificar({"sub": "admin_test", "type": "access"})) is None
+        assert verify_token(expirado) is None
+        assert verify_token("nao.e.um-token") is None
+        assert verify_token("lixo") is None
+        assert verify_token(f"{nenhum.decode()}.{corpo}.") is None
+
+    def test_tokens_compativeis_entre_codecs(self, codec_jwt):
+        """Testa que um token emitido por um codec é aceito pelo outro, o que permite trocar o codec sem novo login."""
+        from app.core.jwt_codec import CODECS
+        from app.settings import app_settings
+
+        claims = {"sub": "admin_test", "role": "admin", "exp": 4_102_444_800, "type": "access"}
+        for nome, classe in CODECS.items():
+            outro = classe(app_settings.JWT_SECRET, app_settings.JWT_ALGORITHM)
+            assert codec_jwt.decodificar(outro.codificar(claims)) == claims, nome
+            assert outro.decodificar(codec_jwt.codificar(claims)) == claims, nome
+
+    def test_login_e_rota_autenticada(self, codec_jwt, client, admin_user):
+        """Testa o login, o refresh e uma rota autenticada com o codec configurado."""
+        login = client.post("/auth/login", data={"username": "admin_test", "password": "admin123"}).json()
+
+        assert client.get("/auth/me", headers={"Authorization": f"Bearer {login['access_token']}"}).json() == {
+            "id": admin_user.id,
+            "username": "admin_test",
+            "role": "admin",
+        }
+        response = client.post("/auth/refresh", json={"refresh_token": login["refresh_token"]})
+        assert response.status_code == 200
@@ -1,4 +1,6 @@
-from datetime import datetime
+import json
+import time
+from datetime import datetime, timedelta
 
 import pytest
 
@@ -59,6 +61,89 @@ class TestConferencia:
 
         assert response.status_code == 409
 
+    def test_conferencias_simultaneas_por_zona(self, client, admin_headers, stockist_user):
+        """Testa que zonas diferentes têm conferências em paralelo, mas só uma por zona."""
+        for zona in ["A1", "B2"]:
+            response = client.post(
+                "/conferencia",
+                json={"username_funcionario": stockist_user.username, "zona": zona},
+                headers=admin_headers,
+            )
+            assert response.status_code == 200
+            assert response.json()["zona"] == zona
+
+        response = client.post(
+            "/conferencia",
+            json={"username_funcionario": stockist_user.username, "zona": "A1"},
+            headers=admin_headers,
+        )
+        assert response.status_code == 409
+
+        # A conferência geral cobre o estoque todo e conflita com as de zona
+        response = client.post(
+            "/conferencia", json={"username_funcionario": stockist_user.username}, headers=admin_headers
+        )
+        assert response.status_code == 409
+
+        response = client.get("/conferencia-ativa", params={"zona": "B2"}, headers=admin_headers)
+        assert response.status_code == 200
+        assert response.json()["zona"] == "B2"
+
+        response = client.get("/conferencia-ativa", params={"zona": "C3"}, headers=admin_headers)
+        assert response.status_code == 204
+
+    def test_indice_impede_duas_conferencias_ativas_na_mesma_zona(self, db_session, stockist_user):
+        """Testa que o índice parcial barra duas conferências da mesma zona iniciadas ao mesmo tempo."""
+        from app.core.exceptions import ConferenciaAlreadyOpened
+
+        nova = ConferenciaCreate(username_funcionario=stockist_user.username, zona="A1")
+        criar_conferencia(db_session, nova)
+
+        with pytest.raises(ConferenciaAlreadyOpened):
+            criar_conferencia(db_session, nova)
+
+    def test_conferencia_geral_e_de_zona_verificadas_na_criacao(self, db_session, stockist_user):
+        """Testa que a regra entre a conferência geral e as de zona vale também fora do endpoint."""
+        from app.core.exceptions import ConferenciaAlreadyOpened
+
+        criar_conferencia(db_session, ConferenciaCreate(username_funcionario=stockist_user.username))
+
+        with pytest.raises(ConferenciaAlreadyOpened):
+            criar_conferencia(
+                db_session, ConferenciaCreate(username_funcionario=stockist_user.username, zona="A1")
+            )
+
+    def test_produto_contado_so_na_conferencia_da_sua_zona(
+        self, client, admin_headers, stockist_user, produto_criado
+    ):
+        """Testa que conferências de zonas em andamento não contam o mesmo produto duas vezes."""
+        agora = datetime.now().isoformat()
+        lote = [
+            {"codigo_produto": produto_criado.codigo_produto, "rfid_etiqueta": "ETIQ001", "lido_em": agora}
+        ]
+
+        resumos = {}
+        for zona in ["A1", "B2"]:
+            response = client.post(
+                "/conferencia",
+                json={"username_funcionario": stockist_user.username, "zona": zona},
+                headers=admin_headers,
+            )
+            conferencia_id = response.json()["id"]
+            response = client.post(f"/conferencia/{conferencia_id}/leitura", json=lote, headers=admin_headers)
+            resumos[zona] = response.json()["resumo"]
+
+        # O produto é da localização A1: a conferência de B2 recebe a tag mas não a conta
+        assert resumos["A1"]["contabilizadas"] == 1
+        assert resumos["B2"]["contabilizadas"] == 0
+        assert resumos["B2"]["fora_da_zona"] == 1
+        assert resumos["B2"]["duplicadas"] == 0
+
+        response = client.get(
+            f"/conferencia/{conferencia_id}/leituras", params={"limit": 10, "offset": 0}, headers=admin_headers
+        )
+        assert response.json()["items"] == []
+
     def test_listar_conferencias(self, client, admin_headers, conferencia_criada):
         """Testa listagem de conferências."""
         response = client.get("/conferencia/", headers=admin_headers)
@@ -117,6 +202,50 @@ class TestConferencia:
 
         assert response.status_code == 200
 
+    def test_registrar_evento_usa_estado_da_conferencia_em_cache(
+        self, client, admin_headers, conferencia_criada, db_session
+    ):
+        """Testa que gravações seguidas não consultam a conferência nem carregam suas leituras."""
+        from sqlalchemy import event
+
+        eventos = [{"tipo": "PAUSA", "descricao": "Pausa", "ocorreu_em": datetime.now().isoformat()}]
+        url = f"/conferencia/{conferencia_criada.id}/evento"
+        client.post(url, json=eventos, headers=admin_headers)
+
+        consultas = []
+
+        def registrar(conn, cursor, statement, *args):
+            consultas.append(statement)
+
+        engine = db_session.get_bind()
+        event.listen(engine, "before_cursor_execute", registrar)
+        try:
+            response = client.post(url, json=eventos, headers=admin_headers)
+        finally:
+            event.remove(engine, "before_cursor_execute", registrar)
+
+        assert response.status_code == 200
+        assert response.json()["username_funcionario"] == conferencia_criada.funcionario.username
+        assert not [sql for sql in consultas if "FROM conferencia" in sql or "FROM leitura" in sql]
+
+    def test_registrar_leitura_apos_encerrar_com_estado_em_cache(
+        self, client, admin_headers, conferencia_criada, produto_criado
+    ):
+        """Testa que encerrar a conferência invalida o estado em cache usado pelas gravações."""
+        url = f"/conferencia/{conferencia_criada.id}/leitura"
+        leituras = [
+            {
+                "codigo_produto": produto_criado.codigo_produto,
+                "rfid_etiqueta": "ETIQ001",
+                "lido_em": datetime.now().isoformat(),
+            }
+        ]
+        assert client.post(url, json=leituras, headers=admin_headers).status_code == 200
+
+        client.put(f"/conferencia/{conferencia_criada.id}/encerrar", headers=admin_headers)
+
+        assert client.post(url, json=leituras, headers=admin_headers).status_code == 409
+
     def test_encerrar_conferencia(self, client, admin_headers, conferencia_criada, db_session):
         """Testa encerramento de conferência ativa."""
         response = client.put(f"/conferencia/{conferencia_criada.id}/encerrar", headers=admin_headers)
@@ -213,3 +342,1083 @@ class TestConferencia:
         response = client.post("/conferencia/", json={"username_funcionario": stockist_user.username})
 
         assert response.status_code == 401
+
+    def test_registrar_leituras_agrega_quantidade_por_produto(
+        self, client, admin_headers, conferencia_criada, produto_criado
+    ):
+        """Testa que o lote soma uma unidade por tag nova e ignora tags repetidas."""
+        agora = datetime.now().isoformat()
+        lote = [
+            {"codigo_produto": produto_criado.codigo_produto, "rfid_etiqueta": tag, "lido_em": agora}
+            for tag in ["ETIQ001", "ETIQ002", "ETIQ001", "ETIQ003"]
+        ]
+
+        response = client.post(
+            f"/conferencia/{conferencia_criada.id}/leitura", json=lote, headers=admin_headers
+        )
+        assert response.status_code == 200
+
+        # Reenvio com uma tag já lida e uma nova
+        lote = [
+            {"codigo_produto": produto_criado.codigo_produto, "rfid_etiqueta": tag, "lido_em": agora}
+            for tag in ["ETIQ002", "ETIQ004"]
+        ]
+        response = client.post(
+            f"/conferencia/{conferencia_criada.id}/leitura", json=lote, headers=admin_headers
+        )
+        assert response.status_code == 200
+
+        response = client.get(
+            f"/conferencia/{conferencia_criada.id}/leituras",
+            params={"limit": 10, "offset": 0},
+            headers=admin_headers,
+        )
+        items = response.json()["items"]
+        assert len(items) == 1
+        assert items[0]["codigo_produto"] == produto_criado.codigo_produto
+        assert items[0]["quantidade"] == 4
+
+    def test_registrar_leitura_produto_inexistente(
+        self, client, admin_headers, conferencia_criada, produto_criado, db_session
+    ):
+        """Testa que um produto desconhecido vai para a quarentena sem impedir as demais leituras."""
+        from app.models.conferencia import LeituraQuarentena, TagLida
+
+        agora = datetime.now().isoformat()
+        lote = [
+            {"codigo_produto": produto_criado.codigo_produto, "rfid_etiqueta": "ETIQ001", "lido_em": agora},
+            {"codigo_produto": "INEXISTENTE", "rfid_etiqueta": "ETIQ002", "lido_em": agora},
+        ]
+
+        response = client.post(
+            f"/conferencia/{conferencia_criada.id}/leitura", json=lote, headers=admin_headers
+        )
+
+        assert response.status_code == 200
+        assert response.json()["resumo"] == {
+            "recebidas": 2,
+            "suprimidas": 0,
+            "contabilizadas": 1,
+            "duplicadas": 0,
+            "em_quarentena": 1,
+            "fora_da_zona": 0,
+            "codigos_desconhecidos": ["INEXISTENTE"],
+        }
+        assert [tag.rfid_uuid for tag in db_session.query(TagLida)] == ["ETIQ001"]
+        assert [leitura.rfid_uuid for leitura in db_session.query(LeituraQuarentena)] == ["ETIQ002"]
+
+    def test_registrar_leitura_apos_alterar_codigo_do_produto(
+        self, client, admin_headers, conferencia_criada, produto_criado
+    ):
+        """Testa que alterar o código de uma peça invalida o catálogo em cache."""
+        agora = datetime.now().isoformat()
+        peca = {
+            "nome": produto_criado.nome,
+            "codigo_produto": "PT001-NOVO",
+            "descricao": produto_criado.descricao,
+            "localizacao": produto_criado.localizacao,
+        }
+        response = client.put(f"/pecas/{produto_criado.id}", json=peca, headers=admin_headers)
+        assert response.status_code == 200
+
+        lote = [{"codigo_produto": "PT001", "rfid_etiqueta": "ETIQ001", "lido_em": agora}]
+        response = client.post(
+            f"/conferencia/{conferencia_criada.id}/leitura", json=lote, headers=admin_headers
+        )
+        assert response.json()["resumo"]["codigos_desconhecidos"] == ["PT001"]
+
+        lote = [{"codigo_produto": "PT001-NOVO", "rfid_etiqueta": "ETIQ002", "lido_em": agora}]
+        response = client.post(
+            f"/conferencia/{conferencia_criada.id}/leitura", json=lote, headers=admin_headers
+        )
+        assert response.json()["resumo"]["contabilizadas"] == 1
+
+    def test_estado_nao_guarda_carga_invalidada_e_respeita_capacidade(self, db_session, conferencia_criada):
+        """Testa que um estado lido antes de uma invalidação não volta ao cache e que o cache é limitado."""
+        from app.core.estado_conferencias import EstadoConferencias
+        from app.models.conferencia import Conferencia, StatusConferencia
+
+        estados = EstadoConferencias(ttl_segundos=60, capacidade=1)
+
+        class SessaoComInvalidacao:
+            """Simula o encerramento da conferência por outra requisição durante a consulta."""
+
+            def execute(self, stmt):
+                resultado = db_session.execute(stmt)
+                estados.invalidar(conferencia_criada.id)
+                return resultado
+
+        assert (
+            estados.obter(SessaoComInvalidacao(), conferencia_criada.id).status == StatusConferencia.INICIADA
+        )
+        assert estados.estatisticas()["itens"] == 0
+
+        encerrada = Conferencia(
+            status=StatusConferencia.FINALIZADA, id_funcionario=conferencia_criada.id_funcionario
+        )
+        db_session.add(encerrada)
+        db_session.commit()
+        estados.obter(db_session, conferencia_criada.id)
+        estados.obter(db_session, encerrada.id)
+
+        # Encerradas também saem do cache quando ele passa da capacidade
+        assert estados.estatisticas()["itens"] == 1
+        estados.obter(db_session, conferencia_criada.id)
+        assert estados.estatisticas()["itens"] == 1
+        assert estados.falhas == 4
+
+    def test_catalogo_nao_guarda_carga_invalidada_durante_a_consulta(self, db_session, produto_criado):
+        """Testa que uma invalidação durante a busca de um código faltante não é desfeita pela carga."""
+        from app.core.catalogo import CatalogoPecas
+
+        catalogo = CatalogoPecas(ttl_segundos=60)
+
+        class SessaoComInvalidacao:
+            """Simula a alteração da peça (e sua invalidação) por outra requisição durante a consulta."""
+
+            def execute(self, stmt):
+                linhas = db_session.execute(stmt).all()
+                catalogo.invalidar(produto_criado.codigo_produto)
+                return linhas
+
+        # A carga completa invalidada não é guardada; a busca do código faltante também não
+        resolvidos = catalogo.resolver(SessaoComInvalidacao(), [produto_criado.codigo_produto])
+
+        assert resolvidos[produto_criado.codigo_produto][0] == produto_criado.id
+        assert catalogo.estatisticas()["itens"] == 0
+
+        resolvidos = catalogo.resolver(db_session, [produto_criado.codigo_produto])
+        assert catalogo.estatisticas()["itens"] == 1
+
+    def test_reprocessar_quarentena(
+        self, client, admin_headers, conferencia_criada, produto_criado, db_session
+    ):
+        """Testa que leituras em quarentena são contabilizadas depois que a peça é cadastrada."""
+        agora = datetime.now().isoformat()
+        lote = [
+            {"codigo_produto": "PT002", "rfid_etiqueta": tag, "lido_em": agora}
+            for tag in ["ETIQ001", "ETIQ002", "ETIQ001"]
+        ]
+        lote.append({"codigo_produto": "PT003", "rfid_etiqueta": "ETIQ003", "lido_em": agora})
+        response = client.post(
+            f"/conferencia/{conferencia_criada.id}/leitura", json=lote, headers=admin_headers
+        )
+        assert response.json()["resumo"]["em_quarentena"] == 3
+
+        response = client.get(f"/conferencia/{conferencia_criada.id}/quarentena", headers=admin_headers)
+        assert response.json() == [
+            {"codigo_produto": "PT002", "tags": 2},
+            {"codigo_produto": "PT003", "tags": 1},
+        ]
+
+        peca = {"nome": "Produto 2", "codigo_produto": "PT002", "descricao": "Produto 2", "localizacao": "A2"}
+        assert client.post("/pecas", json=peca, headers=admin_headers).status_code in (200, 201)
+
+        response = client.post(
+            f"/conferencia/{conferencia_criada.id}/quarentena/reprocessar", headers=admin_headers
+        )
+        assert response.status_code == 200
+        assert response.json()["contabilizadas"] == 2
+        assert response.json()["codigos_desconhecidos"] == ["PT003"]
+
+        response = client.get(f"/conferencia/{conferencia_criada.id}/quarentena", headers=admin_headers)
+        assert response.json() == [{"codigo_produto": "PT003", "tags": 1}]
+
+        response = client.get(
+            f"/conferencia/{conferencia_criada.id}/leituras",
+            params={"limit": 10, "offset": 0},
+            headers=admin_headers,
+        )
+        assert [item["quantidade"] for item in response.json()["items"]] == [2]
+
+    def test_reprocessar_quarentena_como_stockist(self, client, stockist_headers, conferencia_criada):
+        """Testa que somente administradores reprocessam a quarentena."""
+        response = client.post(
+            f"/conferencia/{conferencia_criada.id}/quarentena/reprocessar", headers=stockist_headers
+        )
+
+        assert response.status_code == 403
+
+    def test_contadores_write_behind_mantem_leituras_exatas(
+        self, client, admin_headers, conferencia_criada, produto_criado, db_session, monkeypatch
+    ):
+        """Testa que as quantidades adiadas em memória são gravadas antes da listagem de leituras."""
+        from app.core.contadores_leitura import contadores_leitura
+        from app.models.conferencia import Leitura
+
+        monkeypatch.setattr(contadores_leitura, "ativo", True)
+        agora = datetime.now().isoformat()
+        url = f"/conferencia/{conferencia_criada.id}/leitura"
+
+        for tag in ["ETIQ001", "ETIQ002"]:
+            lote = [{"codigo_produto": produto_criado.codigo_produto, "rfid_etiqueta": tag, "lido_em": agora}]
+            assert client.post(url, json=lote, headers=admin_headers).json()["resumo"]["contabilizadas"] == 1
+
+        assert db_session.query(Leitura).count() == 0
+        assert contadores_leitura.estatisticas()["pendentes"] == 1
+
+        response = client.get(
+            f"/conferencia/{conferencia_criada.id}/leituras",
+            params={"limit": 10, "offset": 0},
+            headers=admin_headers,
+        )
+        assert [item["quantidade"] for item in response.json()["items"]] == [2]
+        assert contadores_leitura.estatisticas()["pendentes"] == 0
+
+    def test_registrar_lote_de_leituras(self, client, admin_headers, conferencia_criada, produto_criado):
+        """Testa o endpoint de upload em lote, que mantém a deduplicação do caminho padrão."""
+        agora = datetime.now().isoformat()
+        lote = [
+            {
+                "codigo_produto": produto_criado.codigo_produto,
+                "rfid_etiqueta": f"ETIQ{i % 50:03d}",
+                "lido_em": agora,
+            }
+            for i in range(200)
+        ]
+
+        response = client.post(
+            f"/conferencia/{conferencia_criada.id}/leitura/lote", json=lote, headers=admin_headers
+        )
+        assert response.status_code == 200
+        assert response.json()["id"] == conferencia_criada.id
+
+        response = client.get(
+            f"/conferencia/{conferencia_criada.id}/leituras",
+            params={"limit": 10, "offset": 0},
+            headers=admin_headers,
+        )
+        assert response.json()["items"][0]["quantidade"] == 50
+
+    def test_registrar_leituras_ndjson(
+        self, client, admin_headers, conferencia_criada, produto_criado, monkeypatch
+    ):
+        """Testa o envio NDJSON gravado em vários lotes, com a mesma deduplicação do JSON."""
+        from app.settings import app_settings
+
+        monkeypatch.setattr(app_settings, "INGESTAO_NDJSON_LINHAS_POR_LOTE", 3)
+        agora = datetime.now().isoformat()
+        linhas = [
+            json.dumps(
+                {
+                    "codigo_produto": produto_criado.codigo_produto,
+                    "rfid_etiqueta": f"ETIQ{i % 4:03d}",
+                    "lido_em": agora,
+                }
+            )
+            for i in range(10)
+        ]
+
+        response = client.post(
+            f"/conferencia/{conferencia_criada.id}/leitura",
+            content="\n".join(linhas) + "\n",
+            headers={**admin_headers, "Content-Type": "application/x-ndjson"},
+        )
+        assert response.status_code == 200
+        assert response.json()["id"] == conferencia_criada.id
+
+        response = client.get(
+            f"/conferencia/{conferencia_criada.id}/leituras",
+            params={"limit": 10, "offset": 0},
+            headers=admin_headers,
+        )
+        assert response.json()["items"][0]["quantidade"] == 4
+
+    def test_registrar_leituras_ndjson_linha_invalida(self, client, admin_headers, conferencia_criada):
+        """Testa que uma linha NDJSON inválida retorna 422 indicando a linha."""
+        corpo = '{"codigo_produto": "PT001", "rfid_etiqueta": "ETIQ001", "lido_em": "2025-01-01T00:00:00"}\n{"codigo_produto": "PT001"}\n'
+
+        response = client.post(
+            f"/conferencia/{conferencia_criada.id}/leitura",
+            content=corpo,
+            headers={**admin_headers, "Content-Type": "application/x-ndjson"},
+        )
+
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["loc"][:2] == ["body", "linha 2"]
+
+    def test_registrar_leituras_ndjson_linha_muito_longa(self, client, admin_headers, conferencia_criada):
+        """Testa que uma linha NDJSON acima do limite é recusada com 413, mesmo sem quebra de linha."""
+        corpo = '{"codigo_produto": "' + "X" * 10_000 + '"}'
+
+        response = client.post(
+            f"/conferencia/{conferencia_criada.id}/leitura",
+            content=corpo,
+            headers={**admin_headers, "Content-Type": "application/x-ndjson"},
+        )
+
+        assert response.status_code == 413
+
+    @pytest.mark.parametrize("tipo", ["application/json", "application/x-ndjson"])
+    def test_registrar_leituras_corpo_muito_grande(
+        self, client, admin_headers, conferencia_criada, monkeypatch, tipo
+    ):
+        """Testa que JSON e NDJSON acima de `INGESTAO_CORPO_MAXIMO_BYTES` são recusados com 413."""
+        from app.settings import app_settings
+
+        monkeypatch.setattr(app_settings, "INGESTAO_CORPO_MAXIMO_BYTES", 1024)
+        leitura = {"codigo_produto": "PT001", "rfid_etiqueta": "ETIQ001", "lido_em": "2025-01-01T00:00:00"}
+        corpo = json.dumps([leitura] * 20) if tipo == "application/json" else (json.dumps(leitura) + "\n") * 20
+
+        response = client.post(
+            f"/conferencia/{conferencia_criada.id}/leitura",
+            content=corpo,
+            headers={**admin_headers, "Content-Type": tipo},
+        )
+
+        assert response.status_code == 413
+
+    def test_registrar_leituras_formato_nao_suportado(self, client, admin_headers, conferencia_criada):
+        """Testa que um Content-Type desconhecido é rejeitado com 415."""
+        response = client.post(
+            f"/conferencia/{conferencia_criada.id}/leitura",
+            content="ETIQ001;PT001",
+            headers={**admin_headers, "Content-Type": "text/csv"},
+        )
+
+        assert response.status_code == 415
+
+    def test_registrar_leituras_formato_binario(
+        self, client, admin_headers, conferencia_criada, produto_criado
+    ):
+        """Testa o envio no formato binário compacto, com a mesma deduplicação do JSON."""
+        from app.core.leitura_binaria import TIPO_CONTEUDO, codificar
+
+        agora = datetime.now()
+        corpo = codificar(
+            (f"E2000017221101441890{i % 3:04X}", produto_criado.codigo_produto, agora) for i in range(5)
+        )
+
+        response = client.post(
+            f"/conferencia/{conferencia_criada.id}/leitura",
+            content=corpo,
+            headers={**admin_headers, "Content-Type": TIPO_CONTEUDO},
+        )
+        assert response.status_code == 200
+
+        response = client.get(
+            f"/conferencia/{conferencia_criada.id}/leituras",
+            params={"limit": 10, "offset": 0},
+            headers=admin_headers,
+        )
+        assert response.json()["items"][0]["quantidade"] == 3
+
+    def test_registrar_leituras_formato_binario_malformado(
+        self, client, admin_headers, conferencia_criada, produto_criado
+    ):
+        """Testa que um corpo binário truncado é rejeitado com 422 sem gravar nada."""
+        from app.core.leitura_binaria import TIPO_CONTEUDO, codificar
+
+        corpo = codificar([("E20000172211014418900001", produto_criado.codigo_produto, datetime.now())])
+
+        response = client.post(
+            f"/conferencia/{conferencia_criada.id}/leitura",
+            content=corpo[:-1],
+            headers={**admin_headers, "Content-Type": TIPO_CONTEUDO},
+        )
+
+        assert response.status_code == 422
+
+    def test_registrar_leitura_assincrona(self, client, admin_headers, conferencia_criada, produto_criado):
+        """Testa que lotes assíncronos recebem sequência e são gravados ao encerrar a conferência."""
+        agora = datetime.now().isoformat()
+        url = f"/conferencia/{conferencia_criada.id}/leitura"
+
+        for sequencia, tag in enumerate(["ETIQ001", "ETIQ002"], start=1):
+            lote = [{"codigo_produto": produto_criado.codigo_produto, "rfid_etiqueta": tag, "lido_em": agora}]
+            response = client.post(url, params={"assincrono": True}, json=lote, headers=admin_headers)
+            assert response.status_code == 202
+            assert response.json() == {"conferencia_id": conferencia_criada.id, "sequencia": sequencia}
+
+        response = client.get(f"/conferencia/{conferencia_criada.id}/ingestao", headers=admin_headers)
+        assert response.json()["sequencia_recebida"] == 2
+        assert response.json()["sequencia_aplicada"] == 0
+        assert response.json()["lotes_pendentes"] == 2
+
+        response = client.put(f"/conferencia/{conferencia_criada.id}/encerrar", headers=admin_headers)
+        assert response.status_code == 200
+
+        response = client.get(f"/conferencia/{conferencia_criada.id}/ingestao", headers=admin_headers)
+        assert response.json()["sequencia_aplicada"] == 2
+        assert response.json()["lotes_pendentes"] == 0
+
+        response = client.get(
+            f"/conferencia/{conferencia_criada.id}/leituras",
+            params={"limit": 10, "offset": 0},
+            headers=admin_headers,
+        )
+        assert response.json()["items"][0]["quantidade"] == 2
+
+    def test_tags_vistas_descartadas_quando_outro_worker_encerra(
+        self, db_session, conferencia_criada, produto_criado, monkeypatch
+    ):
+        """Testa que o worker esquece as tags de uma conferência encerrada por outro worker."""
+        from app.core.estado_conferencias import estado_conferencias
+        from app.core.tags_vistas import tags_vistas
+        from app.crud.conferencia import registrar_leituras_em_conferencia
+        from app.models.conferencia import Conferencia, StatusConferencia
+        from app.schemas.conferencia import LeituraCreate
+
+        # Sem TTL, o estado em andamento é sempre recarregado do banco
+        monkeypatch.setattr(estado_conferencias, "_ttl_segundos", 0)
+        estado_conferencias.limpar()
+        tags_vistas.descartar()
+        leituras = [
+            LeituraCreate(
+                codigo_produto=produto_criado.codigo_produto, rfid_etiqueta=tag, lido_em=datetime.now()
+            )
+            for tag in ["ETIQ001", "ETIQ002"]
+        ]
+        registrar_leituras_em_conferencia(db_session, conferencia_criada.id, leituras)
+        assert tags_vistas.estatisticas()["tags"] == 2
+
+        # Outro worker encerra a conferência: este só descobre pelo aviso ou ao recarregar o estado
+        db_session.query(Conferencia).filter_by(id=conferencia_criada.id).update(
+            {"status": StatusConferencia.FINALIZADA}
+        )
+        db_session.commit()
+
+        assert (
+            estado_conferencias.obter(db_session, conferencia_criada.id).status == StatusConferencia.FINALIZADA
+        )
+        assert tags_vistas.estatisticas()["conferencias"] == 0
+
+        # Pelo aviso do canal de conferências o descarte acontece sem depender de uma nova gravação
+        tags_vistas.registrar(conferencia_criada.id, ["ETIQ001"])
+        estado_conferencias.status_alterado(str(conferencia_criada.id))
+        assert tags_vistas.estatisticas()["conferencias"] == 0
+        assert estado_conferencias.estatisticas()["itens"] == 0
+
+    def test_limpeza_de_tags_de_conferencia_encerrada(
+        self, client, admin_headers, conferencia_criada, produto_criado, db_session, monkeypatch
+    ):
+        """Testa que as tags de uma conferência encerrada são descartadas pela limpeza após a carência."""
+        from app.core.limpeza_tags import limpeza_tags
+        from app.models.conferencia import TagLida
+
+        agora = datetime.now().isoformat()
+        lote = [
+            {"codigo_produto": produto_criado.codigo_produto, "rfid_etiqueta": "ETIQ001", "lido_em": agora}
+        ]
+        client.post(f"/conferencia/{conferencia_criada.id}/leitura", json=lote, headers=admin_headers)
+
+        # A conferência ainda está em andamento: nada é descartado
+        assert limpeza_tags.limpar(db_session) == 0
+        assert db_session.query(TagLida).count() == 1
+
+        # Recém-encerrada: as tags ficam durante a carência, para lotes ainda na fila de outros workers
+        client.put(f"/conferencia/{conferencia_criada.id}/encerrar", headers=admin_headers)
+        monkeypatch.setattr(limpeza_tags, "carencia_segundos", 300)
+        assert limpeza_tags.limpar(db_session) == 0
+        assert db_session.query(TagLida).count() == 1
+
+        monkeypatch.setattr(limpeza_tags, "carencia_segundos", 0)
+        assert limpeza_tags.limpar(db_session) == 1
+        assert db_session.query(TagLida).count() == 0
+
+    def test_reenvio_de_leituras_com_chave_de_idempotencia(
+        self, client, admin_headers, conferencia_criada, produto_criado
+    ):
+        """Testa que um reenvio com a mesma chave não grava, mesmo após encerrar a conferência."""
+        agora = datetime.now().isoformat()
+        url = f"/conferencia/{conferencia_criada.id}/leitura"
+        headers = {**admin_headers, "Idempotency-Key": "coletor-1-lote-1"}
+
+        lote = [
+            {"codigo_produto": produto_criado.codigo_produto, "rfid_etiqueta": "ETIQ001", "lido_em": agora}
+        ]
+        assert client.post(url, json=lote, headers=headers).status_code == 200
+
+        # Mesmo com uma tag nova no corpo, a chave já aplicada impede nova gravação
+        lote.append(
+            {"codigo_produto": produto_criado.codigo_produto, "rfid_etiqueta": "ETIQ002", "lido_em": agora}
+        )
+        response = client.post(url, json=lote, headers=headers)
+        assert response.status_code == 200
+        assert response.json()["id"] == conferencia_criada.id
+
+        client.put(f"/conferencia/{conferencia_criada.id}/encerrar", headers=admin_headers)
+        response = client.post(url, json=lote, headers=headers)
+        assert response.status_code == 200
+        assert response.json()["status"] == "finalizada"
+
+        response = client.get(
+            f"/conferencia/{conferencia_criada.id}/leituras",
+            params={"limit": 10, "offset": 0},
+            headers=admin_headers,
+        )
+        assert response.json()["items"][0]["quantidade"] == 1
+
+    def test_reenvio_de_leituras_assincronas_com_chave_de_idempotencia(
+        self, client, admin_headers, conferencia_criada, produto_criado
+    ):
+        """Testa que lotes enfileirados duas vezes com a mesma chave são gravados uma única vez."""
+        agora = datetime.now().isoformat()
+        url = f"/conferencia/{conferencia_criada.id}/leitura"
+        headers = {**admin_headers, "Idempotency-Key": "coletor-1-lote-1"}
+
+        for tag in ["ETIQ001", "ETIQ002"]:
+            lote = [{"codigo_produto": produto_criado.codigo_produto, "rfid_etiqueta": tag, "lido_em": agora}]
+            response = client.post(url, params={"assincrono": True}, json=lote, headers=headers)
+            assert response.status_code == 202
+
+        client.put(f"/conferencia/{conferencia_criada.id}/encerrar", headers=admin_headers)
+
+        response = client.get(
+            f"/conferencia/{conferencia_criada.id}/leituras",
+            params={"limit": 10, "offset": 0},
+            headers=admin_headers,
+        )
+        assert response.json()["items"][0]["quantidade"] == 1
+
+    def test_reenvio_de_eventos_com_chave_de_idempotencia(
+        self, client, admin_headers, conferencia_criada, db_session
+    ):
+        """Testa que um reenvio de eventos com a mesma chave não duplica os eventos."""
+        from app.models.conferencia import Evento
+
+        eventos = [
+            {"tipo": "PAUSA", "descricao": "Pausa para almoço", "ocorreu_em": datetime.now().isoformat()}
+        ]
+        headers = {**admin_headers, "Idempotency-Key": "coletor-1-evento-1"}
+
+        for _ in range(2):
+            response = client.post(
+                f"/conferencia/{conferencia_criada.id}/evento", json=eventos, headers=headers
+            )
+            assert response.status_code == 200
+
+        assert db_session.query(Evento).filter(Evento.conferencia_id == conferencia_criada.id).count() == 1
+
+    def test_escritor_da_fila_grava_por_tempo(self, db_session, conferencia_criada, produto_criado):
+        """Testa que o escritor em segundo plano grava os lotes quando o intervalo expira."""
+        from contextlib import contextmanager
+
+        from app.core.fila_ingestao import FilaIngestao
+        from app.models.conferencia import Leitura
+        from app.schemas.conferencia import LeituraCreate
+
+        @contextmanager
+        def fabrica():
+            yield db_session
+
+        fila = FilaIngestao(leituras_por_transacao=1000, intervalo_segundos=0.05, max_leituras_pendentes=1000)
+        fila.iniciar(fabrica)
+        try:
+            leitura = LeituraCreate(
+                codigo_produto=produto_criado.codigo_produto, rfid_etiqueta="ETIQ001", lido_em=datetime.now()
+            )
+            fila.enfileirar(conferencia_criada.id, [leitura])
+            for _ in range(100):
+                if fila.progresso(conferencia_criada.id)["sequencia_aplicada"] == 1:
+                    break
+                time.sleep(0.02)
+        finally:
+            fila.parar(fabrica)
+
+        assert fila.progresso(conferencia_criada.id)["sequencia_aplicada"] == 1
+        assert db_session.query(Leitura).filter_by(conferencia_id=conferencia_criada.id).one().quantidade == 1
+
+    def test_lote_com_erro_vai_para_lote_falho(
+        self, db_session, conferencia_criada, produto_criado, monkeypatch
+    ):
+        """Testa que um lote que falha em todas as tentativas é guardado e não trava os lotes seguintes."""
+        import app.core.fila_ingestao
+        from app.core.fila_ingestao import FilaIngestao
+        from app.core.tags_vistas import tags_vistas
+        from app.models.conferencia import Leitura, LoteFalho
+        from app.schemas.conferencia import LeituraCreate
+
+        tags_vistas.descartar()
+        aplicar_leituras = app.core.fila_ingestao.aplicar_leituras
+
+        def aplicar_com_erro(session, conferencia_id, leituras):
+            if any(leitura.rfid_etiqueta == "ETIQ-INVALIDA" for leitura in leituras):
+                raise ValueError("violação de constraint")
+            return aplicar_leituras(session, conferencia_id, leituras)
+
+        monkeypatch.setattr(app.core.fila_ingestao, "aplicar_leituras", aplicar_com_erro)
+        fila = FilaIngestao(
+            leituras_por_transacao=1000, intervalo_segundos=1, max_leituras_pendentes=1000, max_tentativas=3
+        )
+        for tag in ["ETIQ-INVALIDA", "ETIQ001"]:
+            leitura = LeituraCreate(
+                codigo_produto=produto_criado.codigo_produto, rfid_etiqueta=tag, lido_em=datetime.now()
+            )
+            fila.enfileirar(conferencia_criada.id, [leitura])
+
+        fila.descarregar(db_session, conferencia_criada.id)
+
+        progresso = fila.progresso(conferencia_criada.id)
+        assert progresso["sequencia_aplicada"] == 2
+        assert progresso["lotes_pendentes"] == 0
+        assert progresso["lotes_falhos"] == 1
+        falho = db_session.query(LoteFalho).one()
+        assert falho.sequencia == 1
+        assert falho.leituras[0]["rfid_etiqueta"] == "ETIQ-INVALIDA"
+        assert "violação de constraint" in falho.erro
+        assert db_session.query(Leitura).filter_by(conferencia_id=conferencia_criada.id).one().quantidade == 1
+
+    def test_lotes_de_outro_worker_gravados_apos_encerramento(
+        self, client, admin_headers, db_session, conferencia_criada, produto_criado
+    ):
+        """
+        Testa que lotes aceitos por outro worker antes do encerramento são gravados depois dele, e que
+        os recebidos após o encerramento são rejeitados.
+        """
+        from app.core.fila_ingestao import FilaIngestao
+        from app.models.conferencia import Leitura
+        from app.schemas.conferencia import LeituraCreate
+
+        # Fila de outro worker: o encerramento neste worker não a descarrega
+        outro_worker = FilaIngestao(
+            leituras_por_transacao=1000,
+            intervalo_segundos=1,
+            max_leituras_pendentes=1000,
+            prazo_apos_encerramento_segundos=60,
+        )
+
+        def enfileirar(tag: str):
+            leitura = LeituraCreate(
+                codigo_produto=produto_criado.codigo_produto, rfid_etiqueta=tag, lido_em=datetime.now()
+            )
+            outro_worker.enfileirar(conferencia_criada.id, [leitura])
+
+        enfileirar("ETIQ001")
+        assert (
+            client.put(f"/conferencia/{conferencia_criada.id}/encerrar", headers=admin_headers).status_code
+            == 200
+        )
+        enfileirar("ETIQ002")
+
+        outro_worker.descarregar(db_session)
+
+        progresso = outro_worker.progresso(conferencia_criada.id)
+        assert progresso["lotes_pendentes"] == 0
+        assert progresso["lotes_rejeitados"] == 1
+        assert db_session.query(Leitura).filter_by(conferencia_id=conferencia_criada.id).one().quantidade == 1
+
+    def test_stream_de_leituras(self, client, admin_token, conferencia_criada, produto_criado):
+        """Testa o stream WebSocket: autenticação na conexão, micro-lote e ack com totais."""
+        agora = datetime.now().isoformat()
+        url = f"/conferencia/{conferencia_criada.id}/stream?token={admin_token}"
+
+        with client.websocket_connect(url) as websocket:
+            websocket.send_json(
+                {"codigo_produto": produto_criado.codigo_produto, "rfid_etiqueta": "ETIQ001", "lido_em": agora}
+            )
+            websocket.send_json(
+                [
+                    {"codigo_produto": produto_criado.codigo_produto, "rfid_etiqueta": tag, "lido_em": agora}
+                    for tag in ["ETIQ002", "ETIQ003"]
+                ]
+            )
+            ack = websocket.receive_json()
+
+        assert ack == {
+            "lote": 1,
+            "leituras_recebidas": 3,
+            "leituras_processadas": 3,
+            "leituras_suprimidas": 0,
+            "leituras_em_quarentena": 0,
+            "erro": None,
+        }
+
+    def test_stream_encerra_quando_conferencia_e_excluida(
+        self, client, admin_token, conferencia_criada, produto_criado, monkeypatch
+    ):
+        """Testa que o stream fecha com violação de política se a conferência some durante a conexão."""
+        from starlette.websockets import WebSocketDisconnect
+
+        from app.core.estado_conferencias import estado_conferencias
+
+        obter = estado_conferencias.obter
+        chamadas = []
+
+        def obter_e_excluir(db, conferencia_id):
+            chamadas.append(conferencia_id)
+            return obter(db, conferencia_id) if len(chamadas) == 1 else None
+
+        monkeypatch.setattr(estado_conferencias, "obter", obter_e_excluir)
+        url = f"/conferencia/{conferencia_criada.id}/stream?token={admin_token}"
+        leitura = {
+            "codigo_produto": produto_criado.codigo_produto,
+            "rfid_etiqueta": "ETIQ001",
+            "lido_em": datetime.now().isoformat(),
+        }
+
+        with client.websocket_connect(url) as websocket:
+            websocket.send_json(leitura)
+            ack = websocket.receive_json()
+            with pytest.raises(WebSocketDisconnect) as exc_info:
+                websocket.receive_json()
+
+        assert ack["leituras_processadas"] == 0
+        assert ack["erro"] == "Conferência não encontrada"
+        assert exc_info.value.code == 1008
+
+    def test_stream_continua_apos_falha_do_banco(
+        self, client, admin_token, conferencia_criada, produto_criado, monkeypatch
+    ):
+        """Testa que uma falha do banco num micro-lote é confirmada com erro e a sessão segue utilizável."""
+        from sqlalchemy.exc import OperationalError
+
+        from app.routers import conferencia as router_conferencia
+
+        registrar = router_conferencia.registrar_leituras_em_conferencia
+        falhas = [OperationalError("INSERT", {}, Exception("conexão perdida"))]
+
+        def registrar_com_falha(db, conferencia_id, leituras):
+            if falhas:
+                raise falhas.pop()
+            return registrar(db, conferencia_id, leituras)
+
+        monkeypatch.setattr(router_conferencia, "registrar_leituras_em_conferencia", registrar_com_falha)
+        url = f"/conferencia/{conferencia_criada.id}/stream?token={admin_token}"
+        agora = datetime.now().isoformat()
+
+        with client.websocket_connect(url) as websocket:
+            websocket.send_json(
+                {"codigo_produto": produto_criado.codigo_produto, "rfid_etiqueta": "ETIQ001", "lido_em": agora}
+            )
+            primeiro = websocket.receive_json()
+            websocket.send_json(
+                {"codigo_produto": produto_criado.codigo_produto, "rfid_etiqueta": "ETIQ001", "lido_em": agora}
+            )
+            segundo = websocket.receive_json()
+
+        assert primeiro["erro"] == "Falha ao gravar o micro-lote"
+        assert primeiro["leituras_processadas"] == 0
+        assert segundo["erro"] is None
+        assert segundo["leituras_processadas"] == 1
+
+    def test_registrar_leitura_repetida_dentro_da_janela(
+        self, client, admin_headers, conferencia_criada, produto_criado, db_session
+    ):
+        """Testa que repetições da mesma tag dentro da janela de debounce são suprimidas antes do banco."""
+        inicio = datetime.now()
+        lote = [
+            {"codigo_produto": produto_criado.codigo_produto, "rfid_etiqueta": "ETIQ001", "lido_em": momento}
+            for momento in [
+                inicio.isoformat(),
+                (inicio + timedelta(milliseconds=500)).isoformat(),
+                (inicio + timedelta(milliseconds=1500)).isoformat(),
+            ]
+        ]
+
+        response = client.post(
+            f"/conferencia/{conferencia_criada.id}/leitura", json=lote, headers=admin_headers
+        )
+
+        assert response.status_code == 200
+        resumo = response.json()["resumo"]
+        assert resumo["recebidas"] == 3
+        assert resumo["suprimidas"] == 2
+        assert resumo["contabilizadas"] == 1
+        assert resumo["duplicadas"] == 0
+
+    def test_registrar_leitura_repetida_fora_da_janela(
+        self, client, admin_headers, conferencia_criada, produto_criado, db_session
+    ):
+        """Testa que a tag lida de novo após a janela passa pelo debounce e é tratada como duplicada."""
+        from app.models.conferencia import Leitura
+
+        inicio = datetime.now()
+        url = f"/conferencia/{conferencia_criada.id}/leitura"
+
+        for momento in [inicio, inicio + timedelta(seconds=10)]:
+            lote = [
+                {
+                    "codigo_produto": produto_criado.codigo_produto,
+                    "rfid_etiqueta": "ETIQ001",
+                    "lido_em": momento.isoformat(),
+                }
+            ]
+            response = client.post(url, json=lote, headers=admin_headers)
+
+        resumo = response.json()["resumo"]
+        assert resumo["suprimidas"] == 0
+        assert resumo["duplicadas"] == 1
+        leitura = db_session.query(Leitura).filter_by(conferencia_id=conferencia_criada.id).one()
+        assert leitura.quantidade == 1
+
+    def test_leitor_com_relogio_adiantado_nao_desliga_o_debounce(self):
+        """Testa que um `lido_em` adiantado em outra conferência não faz expirar as tags das demais."""
+        from app.core.debounce import DebounceLeituras
+        from app.schemas.conferencia import LeituraCreate
+
+        agora = [0.0]
+        debounce = DebounceLeituras(janela_ms=2000, relogio=lambda: agora[0])
+        inicio = datetime.now()
+
+        def enviar(conferencia_id: int, momento: datetime) -> int:
+            leitura = LeituraCreate(codigo_produto="PT001", rfid_etiqueta="ETIQ001", lido_em=momento)
+            aceitas, marcas = debounce.filtrar(conferencia_id, [leitura])
+            debounce.confirmar(marcas)
+            return len(aceitas)
+
+        aceitas = 0
+        for i in range(5):
+            aceitas += enviar(1, inicio + timedelta(milliseconds=100 * i))
+            # Leitor de outra conferência com o relógio um minuto à frente
+            enviar(2, inicio + timedelta(seconds=60 + i))
+            agora[0] += 0.1
+
+        assert aceitas == 1
+
+        # As entradas expiram pelo relógio do servidor, uma janela depois da última confirmação
+        agora[0] += 5
+        assert enviar(1, inicio + timedelta(milliseconds=600)) == 1
+
+    def test_reenvio_apos_fila_cheia_nao_e_suprimido(
+        self, client, admin_headers, conferencia_criada, produto_criado, monkeypatch
+    ):
+        """Testa que um lote recusado com 503 pode ser repetido com o mesmo `lido_em` sem ser suprimido."""
+        from app.core.fila_ingestao import fila_ingestao
+
+        agora = datetime.now().isoformat()
+        url = f"/conferencia/{conferencia_criada.id}/leitura"
+        lote = [
+            {"codigo_produto": produto_criado.codigo_produto, "rfid_etiqueta": tag, "lido_em": agora}
+            for tag in ["ETIQ001", "ETIQ002"]
+        ]
+
+        with monkeypatch.context() as m:
+            m.setattr(fila_ingestao, "_max_leituras_pendentes", 0)
+            response = client.post(url, params={"assincrono": True}, json=lote, headers=admin_headers)
+            assert response.status_code == 503
+
+        response = client.post(url, params={"assincrono": True}, json=lote, headers=admin_headers)
+        assert response.status_code == 202
+
+        client.put(f"/conferencia/{conferencia_criada.id}/encerrar", headers=admin_headers)
+        response = client.get(url + "s", params={"limit": 10, "offset": 0}, headers=admin_headers)
+        assert response.json()["items"][0]["quantidade"] == 2
+
+    def test_stream_de_leituras_sem_token(self, client, conferencia_criada):
+        """Testa que o stream recusa conexões sem token."""
+        from starlette.websockets import WebSocketDisconnect
+
+        with pytest.raises(WebSocketDisconnect):
+            with client.websocket_connect(f"/conferencia/{conferencia_criada.id}/stream") as websocket:
+                websocket.receive_json()
+
+
+@pytest.fixture
+def produto_pg(pg_session):
+    """Cria um produto (e o usuário que o cadastra) no Postgres de testes."""
+    from app.core.catalogo import catalogo_pecas
+    from app.core.tags_vistas import tags_vistas
+    from app.crud.usuario import create_usuario
+    from app.schemas.usuario import RoleEnum, UsuarioCreate
+
+    # Os caches em memória podem guardar ids do SQLite dos outros testes
+    catalogo_pecas.invalidar()
+    tags_vistas.descartar()
+    admin = create_usuario(
+        pg_session, UsuarioCreate(username="admin_pg", password="admin123", role=RoleEnum.admin)
+    )
+    produto_data = PecaCreate(
+        nome="Produto Teste", codigo_produto="PT001", descricao="Produto", localizacao="A1"
+    )
+    return create_peca(pg_session, produto_data, admin)
+
+
+@pytest.fixture
+def conferencia_pg(pg_session, produto_pg):
+    """Cria uma conferência ativa (com sua partição de `tag_lida`) no Postgres de testes."""
+    return criar_conferencia(pg_session, ConferenciaCreate(username_funcionario="admin_pg"))
+
+
+class TestConferenciaPostgres:
+    """Testes dos caminhos que só existem no Postgres: partições de `tag_lida`, COPY e LISTEN/NOTIFY."""
+
+    @staticmethod
+    def _leituras(*tags: str, codigo_produto: str = "PT001"):
+        from app.schemas.conferencia import LeituraCreate
+
+        return [
+            LeituraCreate(codigo_produto=codigo_produto, rfid_etiqueta=tag, lido_em=datetime.now())
+            for tag in tags
+        ]
+
+    @staticmethod
+    def _particao(pg_session, conferencia_id: int) -> str | None:
+        from sqlalchemy import text
+
+        return pg_session.scalar(
+            text("SELECT to_regclass(:nome)::text"), {"nome": f"tag_lida_{conferencia_id}"}
+        )
+
+    def test_particao_descartada_apos_encerrar(self, pg_session, conferencia_pg, monkeypatch):
+        """Testa que a conferência grava na própria partição e que a limpeza a descarta após a carência."""
+        from sqlalchemy import text
+
+        from app.core.limpeza_tags import limpeza_tags
+        from app.crud.conferencia import mudar_status_conferencia, registrar_leituras_em_conferencia
+        from app.models.conferencia import StatusConferencia
+
+        assert self._particao(pg_session, conferencia_pg.id) == f"tag_lida_{conferencia_pg.id}"
+        registrar_leituras_em_conferencia(pg_session, conferencia_pg.id, self._leituras("ETIQ001"))
+        assert pg_session.scalar(text(f"SELECT count(*) FROM tag_lida_{conferencia_pg.id}")) == 1
+
+        mudar_status_conferencia(pg_session, conferencia_pg, StatusConferencia.FINALIZADA)
+        monkeypatch.setattr(limpeza_tags, "carencia_segundos", 300)
+        assert limpeza_tags.limpar(pg_session) == 0
+
+        monkeypatch.setattr(limpeza_tags, "carencia_segundos", 0)
+        assert limpeza_tags.limpar(pg_session) == 1
+        assert self._particao(pg_session, conferencia_pg.id) is None
+
+    def test_gravacao_apos_descartar_particao_vai_para_particao_padrao(
+        self, pg_session, conferencia_pg, monkeypatch
+    ):
+        """Testa que gravar depois do descarte da partição não falha e que a limpeza apaga essas tags."""
+        from sqlalchemy import text
+
+        from app.core.limpeza_tags import limpeza_tags
+        from app.crud.conferencia import mudar_status_conferencia, registrar_leituras_em_conferencia
+        from app.models.conferencia import StatusConferencia
+
+        monkeypatch.setattr(limpeza_tags, "carencia_segundos", 0)
+        mudar_status_conferencia(pg_session, conferencia_pg, StatusConferencia.FINALIZADA)
+        assert limpeza_tags.limpar(pg_session) == 1
+
+        resultado = registrar_leituras_em_conferencia(pg_session, conferencia_pg.id, self._leituras("ETIQ001"))
+
+        assert resultado.contabilizadas == 1
+        assert pg_session.scalar(text("SELECT count(*) FROM tag_lida_default")) == 1
+        limpeza_tags.limpar(pg_session)
+        assert pg_session.scalar(text("SELECT count(*) FROM tag_lida_default")) == 0
+
+    def test_limpeza_roda_em_um_worker_por_vez(self, pg_session, conferencia_pg, monkeypatch):
+        """Testa que, com o advisory lock em outra conexão (outro worker), a limpeza não descarta nada."""
+        from sqlalchemy import func, select
+
+        from app.core.limpeza_tags import CHAVE_LOCK_LIMPEZA, limpeza_tags
+        from app.crud.conferencia import mudar_status_conferencia
+        from app.models.conferencia import StatusConferencia
+
+        monkeypatch.setattr(limpeza_tags, "carencia_segundos", 0)
+        mudar_status_conferencia(pg_session, conferencia_pg, StatusConferencia.FINALIZADA)
+
+        with pg_session.get_bind().connect() as outro_worker:
+            outro_worker.scalar(select(func.pg_advisory_lock(CHAVE_LOCK_LIMPEZA)))
+            try:
+                assert limpeza_tags.limpar(pg_session) == 0
+                assert self._particao(pg_session, conferencia_pg.id) is not None
+            finally:
+                outro_worker.scalar(select(func.pg_advisory_unlock(CHAVE_LOCK_LIMPEZA)))
+
+        # Encerra a transação de leitura da sessão, que o DETACH esperaria terminar
+        pg_session.rollback()
+        assert limpeza_tags.limpar(pg_session) == 1
+
+    def test_particao_ocupada_fica_para_a_proxima_rodada(self, pg_session, conferencia_pg, monkeypatch):
+        """Testa que o DETACH desiste após o `lock_timeout` se `tag_lida` está em uso e descarta depois."""
+        from sqlalchemy import text
+
+        from app.core.limpeza_tags import limpeza_tags
+        from app.crud.conferencia import mudar_status_conferencia
+        from app.models.conferencia import StatusConferencia
+
+        monkeypatch.setattr("app.core.limpeza_tags.TEMPO_MAXIMO_TRAVA_MS", 100)
+        monkeypatch.setattr(limpeza_tags, "carencia_segundos", 0)
+        mudar_status_conferencia(pg_session, conferencia_pg, StatusConferencia.FINALIZADA)
+
+        with pg_session.get_bind().connect() as leitura_em_andamento:
+            leitura_em_andamento.execute(text("SELECT count(*) FROM tag_lida"))
+            assert limpeza_tags.limpar(pg_session) == 0
+            assert self._particao(pg_session, conferencia_pg.id) is not None
+            leitura_em_andamento.rollback()
+
+        pg_session.rollback()
+        assert limpeza_tags.limpar(pg_session) == 1
+        assert self._particao(pg_session, conferencia_pg.id) is None
+
+    def test_registrar_leituras_via_copy(self, pg_session, conferencia_pg):
+        """Testa o caminho COPY: deduplicação, quarentena, soma das quantidades e idempotência."""
+        from app.crud.conferencia import registrar_leituras_via_copy
+        from app.models.conferencia import Leitura
+
+        leituras = self._leituras("ETIQ001", "ETIQ002", "ETIQ001") + self._leituras(
+            "ETIQ003", codigo_produto="DESCONHECIDO"
+        )
+
+        resultado = registrar_leituras_via_copy(pg_session, conferencia_pg.id, leituras, "coletor-1-lote-1")
+
+        assert resultado.contabilizadas == 2
+        assert resultado.quarentena == {"DESCONHECIDO": 1}
+        assert registrar_leituras_via_copy(pg_session, conferencia_pg.id, leituras, "coletor-1-lote-1") is None
+        assert registrar_leituras_via_copy(pg_session, conferencia_pg.id, leituras).contabilizadas == 0
+        assert pg_session.query(Leitura).filter_by(conferencia_id=conferencia_pg.id).one().quantidade == 2
+
+    def test_copy_ignora_produtos_de_outra_zona(self, pg_session, produto_pg):
+        """Testa que o caminho COPY aplica o mesmo filtro de zona do caminho padrão."""
+        from app.crud.conferencia import registrar_leituras_via_copy
+
+        conferencia = criar_conferencia(
+            pg_session, ConferenciaCreate(username_funcionario="admin_pg", zona="B2")
+        )
+
+        resultado = registrar_leituras_via_copy(pg_session, conferencia.id, self._leituras("ETIQ001"))
+
+        assert resultado.contabilizadas == 0
+        assert resultado.fora_da_zona == 1
+        assert resultado.tags_gravadas == []
+
+    def test_criacao_de_conferencias_conflitantes_serializada(self, pg_session, produto_pg):
+        """Testa que uma conferência de zona espera a geral que outro worker está criando e é recusada."""
+        import threading
+
+        from sqlalchemy import func, select
+        from sqlalchemy.orm import Session
+
+        from app.core.exceptions import ConferenciaAlreadyOpened
+        from app.crud.conferencia import CHAVE_LOCK_CONFERENCIAS
+        from app.models.conferencia import Conferencia, StatusConferencia
+        from app.models.usuario import Usuario
+
+        funcionario = pg_session.query(Usuario).filter_by(username="admin_pg").one()
+        pg_session.commit()
+        erros = []
+
+        def criar_de_zona():
+            try:
+                criar_conferencia(pg_session, ConferenciaCreate(username_funcionario="admin_pg", zona="A1"))
+            except ConferenciaAlreadyOpened as erro:
+                erros.append(erro)
+
+        with Session(bind=pg_session.get_bind()) as outro_worker:
+            # A conferência geral está sendo criada, ainda sem commit, sob o mesmo advisory lock
+            outro_worker.execute(select(func.pg_advisory_xact_lock(CHAVE_LOCK_CONFERENCIAS)))
+            outro_worker.add(Conferencia(status=StatusConferencia.INICIADA, id_funcionario=funcionario.id))
+            outro_worker.flush()
+
+            thread = threading.Thread(target=criar_de_zona)
+            thread.start()
+            thread.join(timeout=1)
+            assert thread.is_alive()
+
+            outro_worker.commit()
+            thread.join(timeout=10)
+
+        assert len(erros) == 1
+
+    def test_notificacoes_entregues_aos_assinantes(self, pg_session):
+        """Testa o LISTEN/NOTIFY: o assinante recebe None ao conectar e depois o payload publicado."""
+        import queue
+
+        from app.core.notificacoes import OuvinteNotificacoes, notificar
+
+        recebidas = queue.Queue()
+        ouvinte = OuvinteNotificacoes()
+        ouvinte.assinar("canal_de_teste", recebidas.put)
+        ouvinte.iniciar(pg_session.get_bind().url.render_as_string(hide_password=False))
+        try:
+            assert recebidas.get(timeout=10) is None
+            notificar(pg_session.connection(), "canal_de_teste", "mensagem")
+            pg_session.commit()
+            assert recebidas.get(timeout=10) == "mensagem"
+        finally:
+            ouvinte.parar()
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+
+from app.crud.conferencia import criar_conferencia
+from app.crud.peca import create_peca
+from app.schemas.conferencia import ConferenciaCreate
+from app.schemas.peca import PecaCreate
+
+
+class TestDiagnostico:
+    """Testes de integração para o endpoint de diagnóstico."""
+
+    def test_diagnostico_como_stockist(self, client, stockist_headers):
+        """Testa que stockist não acessa o diagnóstico."""
+        response = client.get("/diagnostico", headers=stockist_headers)
+
+        assert response.status_code == 403
+
+    def test_diagnostico_conta_acertos_do_catalogo(self, client, admin_headers, admin_user, db_session):
+        """Testa que a ingestão conta falhas e acertos no catálogo de peças em cache."""
+        create_peca(
+            db_session,
+            PecaCreate(nome="Peça", codigo_produto="PT001", descricao="Peça", localizacao="A1"),
+            admin_user,
+        )
+        conferencia = criar_conferencia(
+            db_session, ConferenciaCreate(username_funcionario=admin_user.username)
+        )
+        agora = datetime.now().isoformat()
+
+        for tag in ["ETIQ001", "ETIQ002"]:
+            lote = [{"codigo_produto": "PT001", "rfid_etiqueta": tag, "lido_em": agora}]
+            client.post(f"/conferencia/{conferencia.id}/leitura", json=lote, headers=admin_headers)
+
+        response = client.get("/diagnostico", headers=admin_headers)
+
+        assert response.status_code == 200
+        catalogo = response.json()["catalogo_pecas"]
+        assert catalogo["falhas"] == 1
+        assert catalogo["acertos"] == 1
+
+    def test_diagnostico_conta_tags_repetidas_descartadas(self, client, admin_headers, admin_user, db_session):
+        """Testa que tags já gravadas são descartadas em memória e esquecidas ao encerrar a conferência."""
+        create_peca(
+            db_session,
+            PecaCreate(nome="Peça", codigo_produto="PT001", descricao="Peça", localizacao="A1"),
+            admin_user,
+        )
+        conferencia = criar_conferencia(
+            db_session, ConferenciaCreate(username_funcionario=admin_user.username)
+        )
+        inicio = datetime.now()
+
+        # Leituras espaçadas além da janela de debounce, para que cheguem ao filtro de tags vistas
+        for segundos in [0, 10, 20]:
+            lido_em = (inicio + timedelta(seconds=segundos)).isoformat()
+            lote = [{"codigo_produto": "PT001", "rfid_etiqueta": "ETIQ001", "lido_em": lido_em}]
+            client.post(f"/conferencia/{conferencia.id}/leitura", json=lote, headers=admin_headers)
+
+        tags = client.get("/diagnostico", headers=admin_headers).json()["tags_vistas"]
+        assert tags == {"conferencias": 1, "tags": 1, "descartadas": 2}
+
+        client.put(f"/conferencia/{conferencia.id}/encerrar", headers=admin_headers)
+
+        tags = client.get("/diagnostico", headers=admin_headers).json()["tags_vistas"]
+        assert tags["conferencias"] == 0
+
+    def test_diagnostico_conta_leituras_suprimidas(self, client, admin_headers, admin_user, db_session):
+        """Testa que o diagnóstico expõe as leituras suprimidas pela janela de debounce."""
+        conferencia = criar_conferencia(
+            db_session, ConferenciaCreate(username_funcionario=admin_user.username)
+        )
+        lote = [{"codigo_produto": "PT001", "rfid_etiqueta": "ETIQ001", "lido_em": datetime.now().isoformat()}]
+
+        for _ in range(3):
+            client.post(f"/conferencia/{conferencia.id}/leitura", json=lote, headers=admin_headers)
+
+        debounce = client.get("/diagnostico", headers=admin_headers).json()["debounce"]
+        assert debounce["tags"] == 1
+        assert debounce["aceitas"] == 1
+        assert debounce["suprimidas"] == 2
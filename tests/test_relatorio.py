@@ -200,6 +200,71 @@ class TestRelatorio:
         assert len(data["metricas_por_funcionario"]) == 0
         assert len(data["funcionarios_mais_rapidos"]) == 0
 
+    def test_metricas_calculadas_em_uma_consulta(
+        self, client, admin_headers, db_session, conferencias_multiplas_datas, stockist_user, admin_user
+    ):
+        """Testa que as métricas saem de uma única consulta, com conferências sem funcionário só nos totais."""
+        from sqlalchemy import event
+
+        from app.models.conferencia import Conferencia, StatusConferencia
+
+        criar_conferencia(db_session, ConferenciaCreate(username_funcionario=admin_user.username))
+        inicio = datetime(2024, 1, 5, 10, 0, 0)
+        db_session.add(
+            Conferencia(
+                status=StatusConferencia.FINALIZADA,
+                iniciada_em=inicio,
+                finalizada_em=inicio + timedelta(minutes=10),
+            )
+        )
+        db_session.commit()
+
+        consultas = []
+
+        def registrar(conn, cursor, statement, parameters, context, executemany):
+            consultas.append(statement)
+
+        event.listen(db_session.get_bind(), "before_cursor_execute", registrar)
+        try:
+            response = client.get("/relatorios/metricas", headers=admin_headers)
+        finally:
+            event.remove(db_session.get_bind(), "before_cursor_execute", registrar)
+
+        assert response.status_code == 200
+        assert len(consultas) == 1
+        data = response.json()
+        assert data["total_conferencias"] == 6
+        assert data["conferencias_finalizadas"] == 4
+        assert data["conferencias_canceladas"] == 1
+        assert data["conferencias_em_andamento"] == 1
+        # (20 + 35 + 15 + 10) / 4
+        assert data["tempo_medio_geral_minutos"] == 20.0
+
+        metricas = {m["funcionario_username"]: m for m in data["metricas_por_funcionario"]}
+        assert [m["funcionario_id"] for m in data["metricas_por_funcionario"]] == sorted(
+            [stockist_user.id, admin_user.id]
+        )
+        assert metricas["stockist_test"] == {
+            "funcionario_id": stockist_user.id,
+            "funcionario_username": "stockist_test",
+            "total_conferencias": 2,
+            "tempo_medio_minutos": 17.5,
+            "conferencias_finalizadas": 2,
+            "conferencias_canceladas": 0,
+        }
+        assert metricas["admin_test"] == {
+            "funcionario_id": admin_user.id,
+            "funcionario_username": "admin_test",
+            "total_conferencias": 3,
+            "tempo_medio_minutos": 35.0,
+            "conferencias_finalizadas": 1,
+            "conferencias_canceladas": 1,
+        }
+        assert [m["funcionario_username"] for m in data["funcionarios_mais_rapidos"]] == [
+            "stockist_test",
+            "admin_test",
+        ]
+
 
 class TestRelatorioFiltros:
     """Testes específicos para filtros de data nos endpoints de relatórios."""